@@ -0,0 +1,63 @@
+"""Throughput of batch settlement, in receipts per second.
+
+Builds synthetic shopping sessions in the st.session_state shape, settles
+them one by one and through maksplit.batch.settle_many, and checks that the
+results are identical.
+
+Run from the repo root:  python benchmarks/bench_batch.py [--sessions 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit.batch import settle, settle_many  # noqa: E402
+from receipts import BASE_NAMES, member_names, synthetic_receipt  # noqa: E402
+
+
+def synthetic_sessions(count: int, seed: int = 0) -> list[dict]:
+    """Sessions of 5-60 items and 3-6 members, half of them with extras."""
+    rng = random.Random(seed)
+    sessions = []
+    for index in range(count):
+        members = rng.randint(3, 6)
+        names, costs, selected = synthetic_receipt(rng.randint(5, 60), members, seed=seed + index)
+        sessions.append({
+            "entries": [{"cost": cost, **{name: name in people for name in names}}
+                        for cost, people in zip(costs, selected)],
+            "temp_members": member_names(members)[len(BASE_NAMES):],
+            "show_tax": rng.random() < 0.5,
+            "tax_amount": f"{rng.randint(0, 2000) / 100:.2f}",
+            "show_delivery": rng.random() < 0.5,
+            "delivery_amount": f"{rng.randint(0, 999) / 100:.2f}",
+        })
+    return sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--chunksize", type=int, default=256)
+    args = parser.parse_args()
+
+    sessions = synthetic_sessions(args.sessions)
+    start = time.perf_counter()
+    expected = [settle(session) for session in sessions]
+    serial = time.perf_counter() - start
+    print(f"serial            {len(sessions) / serial:12,.0f} receipts/s")
+
+    for processes in sorted({2, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        results = list(settle_many(sessions, processes=processes, chunksize=args.chunksize))
+        elapsed = time.perf_counter() - start
+        status = "identical" if results == expected else "MISMATCH"
+        print(f"{processes:2d} processes      {len(sessions) / elapsed:12,.0f} receipts/s  {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Time the bulk import pipeline and report the cost per line.
+
+Run from the repo root:  python benchmarks/bench_bulk_import.py [lines ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maksplit import EntryStore, Ledger  # noqa: E402
+from maksplit.bulk_import import parse_lines, parse_table  # noqa: E402
+
+NAMES = ["MS", "AD", "RS"]
+
+
+def make_lines(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [f"{rng.randint(1, 20000) / 100}{''.join(rng.sample('mra', rng.randint(1, 3)))}" for _ in range(count)]
+
+
+def make_csv(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    rows = ["cost," + ",".join(NAMES)]
+    rows += [f"{rng.randint(1, 20000) / 100}," + ",".join(rng.choice("1 ") for _ in NAMES) for _ in range(count)]
+    return rows
+
+
+def run(label: str, parse, lines: list[str]):
+    start = time.perf_counter()
+    result = parse(lines, NAMES)
+    store = EntryStore(NAMES)
+    store.extend(result.costs, result.selected)
+    Ledger.from_store(store)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>6} {len(lines):>8} lines  {elapsed * 1000:8.2f} ms  {elapsed / len(lines) * 1e6:6.2f} µs/line")
+
+
+def main(sizes: list[int]):
+    for size in sizes:
+        run("lines", parse_lines, make_lines(size))
+        run("csv", parse_table, make_csv(size))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000])
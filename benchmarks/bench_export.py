@@ -0,0 +1,82 @@
+"""Time and memory of exporting a receipt's splits.
+
+Writes the per-item allocations of receipts of 1,000 to 100,000 rows and 8
+members in each format, and reports the time and the peak traced memory
+beyond the output itself. Streaming keeps the peak about the same whatever
+the length. Checks every member's exported items add up to their total.
+Exits non-zero when exporting 10,000 items takes over a second.
+
+Run from the repo root:  python benchmarks/bench_export.py
+"""
+import csv
+import io
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit.export import FORMATS, Split, person_cents, write_items  # noqa: E402
+from maksplit.totals import cents_totals  # noqa: E402
+from receipts import receipt_store  # noqa: E402
+
+SIZES = (1000, 10000, 100000)
+
+
+class Discard(io.RawIOBase):
+    """A binary stream that only counts what is written, so the output takes no memory."""
+
+    def __init__(self):
+        self.written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.written += len(data)
+        return len(data)
+
+
+def check(split: Split):
+    """Every member's exported items add up to the totals cents_totals() gives."""
+    out = io.BytesIO()
+    write_items([split], out, "csv")
+    owed: dict[str, int] = {}
+    for row in csv.DictReader(io.StringIO(out.getvalue().decode())):
+        owed[row["member"]] = owed.get(row["member"], 0) + round(float(row["total"]) * 100)
+    source = split.store
+    totals = cents_totals(source.cents_subtotals(), 3117, 499, source.item_tax_cents())[0]
+    people = person_cents(split)
+    assert all(owed.get(name, 0) == round(totals[name] * 100) == sum(people[name]) for name in totals)
+
+
+def main():
+    seconds_10k = 0.0
+    print(f"{'items':>7} {'format':>8} {'ms':>9} {'output KiB':>11} {'peak KiB':>9}")
+    for items in SIZES:
+        store = receipt_store(items, 8)
+        split = Split("Receipt 1", store, Decimal("31.17"), Decimal("4.99"))
+        check(split)
+        for fmt in FORMATS:
+            write_items([split], Discard(), fmt)  # warm up imports
+            out = Discard()
+            start = time.perf_counter()
+            write_items([split], out, fmt)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            try:
+                write_items([split], Discard(), fmt)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            if items == 10000:
+                seconds_10k = max(seconds_10k, elapsed)
+            print(f"{items:>7} {fmt:>8} {elapsed * 1000:>9.1f} {out.written / 1024:>11.0f} {peak / 1024:>9.0f}")
+    sys.exit(1 if seconds_10k > 1.0 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Cost of undo and redo over receipt length.
+
+Edits one row, deletes a few rows and removes a member on receipts of 1,000
+to 100,000 rows, then times undoing and redoing each change, and reports
+the memory a full undo history of single-row edits holds. An edit touches
+one row; deletes and members shift the store's arrays and rebuild its
+position index, as the original change did. Also checks that undoing a
+delete after other rows were deleted elsewhere (another session, or an
+import trimming blank rows) puts the rows back at the end of the shorter
+store, with the ledger still matching it.
+
+Run from the repo root:  python benchmarks/bench_history.py
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit.history import HISTORY_SIZE, Change, History, replay  # noqa: E402
+from maksplit.metrics import deep_size  # noqa: E402
+from maksplit.shared import Room  # noqa: E402
+from receipts import member_names, receipt_store  # noqa: E402
+
+SIZES = (1000, 10000, 100000)
+
+
+def timed(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def check_undo_after_concurrent_deletes():
+    names = member_names(3)
+    room = Room.new(names)
+    for cents in range(1, 7):
+        room.set_row(room.append_row(), f"{cents}.00", names[:2])
+    deleted = room.entries.ids[-3:]
+    change = Change("delete", tuple(room.row_states(deleted)), (), "delete")
+    room.delete_rows(deleted)
+    # Another session deletes earlier rows, so the old positions are past the end
+    room.delete_rows(room.entries.ids[1:4])
+    assert replay(room, change, True) == deleted
+    entries = room.entries
+    assert entries.ids[-3:] == deleted
+    assert all(entries.index_of(row_id) == index for index, row_id in enumerate(entries.ids))
+    assert entries.costs[-3:] == [state.cost for state in change.before]
+    assert room.ledger.matches(entries)
+    replay(room, change, False)
+    assert len(entries) == 1 and room.ledger.matches(entries)
+
+
+def main():
+    check_undo_after_concurrent_deletes()
+    print(f"{'rows':>7} {'edit undo+redo':>15} {'delete undo+redo':>17} {'member undo+redo':>17} {'history KiB':>12}")
+    for rows in SIZES:
+        names = member_names(8)
+        room = Room(receipt_store(rows, 8), names[3:])
+        history = History()
+
+        row_id = room.entries.ids[rows // 2]
+        before = room.row_states([row_id])
+        room.set_row(row_id, "12.34", names[:2])
+        edit = Change("rows", tuple(before), tuple(room.row_states([row_id])), "edit")
+
+        doomed = room.entries.ids[10:15]
+        deleted = Change("delete", tuple(room.row_states(doomed)), (), "delete")
+        room.delete_rows(doomed)
+
+        member = names[-1]
+        removed = Change("remove_members", (room.member_state(member),), (), "remove")
+        room.remove_member(member)
+
+        def round_trip(change):
+            return lambda: (replay(room, change, True), replay(room, change, False))
+
+        edit_ms = timed(round_trip(edit))
+        delete_ms = timed(round_trip(deleted))
+        member_ms = timed(round_trip(removed))
+        assert room.ledger.matches(room.entries)
+
+        for index in range(HISTORY_SIZE):
+            row_ids = [room.entries.ids[index]]
+            history.record(Change("rows", tuple(room.row_states(row_ids)), tuple(room.row_states(row_ids)), "edit"))
+        print(f"{rows:>7} {edit_ms:>12.3f} ms {delete_ms:>14.3f} ms {member_ms:>14.3f} ms "
+              f"{deep_size(history) / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Property checks and timings for the pro-rata tax and delivery split.
+
+Hypothesis generates receipts with 1 to 12 members and up to 60 rows of
+$0 to $500. The rows mix in uneven splits, item tax, unticked rows and
+unusable costs, and each receipt gets its own tax and delivery. Every
+receipt is checked for:
+
+- conservation: the cents engine's per-person totals add up to the items,
+  item tax, tax and delivery to the cent. The Decimal engine rounds each
+  figure on its own and may be off by up to half a cent per member. With no
+  items there is nobody to charge the extras to, and both engines drop them.
+- quota: everyone's share of the extras is within a cent of their exact
+  pro-rata share.
+- monotonicity: a bigger subtotal never gets a smaller share of the extras,
+  and raising the tax never lowers anyone's Decimal total. Largest
+  remainder can take a cent back when the tax goes up (the Alabama
+  paradox), so on the cents engine the check is that nobody loses more
+  than a cent.
+- agreement: a ledger built up row by row matches the store's vectorized
+  recompute.
+
+It then times every engine variant on the same generated receipts. It
+needs Hypothesis (pip install -r requirements-dev.txt) and exits non-zero
+when a property fails.
+
+Run from the repo root:  python benchmarks/bench_pro_rata.py [--examples 500]
+"""
+import argparse
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit import EntryStore, Ledger  # noqa: E402
+from maksplit.totals import cents_totals, compute_totals, decimal_totals  # noqa: E402
+from receipts import member_names  # noqa: E402
+
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:
+    sys.exit("bench_pro_rata.py needs Hypothesis: pip install -r requirements-dev.txt")
+
+ENGINES = ("cents", "decimal")
+
+
+def money(cents: int) -> str:
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+@st.composite
+def receipts(draw, max_rows: int = 60):
+    """(store, tax cents, delivery cents) for a random receipt."""
+    names = member_names(draw(st.integers(1, 12)))
+    store = EntryStore(names)
+    for _ in range(draw(st.integers(0, max_rows))):
+        # Small amounts as often as large ones, where rounding decides more of each share
+        cost = draw(st.one_of(
+            st.integers(0, 500).map(money),
+            st.integers(0, 50000).map(money),
+            st.sampled_from(["", "abc", "1.2.3", "-4.50"]),
+        ))
+        selected = draw(st.lists(st.sampled_from(names), unique=True, max_size=len(names)))
+        index = store.append(cost, selected)
+        if selected and draw(st.booleans()):
+            store.set_weights(index, {name: draw(st.integers(1, 500)) for name in selected})
+        if draw(st.integers(0, 3)) == 0:
+            store.set_tax_rate(index, draw(st.integers(0, 15000)))
+    return store, draw(st.one_of(st.integers(0, 100), st.integers(0, 100000))), draw(st.integers(0, 10000))
+
+
+def cents(amount: float) -> int:
+    return round(amount * 100)
+
+
+def check(store: EntryStore, tax: int, delivery: int, bump: int):
+    ledger = Ledger(store.names)
+    for index in range(len(store)):
+        ledger.post(*store.contribution(index))
+    assert ledger.matches(store), "the row-by-row ledger and the vectorized store disagree"
+
+    subtotals, item_tax = ledger.cents_subtotals(), ledger.item_tax_cents()
+    items = sum(subtotals.values())
+    extras = tax + delivery if items else 0
+    owed = items + sum(item_tax.values()) + extras
+    before = {}
+    for engine in ENGINES:
+        totals, _, tax_applied, delivery_applied = compute_totals(
+            ledger, Decimal(tax).scaleb(-2), Decimal(delivery).scaleb(-2), engine)
+        drift = sum(cents(total) for total in totals.values()) - owed
+        if engine == "cents":
+            assert drift == 0, f"cents totals are off by {drift} cents"
+        else:
+            assert abs(drift) * 2 <= len(totals), f"Decimal totals are off by {drift} cents"
+        before[engine] = totals
+
+    # Everyone's share of the extras on the cents engine, against the exact share
+    shares = {name: cents(before["cents"][name]) - subtotals[name] - item_tax[name] for name in store.names}
+    for name, share in shares.items():
+        assert abs(share * items - extras * subtotals[name]) < max(items, 1), f"{name}'s extras break quota"
+    by_subtotal = sorted(store.names, key=lambda name: subtotals[name])
+    for low, high in zip(by_subtotal, by_subtotal[1:]):
+        if subtotals[high] > subtotals[low]:
+            assert shares[high] >= shares[low], f"{high} has the bigger subtotal but fewer extras than {low}"
+
+    for engine, slack in (("cents", 1), ("decimal", 0)):
+        raised = compute_totals(ledger, Decimal(tax + bump).scaleb(-2), Decimal(delivery).scaleb(-2), engine)[0]
+        for name, total in raised.items():
+            lost = cents(before[engine][name]) - cents(total)
+            assert lost <= slack, f"raising the tax {bump} cents lowers {name}'s {engine} total by {lost} cents"
+
+
+def run_properties(examples: int, derandomize: bool) -> list:
+    """Check every property on `examples` receipts; returns the receipts for timing."""
+    samples = []
+
+    @settings(max_examples=examples, deadline=None, database=None, derandomize=derandomize)
+    @given(receipts(), st.one_of(st.just(1), st.integers(1, 1000)))
+    def properties(receipt, bump):
+        check(*receipt, bump)
+        samples.append(receipt)
+
+    properties()
+    return samples
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def time_variants(samples: list):
+    """Time each engine variant over the same receipts."""
+    ledgers = [(Ledger.from_store(store), store, Decimal(tax).scaleb(-2), Decimal(delivery).scaleb(-2))
+               for store, tax, delivery in samples]
+    variants = {
+        "cents, ledger": lambda: [
+            cents_totals(ledger.cents_subtotals(), int(tax * 100), int(delivery * 100), ledger.item_tax_cents())
+            for ledger, _, tax, delivery in ledgers],
+        "decimal, ledger": lambda: [
+            decimal_totals(ledger.subtotals(), tax, delivery, ledger.item_tax_cents())
+            for ledger, _, tax, delivery in ledgers],
+        "cents, store recompute": lambda: [
+            compute_totals(store, tax, delivery, "cents") for _, store, tax, delivery in ledgers],
+        "decimal, store recompute": lambda: [
+            compute_totals(store, tax, delivery, "decimal") for _, store, tax, delivery in ledgers],
+    }
+    print(f"{'variant':>26} {'µs/receipt':>11}")
+    for name, run in variants.items():
+        print(f"{name:>26} {best_of(run) / len(samples) * 1e6:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--examples", type=int, default=300, help="receipts to generate (default 300)")
+    parser.add_argument("--random", action="store_true", help="new random receipts instead of the fixed sequence")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    samples = run_properties(args.examples, not args.random)
+    rows = sum(len(store) for store, _, _ in samples)
+    print(f"{len(samples)} receipts ({rows} rows) pass every property in {time.perf_counter() - start:.1f} s\n")
+    time_variants(samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Fuzz the quick-entry parser against the original parser and time it.
+
+Also checks that tables parsed by letter (the base names, or members with
+letters of their own) agree with parsing the same text word by word.
+
+Run from the repo root:  python benchmarks/bench_quick_entry.py [cases]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maksplit.quick_entry import BASE_NAMES, TokenTable, parse_quick_entry, token_table  # noqa: E402
+ALPHABET = "0123456789.-mraMRAsdxyz +,"
+
+
+def original_parse(text: str, names: list[str]) -> tuple[str, dict]:
+    """The per-character parser the app shipped with (base names only)."""
+    checkbox_states = {name: False for name in names}
+    text_lower = text.lower()
+    if 'm' in text_lower:
+        checkbox_states["MS"] = True
+    if 'r' in text_lower:
+        checkbox_states["RS"] = True
+    if 'a' in text_lower:
+        checkbox_states["AD"] = True
+    cleaned_amount = ''.join(c for c in text if c.isdigit() or c == '.' or c == '-')
+    return cleaned_amount, checkbox_states
+
+
+def fuzz(cases: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12))) for _ in range(cases)]
+
+
+def main(cases: int):
+    texts = fuzz(cases)
+    mismatches = [text for text in texts if parse_quick_entry(text, BASE_NAMES) != original_parse(text, BASE_NAMES)]
+    print(f"base names: {len(mismatches)} mismatches in {cases} fuzzed inputs")
+    for text in mismatches[:10]:
+        print(f"  {text!r}: {parse_quick_entry(text, BASE_NAMES)} != {original_parse(text, BASE_NAMES)}")
+
+    names = tuple(BASE_NAMES + ["Zed", "Bob"])
+    by_letter, by_word = TokenTable(names), TokenTable(names)
+    by_word.letters = None
+    differ = [text for text in texts + [text + " zed bo" for text in texts[:1000]]
+              if by_letter.parse(text) != by_word.parse(text)]
+    print(f"{names}: {len(differ)} differences between parsing by letter and by word")
+    mismatches += differ
+
+    for names in (BASE_NAMES, BASE_NAMES + ["Ram", "Sam", "Sara", "Priya", "Dev"]):
+        table = token_table(tuple(names))
+        start = time.perf_counter()
+        for text in texts:
+            table.parse(text)
+        elapsed = time.perf_counter() - start
+        print(f"{len(names):>2} members  {cases / elapsed:>12,.0f} parses/s  {elapsed / cases * 1e6:6.2f} µs/parse")
+
+    start = time.perf_counter()
+    for text in texts:
+        original_parse(text, BASE_NAMES)
+    elapsed = time.perf_counter() - start
+    print(f"original    {cases / elapsed:>12,.0f} parses/s  {elapsed / cases * 1e6:6.2f} µs/parse")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000))
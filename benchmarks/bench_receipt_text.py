@@ -0,0 +1,189 @@
+"""Accuracy and throughput of the receipt text parser.
+
+Checks the hand-written receipts in benchmarks/receipt_corpus/ against
+expected.json, then scores a few hundred generated receipts in four styles
+(warehouse club, grocery e-receipt, restaurant, OCR scan with misread
+digits) and times receipts of thousands of lines. Item accuracy is the
+share of receipts whose items all come out exactly right. Exits non-zero
+when a corpus receipt is misread or parsing 5,000 lines takes over a second.
+
+Run from the repo root:  python benchmarks/bench_receipt_text.py
+"""
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maksplit import EntryStore, Ledger  # noqa: E402
+from maksplit.receipt_text import parse_receipt  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "receipt_corpus"
+WORDS = ["KS", "ORG", "EGGS", "MILK", "BREAD", "COFFEE", "OLIVE", "OIL", "RICE", "SALMON", "BEEF", "TOWEL",
+         "APPLES", "CHEESE", "PASTA", "SAUCE", "WATER", "40PK", "2LB", "12CT", "BATTERY", "SOAP", "CASHEWS"]
+OCR_MISREADS = {"0": "O", "9": "g", "5": "S", "1": "l", "8": "B"}
+
+
+def money(cents: int) -> str:
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+def item_name(rng: random.Random) -> str:
+    return " ".join(rng.sample(WORDS, rng.randint(2, 4)))
+
+
+def warehouse(rng: random.Random, items: int, ocr: bool = False):
+    """Lines of a warehouse-club receipt, and its true item cents, tax and subtotal."""
+    lines = ["COSTCO WHOLESALE", "Store #1234", f"Member {rng.randint(10**11, 10**12)}", ""]
+    truth = []
+    for _ in range(items):
+        cents = rng.randint(99, 19999)
+        flag = rng.choice(["E ", ""])
+        lines.append(f"{flag}{rng.randint(1000, 9999999)} {item_name(rng)} {money(cents)} {rng.choice('ANE')}")
+        if rng.random() < 0.1:
+            off = rng.randint(1, cents // 100) * 100 if cents >= 100 else 0
+            if off:
+                lines.append(f"{rng.randint(1000, 9999999)} /{rng.randint(1000, 9999999)} {money(off)}-")
+                cents -= off
+        truth.append(cents)
+    subtotal = sum(truth)
+    tax = round(subtotal * 0.1) // 3
+    lines += [f"SUBTOTAL {money(subtotal)}", f"TAX {money(tax)}", f"**** TOTAL {money(subtotal + tax)}",
+              "XXXXXXXXXXXX1234 CHIP Read", f"VISA {money(subtotal + tax)}", "CHANGE 0.00",
+              f"TOTAL NUMBER OF ITEMS SOLD = {items}", "12/03/2024 14:22 1234 12 345 67"]
+    if ocr:
+        lines = [misread(rng, line) for line in lines]
+    return lines, truth, tax, subtotal
+
+
+def misread(rng: random.Random, line: str) -> str:
+    """Swap some digits after the first of a price for letters OCR confuses them with."""
+    head, _, price = line.rpartition(" ")
+    if price in "ANE" and head:
+        head, _, price = head.rpartition(" ")
+        price += line[len(head) + 1 + len(price):]
+    chars = list(price)
+    for i, char in enumerate(chars[1:], start=1):
+        if char in OCR_MISREADS and rng.random() < 0.15:
+            chars[i] = OCR_MISREADS[char]
+    return f"{head} {''.join(chars)}" if head else "".join(chars)
+
+
+def grocery(rng: random.Random, items: int):
+    lines = ["Fresh Market #204", "123 Main Street", "(217) 555-0142", "Order #88812 12/05/2024 6:41 PM", ""]
+    truth = []
+    for _ in range(items):
+        kind = rng.random()
+        if kind < 0.2:
+            pounds, per_lb = rng.randint(50, 400) / 100, rng.randint(99, 1299)
+            cents = round(pounds * per_lb)
+            lines += [item_name(rng).title(), f"{pounds:.2f} lb @ ${money(per_lb)}/lb    ${money(cents)}"]
+        elif kind < 0.35:
+            count, each = rng.randint(2, 6), rng.randint(50, 999)
+            cents = count * each
+            lines += [item_name(rng).title(), f"{count} @ ${money(each)}    ${money(cents)}"]
+        else:
+            cents = rng.randint(50, 4999)
+            lines.append(f"{item_name(rng).title()}    ${money(cents)}")
+        if rng.random() < 0.05 and cents > 100:
+            lines.append(f"Coupon: {item_name(rng).title()}   -${money(50)}")
+            cents -= 50
+        truth.append(cents)
+    subtotal = sum(truth)
+    tax = subtotal * 25 // 1000
+    lines += ["", f"Subtotal    ${money(subtotal)}", f"Sales Tax    ${money(tax)}", f"Total    ${money(subtotal + tax)}",
+              "", f"Visa ending 4242    ${money(subtotal + tax)}", "Rewards points earned: 32"]
+    return lines, truth, tax, subtotal
+
+
+def restaurant(rng: random.Random, items: int):
+    lines = ["THE CORNER BISTRO", f"Table {rng.randint(1, 40)}      Server: Alex", ""]
+    truth = [rng.randint(1, 4) * rng.randint(300, 3500) for _ in range(items)]
+    lines += [f"{rng.randint(1, 4)} {item_name(rng).title()}    {money(cents)}" for cents in truth]
+    subtotal = sum(truth)
+    state, city = subtotal * 65 // 1000, subtotal // 100
+    lines += ["", f"Subtotal    {money(subtotal)}", f"State Tax    {money(state)}", f"City Tax    {money(city)}",
+              f"Total    {money(subtotal + state + city)}", "", "Tip ______________", "Total ____________"]
+    return lines, truth, state + city, subtotal
+
+
+STYLES = {
+    "warehouse": warehouse,
+    "grocery": grocery,
+    "restaurant": restaurant,
+    "ocr": lambda rng, items: warehouse(rng, items, ocr=True),
+}
+
+
+def cents(text: str) -> int:
+    whole, _, part = text.partition(".")
+    return int(whole or 0) * 100 + int((part + "00")[:2])
+
+
+def check_corpus() -> int:
+    expected = json.loads((CORPUS / "expected.json").read_text())
+    misses = 0
+    for name, want in sorted(expected.items()):
+        with open(CORPUS / name, encoding="utf-8") as handle:
+            result = parse_receipt(handle)
+        got = {"items": result.costs, "tax": result.tax, "subtotal": result.subtotal}
+        ok = got == want
+        misses += not ok
+        print(f"  {name:<16} {'ok' if ok else f'MISREAD {got}'}")
+    return misses
+
+
+def score_styles(receipts: int = 100):
+    print(f"{'style':>10} {'receipts':>9} {'items exact':>12} {'item recall':>12} {'tax exact':>10}")
+    for style, make in STYLES.items():
+        rng = random.Random(style)
+        exact = recalled = total_items = tax_ok = 0
+        for _ in range(receipts):
+            lines, truth, tax, subtotal = make(rng, rng.randint(5, 60))
+            result = parse_receipt(lines)
+            got = [cents(cost) for cost in result.costs]
+            exact += got == truth
+            remaining = list(got)
+            for item in truth:
+                if item in remaining:
+                    remaining.remove(item)
+                    recalled += 1
+            total_items += len(truth)
+            tax_ok += cents(result.tax or "0") == tax
+        print(f"{style:>10} {receipts:>9} {exact / receipts:>11.1%} {recalled / total_items:>11.1%} "
+              f"{tax_ok / receipts:>9.1%}")
+
+
+def time_large(sizes=(1000, 5000, 20000)) -> float:
+    """Parse and load receipts of `sizes` lines; returns the seconds for 5,000 lines."""
+    seconds_5k = 0.0
+    for size in sizes:
+        # One long receipt: about 12 lines are header and footer
+        lines = warehouse(random.Random(size), size - 12)[0][:size]
+        start = time.perf_counter()
+        result = parse_receipt(lines, ("MS", "AD", "RS"))
+        store = EntryStore(["MS", "AD", "RS"], capacity=len(result))
+        store.extend(result.costs, result.selected)
+        Ledger.from_store(store)
+        elapsed = time.perf_counter() - start
+        if size == 5000:
+            seconds_5k = elapsed
+        print(f"  {size:>6} lines  {len(result):>6} items  {elapsed * 1000:8.2f} ms  "
+              f"{size / elapsed:>10,.0f} lines/s")
+    return seconds_5k
+
+
+def main():
+    print("corpus:")
+    misses = check_corpus()
+    print()
+    score_styles()
+    print("\nthroughput (parse + load into the store and ledger):")
+    seconds_5k = time_large()
+    sys.exit(1 if misses or seconds_5k > 1.0 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Measure server time and payload per interaction against a live Streamlit server.
+
+The script starts `streamlit run` headless, talks to it over the same
+websocket the browser uses, fills in a receipt and then times typing into a
+row and ticking a checkbox. For each interaction it reports the time until
+the server says the run finished and the bytes of ForwardMsgs it sent.
+"first render" is the server's first session, which pays for the app's
+imports; "new session" is the time to first interaction on a warm server.
+--breakdown lists the largest elements of a full rerun by bytes sent.
+
+Run from the repo root:  python benchmarks/bench_rerun.py [--rows 200] [--repeat 7] [--app streamlit_app.py]
+To compare against an older revision, point --app at a `git worktree` checkout.
+"""
+import argparse
+import asyncio
+import collections
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect as websocket_connect
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+class Session:
+    """A minimal stand-in for the browser: tracks widget state and sends reruns."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.widgets = {}
+        self.fragments = {}
+        self.page_script_hash = ""
+        self.element_bytes = collections.Counter()
+
+    async def rerun(self, changes=(), fragment_id: str = "") -> tuple[float, int, int]:
+        """Send a rerun with the given widget changes; return (seconds, bytes, messages)."""
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.page_script_hash = self.page_script_hash
+        state.fragment_id = fragment_id
+        triggers = []
+        for widget_id, field, value in changes:
+            widget = self.widgets.setdefault(widget_id, {"id": widget_id})
+            widget[field] = value
+            if field == "trigger_value":
+                triggers.append(widget_id)
+        for widget in self.widgets.values():
+            proto = state.widget_states.widgets.add()
+            for field, value in widget.items():
+                setattr(proto, field, value)
+        for widget_id in triggers:
+            del self.widgets[widget_id]
+
+        start = time.perf_counter()
+        await self.connection.send(msg.SerializeToString())
+        payload = messages = 0
+        while True:
+            raw = await self.connection.recv()
+            payload += len(raw)
+            messages += 1
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                self.page_script_hash = forward.new_session.page_script_hash
+            elif kind == "delta":
+                self._track(forward.delta)
+            elif kind == "script_finished":
+                return time.perf_counter() - start, payload, messages
+
+    def _track(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        label = element.markdown.body.strip()[:30] if kind == "markdown" else ""
+        self.element_bytes[f"{kind} {label}".strip()] += delta.ByteSize()
+        if kind == "text_input":
+            proto = element.text_input
+            value = proto.value if proto.set_value else proto.default
+            self.widgets.setdefault(proto.id, {"id": proto.id, "string_value": value})
+        elif kind == "checkbox":
+            proto = element.checkbox
+            value = proto.value if proto.set_value else proto.default
+            self.widgets.setdefault(proto.id, {"id": proto.id, "bool_value": value})
+        else:
+            return
+        self.fragments[proto.id] = delta.fragment_id
+
+    def find(self, key: str) -> str:
+        """Return the widget id for a user key such as "cost_3"."""
+        for widget_id in self.widgets:
+            if widget_id.endswith(f"-{key}"):
+                return widget_id
+        raise KeyError(key)
+
+    async def edit(self, key: str, field: str, value) -> tuple[float, int, int]:
+        widget_id = self.find(key)
+        return await self.rerun([(widget_id, field, value)], self.fragments.get(widget_id, ""))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def connect(port: int):
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            return await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream", max_size=None)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+def report(label: str, results: list[tuple[float, int, int]]):
+    """Print the median time and payload of repeated runs."""
+    seconds = statistics.median(result[0] for result in results)
+    payload = statistics.median(result[1] for result in results)
+    messages = statistics.median(result[2] for result in results)
+    print(f"{label:<28} {seconds * 1000:8.1f} ms  {payload / 1024:9.1f} KiB  {messages:5.0f} msgs")
+
+
+async def measure(port: int, rows: int, repeat: int, breakdown: bool = False):
+    session = Session(await connect(port))
+    report("first render", [await session.rerun()])
+    fresh = []
+    for _ in range(repeat):
+        other = Session(await connect(port))
+        fresh.append(await other.rerun())
+        await other.connection.close()
+    report("new session", fresh)
+    for index in range(rows):
+        await session.edit(f"cost_{index}", "string_value", f"{index % 50 + 1}mr")
+    report(f"type into row (of {rows})", [
+        await session.edit(f"cost_{rows - 1}", "string_value", f"{99 + attempt}mra") for attempt in range(repeat)
+    ])
+    report("tick a checkbox", [
+        await session.edit(f"AD_{rows - 2}", "bool_value", attempt % 2 == 0) for attempt in range(repeat)
+    ])
+    session.element_bytes.clear()
+    report("full rerun", [await session.rerun() for _ in range(repeat)])
+    if breakdown:
+        for label, size in session.element_bytes.most_common(12):
+            print(f"  {size / repeat:8.0f} B  {label}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--app", default=str(REPO / "streamlit_app.py"))
+    parser.add_argument("--breakdown", action="store_true", help="list the largest elements of a full rerun")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.app, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=Path(args.app).resolve().parent, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(measure(port, args.rows, args.repeat, args.breakdown))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
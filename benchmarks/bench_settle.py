@@ -0,0 +1,56 @@
+"""Settle-up time and transfer count over group size.
+
+Random balances that sum to zero, with a share of members owing round
+amounts so some groups settle among themselves. Compares the greedy plan,
+the exact minimum where it is affordable, and settle_up() as the app calls
+it.
+
+Run from the repo root:  python benchmarks/bench_settle.py
+"""
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maksplit.settle import exact_transfers, greedy_transfers, settle_up  # noqa: E402
+
+GROUP_SIZES = (3, 5, 8, 12, 16, 20, 50, 100, 200, 500)
+# Largest group the exact solver is timed on without a deadline
+EXACT_MAX = 16
+
+
+def random_balances(members: int, rng: random.Random) -> dict[str, int]:
+    values = [rng.choice([rng.randint(-20000, 20000), rng.choice([-1500, -500, 500, 1500])])
+              for _ in range(members - 1)]
+    values.append(-sum(values))
+    return {f"m{i}": cents for i, cents in enumerate(values)}
+
+
+def timed(func, *args) -> tuple[float, list]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'members':>7} {'greedy ms':>10} {'transfers':>9} {'exact ms':>9} {'transfers':>9} {'settle_up ms':>12} {'transfers':>9}")
+    for members in GROUP_SIZES:
+        rows = []
+        for _ in range(5 if members <= EXACT_MAX else 20):
+            balances = random_balances(members, rng)
+            greedy = timed(greedy_transfers, balances)
+            exact = timed(exact_transfers, balances) if members <= EXACT_MAX else (float("nan"), [])
+            chosen = timed(settle_up, balances)
+            rows.append((greedy[0], len(greedy[1]), exact[0], len(exact[1]), chosen[0], len(chosen[1])))
+        columns = [statistics.median(column) for column in zip(*rows)]
+        exact_count = f"{columns[3]:9.1f}" if members <= EXACT_MAX else f"{'-':>9}"
+        print(f"{members:7d} {columns[0] * 1000:10.3f} {columns[1]:9.1f} {columns[2] * 1000:9.3f} "
+              f"{exact_count} {columns[4] * 1000:12.3f} {columns[5]:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
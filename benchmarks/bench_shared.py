@@ -0,0 +1,163 @@
+"""Load test for shared rooms: dozens of sessions editing one receipt.
+
+Each simulated session is a thread that works the way a browser session of
+the app does. An edit (cost change, tick, append, delete or member change)
+goes through the room under its lock, like a widget callback, and is
+followed by a rerun of the workspace. Every other session reruns too, once
+its room watcher sees deltas it did not make, so each edit fans out to a
+rerun in every session. A rerun catches up on the deltas, then renders the
+split cards, the grid window, the read-only summaries and the settle-up
+panel, and waits --send-ms for what the app does outside Python's GIL
+(serializing the page and writing it to the browser).
+
+It runs twice: with the lock held only to copy the rows, as the app does,
+and with the lock held for the whole render. Reports edits and reruns per
+second, how long an edit waits for the lock, the rerun latency, and checks
+the ledger still matches a recompute.
+
+Run from the repo root:  python benchmarks/bench_shared.py [--editors 8 24 48] [--edits 100]
+"""
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit.cards import render_cards  # noqa: E402
+from maksplit.grid import GRID_WINDOW_AFTER, GRID_WINDOW_BEFORE, grid_window, summarize_rows  # noqa: E402
+from maksplit.quick_entry import BASE_NAMES  # noqa: E402
+from maksplit.settle import net_balances, paid_cents, settle_up  # noqa: E402
+from maksplit.shared import Room  # noqa: E402
+from maksplit.trip import Receipt  # noqa: E402
+from receipts import EXTRA_NAMES, receipt_store  # noqa: E402
+
+SETTINGS = {"show_tax": True, "show_delivery": True, "tax_amount": "8.25", "delivery_amount": "4.99"}
+MODES = ("snapshot", "whole render")
+
+
+def render(receipt: Receipt, entries, temp_members: list, active: int, send: float):
+    """What a workspace rerun reads: cards, grid window, summaries and settle-up."""
+    totals, subtotals, tax, delivery = receipt.totals()
+    render_cards(totals, subtotals, tax, delivery)
+    names = BASE_NAMES + temp_members
+    start, stop = grid_window(active, len(entries))
+    for index in range(start, stop):
+        row_id = entries.ids[index]
+        (entries.costs[index], entries.errors.get(row_id), [entries.flag(index, name) for name in names])
+    summarize_rows(entries, 0, start)
+    summarize_rows(entries, stop, len(entries))
+    settle_up(net_balances(totals, paid_cents(entries, BASE_NAMES[0]), BASE_NAMES[0]))
+    time.sleep(send)
+
+
+def rerun(room: Room, receipt: Receipt, mode: str, active: int, send: float):
+    if mode == "snapshot":
+        with room.lock:
+            entries, temp_members = room.entries.copy(), list(room.temp_members)
+        render(receipt, entries, temp_members, active, send)
+    else:
+        with room.lock:
+            render(receipt, room.entries, room.temp_members, active, send)
+
+
+def edit(room: Room, origin: str, rng: random.Random):
+    with room.lock:
+        row_ids = list(room.entries.ids)
+        names = list(room.entries.names)
+    roll = rng.random()
+    if roll < 0.6:
+        picked = rng.sample(names, rng.randint(1, len(names)))
+        room.set_row(rng.choice(row_ids), f"{rng.randint(1, 20000) / 100:.2f}", picked, origin)
+    elif roll < 0.85:
+        room.set_flag(rng.choice(row_ids), rng.choice(names), rng.random() < 0.5, origin)
+    elif roll < 0.93:
+        room.append_row(origin)
+    elif roll < 0.98:
+        room.delete_rows([rng.choice(row_ids)], origin)
+    elif roll < 0.99:
+        room.add_member(rng.choice(EXTRA_NAMES), origin)
+    else:
+        room.remove_member(rng.choice(EXTRA_NAMES), origin)
+
+
+def session(room: Room, origin: str, edits: int, seed: int, mode: str, send: float, stats: dict):
+    rng = random.Random(seed)
+    receipt = Receipt("Receipt 1", room, dict(SETTINGS))
+    version = room.version
+
+    def catch_up_and_rerun():
+        nonlocal version
+        start = time.perf_counter()
+        changes = room.changes_since(version)
+        version = room.version if changes is None else changes[-1].version if changes else version
+        rerun(room, receipt, mode, rng.randrange(GRID_WINDOW_BEFORE + GRID_WINDOW_AFTER + 1), send)
+        stats["rerun"].append(time.perf_counter() - start)
+
+    for _ in range(edits):
+        start = time.perf_counter()
+        edit(room, origin, rng)
+        stats["edit"].append(time.perf_counter() - start)
+        catch_up_and_rerun()
+        # The room watcher: rerun once for whatever other sessions changed meanwhile
+        changes = room.changes_since(version)
+        if changes is None or any(delta.origin != origin for delta in changes):
+            catch_up_and_rerun()
+
+
+def percentile(values: list, fraction: float) -> float:
+    return sorted(values)[int(len(values) * fraction)] * 1000
+
+
+def run(editors: int, edits: int, rows: int, mode: str, send: float) -> dict:
+    room = Room(receipt_store(rows, len(BASE_NAMES)))
+    stats = {"edit": [], "rerun": []}
+    threads = [
+        threading.Thread(target=session, args=(room, f"session-{n}", edits, n, mode, send, stats))
+        for n in range(editors)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "edits_per_s": len(stats["edit"]) / elapsed,
+        "reruns_per_s": len(stats["rerun"]) / elapsed,
+        "edit_p50_ms": statistics.median(stats["edit"]) * 1000,
+        "edit_p99_ms": percentile(stats["edit"], 0.99),
+        "rerun_p50_ms": statistics.median(stats["rerun"]) * 1000,
+        "rerun_p99_ms": percentile(stats["rerun"], 0.99),
+        "consistent": room.ledger.matches(room.entries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--editors", type=int, nargs="+", default=[8, 24, 48])
+    parser.add_argument("--edits", type=int, default=100, help="edits per editor")
+    parser.add_argument("--rows", type=int, default=500, help="rows on the receipt at the start")
+    parser.add_argument("--send-ms", type=float, default=2.0, help="time a rerun spends outside the GIL")
+    args = parser.parse_args()
+
+    print(f"{'lock held for':>13} {'editors':>7} {'edits/s':>8} {'reruns/s':>9} {'edit p50':>9} {'edit p99':>9} "
+          f"{'rerun p50':>10} {'rerun p99':>10}  ledger")
+    consistent = True
+    for editors in args.editors:
+        for mode in MODES:
+            result = run(editors, args.edits, args.rows, mode, args.send_ms / 1000)
+            consistent &= result["consistent"]
+            print(f"{mode:>13} {editors:7d} {result['edits_per_s']:8,.0f} {result['reruns_per_s']:9,.0f} "
+                  f"{result['edit_p50_ms']:6.2f} ms {result['edit_p99_ms']:6.2f} ms "
+                  f"{result['rerun_p50_ms']:7.2f} ms {result['rerun_p99_ms']:7.2f} ms  "
+                  f"{'consistent' if result['consistent'] else 'MISMATCH'}")
+    sys.exit(0 if consistent else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Compare the Decimal and integer-cents split engines.
+
+Run from the repo root:  python benchmarks/bench_split_engines.py
+"""
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit import Ledger  # noqa: E402
+from maksplit.totals import cents_totals, decimal_totals  # noqa: E402
+from receipts import receipt_store  # noqa: E402
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def decimal_engine(ledger: Ledger):
+    return decimal_totals(ledger.subtotals(), Decimal("8.25"), Decimal("4.99"))
+
+
+def cents_engine(ledger: Ledger):
+    return cents_totals(ledger.cents_subtotals(), 825, 499)
+
+
+def reconciles(result) -> bool:
+    totals, subtotals, tax, delivery = result
+    if not any(subtotals.values()):
+        return True  # nothing to share the extras over
+    return round(sum(totals.values()) * 100) == round(sum(subtotals.values()) * 100 + tax * 100 + delivery * 100)
+
+
+def main():
+    print(f"{'rows':>6} {'members':>7}  {'decimal full':>12} {'cents full':>11}  {'decimal edit':>12} {'cents edit':>11}")
+    for rows in (100, 1000, 10000):
+        for members in (3, 8, 20):
+            store = receipt_store(rows, members)
+            full_decimal = best_of(lambda: decimal_totals(store.subtotals(), Decimal("8.25"), Decimal("4.99")))
+            full_cents = best_of(lambda: cents_totals(store.cents_subtotals(), 825, 499))
+
+            # One edit through the ledger, then the totals the next rerun reads
+            ledger = Ledger.from_store(store)
+            old = store.contribution(0)
+            new = (old[0] + 1, tuple(store.names))
+
+            def edit(engine):
+                ledger.replace(old, new)
+                ledger.replace(new, old)
+                engine(ledger)
+
+            edit_decimal = best_of(lambda: edit(decimal_engine))
+            edit_cents = best_of(lambda: edit(cents_engine))
+            print(f"{rows:>6} {members:>7}  {full_decimal * 1000:9.3f} ms {full_cents * 1000:8.3f} ms"
+                  f"  {edit_decimal * 1e6:9.1f} µs {edit_cents * 1e6:8.1f} µs")
+
+    receipts = [receipt_store(random.Random(seed).randint(1, 60), 3, seed) for seed in range(500)]
+    off_decimal = sum(not reconciles(decimal_engine(Ledger.from_store(store))) for store in receipts)
+    off_cents = sum(not reconciles(cents_engine(Ledger.from_store(store))) for store in receipts)
+    print(f"totals off by a cent: decimal {off_decimal}/500 receipts, cents {off_cents}/500")
+
+
+if __name__ == "__main__":
+    main()
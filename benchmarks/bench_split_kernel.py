@@ -0,0 +1,75 @@
+"""Cost of uneven splits and item tax in the vectorized split kernel.
+
+Times EntryStore.cents_subtotals(), subtotals() and item_tax_cents() on
+receipts where every row splits equally, and on the same receipts with half
+the rows given weights, percentages or fixed amounts and a quarter given an
+item tax rate. Also times the equal-split-only formula the kernel replaced,
+as the baseline.
+
+Run from the repo root:  python benchmarks/bench_split_kernel.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from receipts import receipt_store  # noqa: E402
+
+
+def equal_only_subtotals(store) -> np.ndarray:
+    """The equal-split kernel before weights existed."""
+    mask = store.mask
+    sizes = np.maximum(mask.sum(axis=1), 1)
+    base, leftover = np.divmod(store.cents, sizes)
+    start = base % sizes
+    position = np.cumsum(mask, axis=1) - 1
+    extra = (position - start[:, None]) % sizes[:, None] < leftover[:, None]
+    return ((base[:, None] + extra) * mask).sum(axis=0)
+
+
+def mix_modes(store, seed: int = 0):
+    """Give half the rows uneven weights and a quarter an item tax rate."""
+    rng = random.Random(seed)
+    for index in range(len(store)):
+        selected = store.selected(index)
+        roll = rng.random()
+        if roll < 0.2 and selected:
+            store.set_weights(index, {name: rng.randint(1, 4) * 100 for name in selected})  # shares
+        elif roll < 0.35 and selected:
+            store.set_weights(index, {name: rng.randint(5, 60) * 100 for name in selected})  # percent
+        elif roll < 0.5 and selected:
+            store.set_weights(index, {name: rng.randint(1, 5000) for name in selected})  # fixed cents
+        if rng.random() < 0.25:
+            store.set_tax_rate(index, rng.choice([7250, 8875, 10000]))
+
+
+def best_of(func, repeat: int = 7) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    print(f"{'rows':>6} {'members':>7}  {'baseline':>9} {'equal':>9} {'mixed':>9}  "
+          f"{'Decimal eq':>10} {'Decimal mx':>10}  {'tax eq':>8} {'tax mx':>8}   (ms)")
+    for rows in (100, 1000, 10000):
+        for members in (3, 8, 20):
+            equal = receipt_store(rows, members)
+            mixed = receipt_store(rows, members)
+            mix_modes(mixed)
+            print(f"{rows:6d} {members:7d}  {best_of(lambda: equal_only_subtotals(equal)):9.3f} "
+                  f"{best_of(equal.cents_subtotals):9.3f} {best_of(mixed.cents_subtotals):9.3f}  "
+                  f"{best_of(equal.subtotals):10.3f} {best_of(mixed.subtotals):10.3f}  "
+                  f"{best_of(equal.item_tax_cents):8.3f} {best_of(mixed.item_tax_cents):8.3f}")
+
+
+if __name__ == "__main__":
+    main()
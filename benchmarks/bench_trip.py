@@ -0,0 +1,75 @@
+"""Cost of a trip's per-person totals after one edit.
+
+Builds trips of 2 to 50 receipts of 1,000 rows and 8 members, each with its
+own tax and delivery, edits one row of one receipt and times Trip.totals()
+three ways: with each receipt's cached totals (only the edited receipt is
+recomputed), with every receipt recomputed from its ledger, and with every
+receipt recomputed from its rows, as splitting the stops one by one would.
+Checks the cached figures match the recomputed ones to the cent.
+
+Run from the repo root:  python benchmarks/bench_trip.py
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit.shared import Room  # noqa: E402
+from maksplit.totals import compute_totals, parse_extra  # noqa: E402
+from maksplit.trip import Receipt, Trip  # noqa: E402
+from receipts import member_names, receipt_store  # noqa: E402
+
+RECEIPTS = (2, 5, 20, 50)
+ROWS = 1000
+
+
+def timed(func, repeat: int = 20) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def extras(receipt: Receipt):
+    settings = receipt.settings
+    return parse_extra(settings["tax_amount"]), parse_extra(settings["delivery_amount"])
+
+
+def main():
+    names = member_names(8)
+    print(f"{'receipts':>8} {'cached':>10} {'from ledgers':>13} {'from rows':>11}")
+    for count in RECEIPTS:
+        trip = Trip(
+            Receipt(f"Stop {n + 1}", Room(receipt_store(ROWS, 8, seed=n), names[3:]),
+                    {"show_tax": True, "show_delivery": True, "tax_amount": f"{n + 3}.17", "delivery_amount": "4.99"})
+            for n in range(count)
+        )
+        trip.totals()
+        room = trip.receipts[count // 2].room
+        row_ids = iter(room.entries.ids)
+
+        def after_edit():
+            room.set_row(next(row_ids), "12.34", names[:2])
+            return trip.totals()
+
+        def from_ledgers():
+            return [compute_totals(r.room.ledger, *extras(r)) for r in trip.receipts]
+
+        def from_rows():
+            return [compute_totals(r.room.entries, *extras(r)) for r in trip.receipts]
+
+        cached_ms = timed(after_edit)
+        ledgers_ms = timed(from_ledgers)
+        rows_ms = timed(from_rows)
+        _, per_receipt = trip.totals()
+        assert [totals for _, totals in per_receipt] == [totals for totals, *_ in from_rows()]
+        print(f"{count:>8} {cached_ms:>7.3f} ms {ledgers_ms:>10.3f} ms {rows_ms:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
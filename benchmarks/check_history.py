@@ -0,0 +1,134 @@
+"""Randomized check that undo and redo walk a room back and forth exactly.
+
+Drives random rooms through edits, ticks, uneven splits, payers, deletes
+and temporary members coming and going, recording each change the way the
+app does, with random undos and redos in between. After every step
+the room must be exactly as it was after the change the history now points
+at: the same rows in the same order under the same ids, with the same
+costs, ticks, weights, item tax and payers, the same temporary members,
+and a ledger that matches the rows. Appends and imports are left out: the
+blank rows the grid appends, and those an import replaces, are not
+undoable changes. Exits non-zero on the first difference.
+
+Run from the repo root:  python benchmarks/check_history.py [--cases 200] [--steps 80] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from check_ledger import random_cost  # noqa: E402
+from maksplit.history import Change, History, replay  # noqa: E402
+from maksplit.shared import Room  # noqa: E402
+from receipts import EXTRA_NAMES, member_names, receipt_store  # noqa: E402
+
+
+def state(room: Room) -> tuple:
+    """The room's contents, with members by name (a restored member comes back as the last column)."""
+    entries = room.entries
+    rows = tuple(
+        (row_id, entries.costs[index], entries.payers[index], entries.tax_rate(index),
+         tuple(sorted(entries.selected(index))), tuple(sorted(entries.split_weights(index).items())))
+        for index, row_id in enumerate(entries.ids)
+    )
+    return rows, tuple(sorted(room.temp_members))
+
+
+def record_rows(room: Room, history: History, row_ids: list[int], change) -> bool:
+    before = room.row_states(row_ids)
+    if change():
+        history.record(Change("rows", tuple(before), tuple(room.row_states(row_ids)), "edit"))
+        return True
+    return False
+
+
+def random_change(room: Room, history: History, rng: random.Random) -> bool:
+    """Make and record one random change; False if it changed nothing."""
+    entries = room.entries
+    row_id = rng.choice(entries.ids)
+    names = list(entries.names)
+    roll = rng.random()
+    if roll < 0.3:
+        cost, selected = random_cost(rng), rng.sample(names, rng.randint(0, len(names)))
+        return record_rows(room, history, [row_id], lambda: room.set_row(row_id, cost, selected))
+    if roll < 0.45:
+        name, value = rng.choice(names), rng.random() < 0.5
+        return record_rows(room, history, [row_id], lambda: room.set_flag(row_id, name, value))
+    if roll < 0.55:
+        weights = {name: rng.choice([0, 1, 2, 250]) for name in rng.sample(names, rng.randint(0, len(names)))}
+        rate = rng.choice([0, 8875])
+        return record_rows(room, history, [row_id], lambda: room.set_split(row_id, weights, rate))
+    if roll < 0.62:
+        payer = rng.choice(["", *names])
+        return record_rows(room, history, [row_id], lambda: room.set_payer(row_id, payer))
+    if roll < 0.8 and len(entries) > 1:
+        # Leaving a row, as deleting the last one adds a blank row nobody can undo
+        row_ids = rng.sample(entries.ids, rng.randint(1, min(3, len(entries) - 1)))
+        states = {row.row_id: row for row in room.row_states(row_ids)}
+        removed = room.delete_rows(row_ids)
+        history.record(Change("delete", tuple(states[row_id] for row_id in removed), (), "delete"))
+        return True
+    name = rng.choice(EXTRA_NAMES)
+    if name in room.temp_members:
+        history.record(Change("remove_members", (room.member_state(name),), (), f"remove {name}"))
+        room.remove_member(name)
+        return True
+    if room.add_member(name):
+        history.record(Change("add_members", (), (name,), f"add {name}"))
+        return True
+    return False
+
+
+def check_case(case: int, seed: int, steps: int) -> str:
+    rng = random.Random(seed * 1_000_003 + case)
+    members = rng.randint(1, 6)
+    room = Room(receipt_store(rng.randint(2, 30), members, seed=case), member_names(members)[3:])
+    history = History()
+    # states[i] is the room after the first i changes still on the undo stack
+    states, position = [state(room)], 0
+    for step in range(steps):
+        roll = rng.random()
+        if roll < 0.2 and history.next_undo():
+            replay(room, history.undo(), True)
+            position -= 1
+            operation = "undo"
+        elif roll < 0.3 and history.next_redo():
+            replay(room, history.redo(), False)
+            position += 1
+            operation = "redo"
+        else:
+            if random_change(room, history, rng):
+                del states[position + 1:]
+                states.append(state(room))
+                position += 1
+            operation = "change"
+        if state(room) != states[position]:
+            return f"step {step}: the room is not as it was after {operation}"
+        if not room.ledger.matches(room.entries):
+            return f"step {step}: the ledger no longer matches the rows after {operation}"
+    return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=200, help="random rooms to drive (default 200)")
+    parser.add_argument("--steps", type=int, default=80, help="changes, undos and redos per room (default 80)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for case in range(args.cases):
+        problem = check_case(case, args.seed, args.steps)
+        if problem:
+            print(f"case {case}, {problem}")
+            sys.exit(1)
+    print(f"{args.cases} rooms undid and redid {args.steps} steps each exactly "
+          f"({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Randomized check of the vectorized split kernel against the per-row splits.
+
+Builds random row x member matrices of costs, ticks and weights (equal
+rows, uneven rows, zero weights, single sharers and rows nobody is ticked
+on) and checks that row_shares() gives every row exactly what
+item_shares() or weighted_shares() gives it alone, that each shared row's
+shares add up to its cost, and that split_groups() holds the exact
+numerators and denominators of each member's share. Exits non-zero on the
+first mismatch.
+
+Run from the repo root:  python benchmarks/check_kernel.py [--cases 500] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import time
+from fractions import Fraction
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from maksplit.cents import item_shares, weighted_shares  # noqa: E402
+from maksplit.kernel import row_shares, split_groups  # noqa: E402
+
+
+def random_rows(rng: random.Random) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows, members = rng.randint(0, 40), rng.randint(1, 12)
+    cents = np.array([rng.choice([0, rng.randint(1, 10), rng.randint(1, 100000)]) for _ in range(rows)], dtype=np.int64)
+    mask = np.array([[rng.random() < 0.5 for _ in range(members)] for _ in range(rows)], dtype=bool).reshape(rows, members)
+    weights = np.ones((rows, members), dtype=np.int64)
+    for row in range(rows):
+        if rng.random() < 0.5:
+            weights[row] = [rng.choice([0, 1, 2, 3, 7, 100, 333]) for _ in range(members)]
+            ticked = np.flatnonzero(mask[row])
+            # The split editor never saves a split where every sharer weighs nothing
+            if ticked.size and not weights[row, ticked].any():
+                weights[row, rng.choice(list(ticked))] = 1
+    return cents, mask, weights
+
+
+def expected_shares(cents: int, weights: list[int]) -> list[int]:
+    if len(set(weights)) <= 1:
+        return item_shares(cents, len(weights))
+    return weighted_shares(cents, weights)
+
+
+def check_case(rng: random.Random) -> str:
+    """The first disagreement between the kernel and the per-row splits, or ""."""
+    cents, mask, weights = random_rows(rng)
+    shares = row_shares(cents, mask, weights)
+    exact = dict.fromkeys(range(mask.shape[1]), Fraction(0))
+    for row in range(len(cents)):
+        ticked = np.flatnonzero(mask[row]).tolist()
+        if not ticked:
+            if shares[row].any():
+                return f"row {row} is ticked on by nobody but has shares {shares[row].tolist()}"
+            continue
+        row_weights = weights[row, ticked].tolist()
+        if shares[row, ticked].tolist() != expected_shares(int(cents[row]), row_weights):
+            return (f"row {row} ({cents[row]} cents, weights {row_weights}) splits {shares[row, ticked].tolist()}, "
+                    f"expected {expected_shares(int(cents[row]), row_weights)}")
+        if shares[row].sum() != cents[row]:
+            return f"row {row}'s shares add up to {shares[row].sum()}, not {cents[row]}"
+        uneven = len(set(row_weights)) > 1
+        for member, weight in zip(ticked, row_weights):
+            exact[member] += (Fraction(int(cents[row]) * weight, sum(row_weights)) if uneven
+                              else Fraction(int(cents[row]), len(ticked)))
+    keys, sums = split_groups(cents, mask, weights)
+    for member, value in exact.items():
+        grouped = sum((Fraction(int(total), int(key)) for key, total in zip(keys, sums[:, member]) if total), Fraction(0))
+        if grouped != value:
+            return f"member {member}'s grouped share is {grouped}, exactly {value}"
+    return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=500, help="random matrices to check (default 500)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rng = random.Random(args.seed)
+    for case in range(args.cases):
+        problem = check_case(rng)
+        if problem:
+            print(f"case {case}: {problem}")
+            sys.exit(1)
+    print(f"{args.cases} random matrices split exactly as row by row ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Randomized check that the incremental ledger matches a from-scratch recompute.
+
+Drives rooms through random sequences of appends, cost edits (including
+blank and unusable costs), ticks, deletes, uneven splits with zero weights,
+item tax, payers, temporary members coming and going, imports and rows put
+back after a delete. After every step the ledger the room keeps up to date
+row by row must match Ledger.matches() against the store's vectorized
+recompute. Exits non-zero with the case, step and operation of the first
+mismatch.
+
+Run from the repo root:  python benchmarks/check_ledger.py [--cases 300] [--steps 60] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit.shared import Room  # noqa: E402
+from receipts import EXTRA_NAMES, member_names, receipt_store  # noqa: E402
+
+COSTS = ("", "abc", "-4.50", "1.2.3", "0", "0.01", "0.07", "1", "12.34", "99.99", "250", "1e2")
+
+
+def random_cost(rng: random.Random) -> str:
+    return rng.choice(COSTS) if rng.random() < 0.3 else f"{rng.randint(1, 50000) / 100:.2f}"
+
+
+def random_step(room: Room, rng: random.Random, deleted: list) -> str:
+    """Make one random change to the room; returns what it did."""
+    entries = room.entries
+    row_id = rng.choice(entries.ids)
+    names = entries.names
+    roll = rng.random()
+    if roll < 0.25:
+        room.set_row(row_id, random_cost(rng), rng.sample(names, rng.randint(0, len(names))))
+        return "set_row"
+    if roll < 0.45:
+        room.set_flag(row_id, rng.choice(names), rng.random() < 0.6)
+        return "set_flag"
+    if roll < 0.55:
+        # Zero weights are allowed as long as someone carries weight, as in the split editor
+        weights = {name: rng.choice([0, 1, 2, 3, 50, 100, 333]) for name in rng.sample(names, rng.randint(0, len(names)))}
+        if weights and not any(weights.values()):
+            weights[rng.choice(list(weights))] = 1
+        room.set_split(row_id, weights, rng.choice([0, 0, 8250, 15000, 100000]))
+        return "set_split"
+    if roll < 0.62:
+        room.append_row()
+        return "append_row"
+    if roll < 0.72:
+        row_ids = rng.sample(entries.ids, rng.randint(1, min(3, len(entries))))
+        deleted.append(room.row_states(row_ids))
+        room.delete_rows(row_ids)
+        return "delete_rows"
+    if roll < 0.78 and deleted:
+        room.insert_rows(deleted.pop(rng.randrange(len(deleted))))
+        return "insert_rows"
+    if roll < 0.84:
+        room.set_payer(row_id, rng.choice(["", *names]))
+        return "set_payer"
+    if roll < 0.90:
+        name = rng.choice(EXTRA_NAMES)
+        if name in room.temp_members:
+            room.remove_member(name)
+            return "remove_member"
+        room.add_member(name)
+        return "add_member"
+    if roll < 0.93 and room.temp_members:
+        state = room.member_state(rng.choice(room.temp_members))
+        room.remove_member(state.name)
+        room.restore_member(state)
+        return "restore_member"
+    count = rng.randint(1, 5)
+    room.import_rows([random_cost(rng) for _ in range(count)],
+                     [rng.sample(names, rng.randint(0, len(names))) for _ in range(count)])
+    return "import_rows"
+
+
+def check_case(case: int, seed: int, steps: int) -> bool:
+    rng = random.Random(seed * 1_000_003 + case)
+    members = rng.randint(1, 6)
+    room = Room(receipt_store(rng.randint(0, 40), members, seed=case), member_names(members)[3:])
+    if not len(room.entries):
+        room.append_row()
+    deleted = []
+    for step in range(steps):
+        operation = random_step(room, rng, deleted)
+        if not room.ledger.matches(room.entries):
+            print(f"case {case}, step {step}: the ledger no longer matches the store after {operation}")
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=300, help="random rooms to drive (default 300)")
+    parser.add_argument("--steps", type=int, default=60, help="changes per room (default 60)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    failed = sum(not check_case(case, args.seed, args.steps) for case in range(args.cases))
+    print(f"{args.cases - failed}/{args.cases} rooms kept the ledger matching the store over "
+          f"{args.steps} changes each ({time.perf_counter() - start:.1f} s)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Randomized check of the settle-up plans.
+
+For random balances that sum to zero, with round amounts mixed in so some
+members settle among themselves, checks that the greedy plan, the exact
+plan and settle_up() each clear every balance with positive payments from
+debtors to creditors, that the exact plan makes as few payments as a
+separate backtracking search finds, and that settle_up() never makes more
+than the greedy plan. Then splits random receipts with payers and item tax
+and checks the cents each member paid add up to what the members owe, so
+the balances need no correction when there is no tax or delivery. Exits
+non-zero on the first failure.
+
+Run from the repo root:  python benchmarks/check_settle.py [--cases 400] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit import Ledger  # noqa: E402
+from maksplit.settle import exact_transfers, greedy_transfers, net_balances, paid_cents, settle_up  # noqa: E402
+from maksplit.totals import compute_totals  # noqa: E402
+from receipts import member_names, receipt_store  # noqa: E402
+
+
+def random_balances(rng: random.Random) -> dict[str, int]:
+    members = rng.randint(1, 9)
+    values = [rng.choice([rng.randint(-20000, 20000), rng.choice([-1500, -500, 0, 500, 1500])])
+              for _ in range(members - 1)]
+    values.append(-sum(values))
+    return {f"m{i}": cents for i, cents in enumerate(values)}
+
+
+def fewest_payments(balances: dict[str, int]) -> int:
+    """The minimum number of payments, by backtracking over who settles the first open balance."""
+    values = [cents for cents in balances.values() if cents]
+
+    def search(start: int) -> int:
+        while start < len(values) and not values[start]:
+            start += 1
+        if start == len(values):
+            return 0
+        best = len(values)
+        for other in range(start + 1, len(values)):
+            if values[other] * values[start] < 0:
+                values[other] += values[start]
+                best = min(best, 1 + search(start + 1))
+                values[other] -= values[start]
+                if values[other] + values[start] == 0:
+                    # Cancelling out exactly is never worse than any other pairing
+                    break
+        return best
+
+    return search(0)
+
+
+def clears(balances: dict[str, int], transfers: list) -> str:
+    """Why the transfers leave a balance open, or ""."""
+    left = dict(balances)
+    for debtor, creditor, cents in transfers:
+        if cents <= 0 or balances[debtor] >= 0 or balances[creditor] <= 0:
+            return f"{debtor} pays {creditor} {cents} cents"
+        left[debtor] += cents
+        left[creditor] -= cents
+    open_balances = {name: cents for name, cents in left.items() if cents}
+    return f"{open_balances} left open" if open_balances else ""
+
+
+def check_balances(balances: dict[str, int]) -> str:
+    plans = {"greedy": greedy_transfers(balances), "exact": exact_transfers(balances), "settle_up": settle_up(balances)}
+    for name, transfers in plans.items():
+        problem = clears(balances, transfers)
+        if problem:
+            return f"the {name} plan for {balances}: {problem}"
+    fewest = fewest_payments(balances)
+    if len(plans["exact"]) != fewest:
+        return f"the exact plan for {balances} makes {len(plans['exact'])} payments, {fewest} are enough"
+    if len(plans["settle_up"]) > len(plans["greedy"]):
+        return f"settle_up() makes more payments than greedy for {balances}"
+    return ""
+
+
+def check_receipt(rng: random.Random, case: int) -> str:
+    members = rng.randint(2, 8)
+    names = member_names(members)
+    store = receipt_store(rng.randint(1, 60), members, seed=case)
+    for index in range(len(store)):
+        if rng.random() < 0.3:
+            store.set_tax_rate(index, rng.choice([8250, 8875, 15000]))
+        if rng.random() < 0.4:
+            store.set_payer(index, rng.choice(names))
+    totals = compute_totals(Ledger.from_store(store), Decimal(0), Decimal(0), "cents")[0]
+    paid = paid_cents(store, names[0])
+    owed = sum(round(total * 100) for total in totals.values())
+    if sum(paid.values()) != owed:
+        return f"members paid {sum(paid.values())} cents in all but owe {owed}"
+    balances = net_balances(totals, paid, names[0])
+    if balances[names[0]] != paid[names[0]] - round(totals[names[0]] * 100):
+        return f"{names[0]}'s balance was corrected by {balances[names[0]] - paid[names[0]] + round(totals[names[0]] * 100)} cents"
+    return clears(balances, settle_up(balances))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=400, help="random groups and receipts to check (default 400)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rng = random.Random(args.seed)
+    for case in range(args.cases):
+        problem = check_balances(random_balances(rng)) or check_receipt(rng, case)
+        if problem:
+            print(f"case {case}: {problem}")
+            sys.exit(1)
+    print(f"{args.cases} groups and receipts settle in full, the exact plan in the fewest payments "
+          f"({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
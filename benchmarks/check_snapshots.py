@@ -0,0 +1,137 @@
+"""Randomized check that a saved session loads back exactly as it was.
+
+Drives random rooms through edits and autosaves them the way the app does:
+row edits go to the log, appended rows are saved by their first edit,
+deletes, imports and member changes write a full snapshot, and the log is
+folded into a snapshot once it passes COMPACT_AFTER. After every step the
+session is loaded from SQLite and compared with the live store: names, row
+ids, costs and their errors, ticks, weights, item tax, payers, temporary
+members and settings, and the loaded rows must give the same subtotals.
+Exits non-zero on the first difference.
+
+Run from the repo root:  python benchmarks/check_snapshots.py [--cases 200] [--steps 60] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from check_ledger import random_cost  # noqa: E402
+from maksplit import EntryStore, Ledger  # noqa: E402
+from maksplit.shared import Room  # noqa: E402
+from maksplit.snapshots import COMPACT_AFTER, SETTINGS, SessionSnapshot, SnapshotStore  # noqa: E402
+from receipts import EXTRA_NAMES, member_names, receipt_store  # noqa: E402
+
+
+def differences(live: EntryStore, loaded: EntryStore) -> str:
+    """The first way the loaded store differs from the live one, or ""."""
+    for name in ("names", "ids", "costs", "payers", "errors"):
+        if getattr(live, name) != getattr(loaded, name):
+            return f"{name}: saved {getattr(live, name)}, loaded {getattr(loaded, name)}"
+    for name in ("cents", "mask", "weights", "tax_rates"):
+        if not np.array_equal(getattr(live, name), getattr(loaded, name)):
+            return f"{name} differ"
+    if not Ledger.from_store(live).matches(loaded):
+        return "the loaded rows give different subtotals"
+    return ""
+
+
+def check_case(case: int, seed: int, steps: int) -> str:
+    rng = random.Random(seed * 1_000_003 + case)
+    members = rng.randint(1, 6)
+    room = Room(receipt_store(rng.randint(1, 30), members, seed=case), member_names(members)[3:])
+    settings = dict(SETTINGS)
+    snapshots = SnapshotStore(":memory:")
+    session = f"session-{case}"
+
+    def save():
+        snapshots.save(session, SessionSnapshot(room.entries.copy(), list(room.temp_members), dict(settings)))
+
+    def log_row(row_id: int):
+        entries = room.entries
+        index = entries.index_of(row_id)
+        snapshots.append_row(session, row_id, entries.costs[index], entries.selected(index), entries.payers[index],
+                             entries.split_weights(index), entries.tax_rate(index))
+        if snapshots.pending(session) > COMPACT_AFTER:
+            save()
+
+    save()
+    for step in range(steps):
+        entries = room.entries
+        row_id = rng.choice(entries.ids)
+        names = entries.names
+        roll = rng.random()
+        if roll < 0.3:
+            room.set_row(row_id, random_cost(rng), rng.sample(names, rng.randint(0, len(names))))
+            log_row(row_id)
+        elif roll < 0.45:
+            room.set_flag(row_id, rng.choice(names), rng.random() < 0.5)
+            log_row(row_id)
+        elif roll < 0.55:
+            weights = {name: rng.choice([0, 1, 2, 250]) for name in rng.sample(names, rng.randint(0, len(names)))}
+            room.set_split(row_id, weights, rng.choice([0, 8875]))
+            log_row(row_id)
+        elif roll < 0.62:
+            room.set_payer(row_id, rng.choice(["", *names]))
+            log_row(row_id)
+        elif roll < 0.72:
+            # A row appended as someone types is saved by its first edit
+            new_row = room.append_row()
+            room.set_row(new_row, random_cost(rng), rng.sample(names, rng.randint(0, len(names))))
+            log_row(new_row)
+        elif roll < 0.77:
+            settings.update(show_tax=True, tax_amount=random_cost(rng))
+            snapshots.append_settings(session, dict(settings))
+        elif roll < 0.85:
+            room.delete_rows(rng.sample(entries.ids, rng.randint(1, min(3, len(entries)))))
+            save()
+        elif roll < 0.93:
+            name = rng.choice(EXTRA_NAMES)
+            if name in room.temp_members:
+                room.remove_member(name)
+            else:
+                room.add_member(name)
+            save()
+        else:
+            count = rng.randint(1, 4)
+            room.import_rows([random_cost(rng) for _ in range(count)],
+                             [rng.sample(names, rng.randint(0, len(names))) for _ in range(count)])
+            save()
+
+        loaded = snapshots.load(session)
+        problem = differences(room.entries, loaded.entries)
+        if not problem and loaded.temp_members != room.temp_members:
+            problem = f"temporary members: saved {room.temp_members}, loaded {loaded.temp_members}"
+        if not problem and loaded.settings != settings:
+            problem = f"settings: saved {settings}, loaded {loaded.settings}"
+        if problem:
+            return f"step {step}: {problem}"
+    snapshots.close()
+    return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=200, help="random sessions to save and load (default 200)")
+    parser.add_argument("--steps", type=int, default=60, help="changes per session (default 60)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for case in range(args.cases):
+        problem = check_case(case, args.seed, args.steps)
+        if problem:
+            print(f"case {case}, {problem}")
+            sys.exit(1)
+    print(f"{args.cases} sessions loaded back exactly after each of {args.steps} changes "
+          f"({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Synthetic receipts for the benchmarks."""
+import random
+
+from maksplit import EntryStore
+from maksplit.quick_entry import BASE_NAMES
+
+# Extra members whose names (and first letters) don't clash with the base initials
+EXTRA_NAMES = [
+    "Ben", "Cara", "Dev", "Eli", "Fay", "Gus", "Hana", "Ivo", "Jo",
+    "Kai", "Lia", "Noor", "Omar", "Pia", "Quin", "Tess", "Uma",
+]
+
+
+def member_names(members: int) -> list[str]:
+    """The base members plus enough extra ones to make `members` in total."""
+    if not 1 <= members <= len(BASE_NAMES) + len(EXTRA_NAMES):
+        raise ValueError(f"members must be between 1 and {len(BASE_NAMES) + len(EXTRA_NAMES)}")
+    return (BASE_NAMES + EXTRA_NAMES)[:members]
+
+
+def synthetic_receipt(items: int, members: int, seed: int = 0, blank_rate: float = 0.02,
+                      invalid_rate: float = 0.01) -> tuple[list[str], list[str], list[tuple[str, ...]]]:
+    """
+    Return (names, costs, selected) for a receipt of `items` rows.
+
+    Costs are $0.01-$200.00 with a sprinkling of blank and invalid strings;
+    each row is shared by one to all members, weighted towards small groups.
+    """
+    rng = random.Random(seed)
+    names = member_names(members)
+    costs, selected = [], []
+    for _ in range(items):
+        roll = rng.random()
+        if roll < blank_rate:
+            costs.append("")
+        elif roll < blank_rate + invalid_rate:
+            costs.append(rng.choice(["abc", "1.2.3", "-4.50"]))
+        else:
+            costs.append(f"{rng.randint(1, 20000) / 100:.2f}")
+        size = min(members, int(rng.expovariate(0.6)) + 1)
+        selected.append(tuple(sorted(rng.sample(names, size), key=names.index)))
+    return names, costs, selected
+
+
+def receipt_store(items: int, members: int, seed: int = 0) -> EntryStore:
+    """A synthetic receipt loaded into an EntryStore."""
+    names, costs, selected = synthetic_receipt(items, members, seed)
+    store = EntryStore(names)
+    store.extend(costs, selected)
+    return store
+
+
+def quick_entry_lines(items: int, members: int, seed: int = 0) -> list[str]:
+    """The same receipt typed in quick-entry syntax ("12.50 ms+ben")."""
+    _, costs, selected = synthetic_receipt(items, members, seed)
+    return [f"{cost} {'+'.join(name.lower() for name in people)}" for cost, people in zip(costs, selected)]
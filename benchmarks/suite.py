@@ -0,0 +1,205 @@
+"""Benchmark suite for the splitter core.
+
+Drives the same code the app runs on every rerun, headlessly, over synthetic
+receipts of 10 to 10,000 items and 3 to 20 members, and records the median
+latency and peak traced memory of each case. The full-rerun case runs
+streamlit_app.py through Streamlit's AppTest with the receipt preloaded into
+st.session_state, and fails if that leaves widget state for more rows than
+the grid renders. The app-edit case types quick-entry text into an item the
+same way, so it goes through the app's own input callback, quick-entry
+parsing and totals rather than just the maksplit calls they wrap.
+Everything runs offline.
+
+Run from the repo root:
+    python benchmarks/suite.py                         # print the table
+    python benchmarks/suite.py --save results.json     # keep the results
+    python benchmarks/suite.py --baseline results.json --max-regression 1.5
+    python benchmarks/suite.py --thresholds benchmarks/thresholds.json
+
+With --baseline or --thresholds the run exits non-zero when a case is slower
+than allowed, so it can gate CI.
+"""
+import argparse
+import itertools
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from maksplit import Ledger  # noqa: E402
+from maksplit.bulk_import import parse_lines  # noqa: E402
+from maksplit.grid import GRID_WINDOW_AFTER, GRID_WINDOW_BEFORE  # noqa: E402
+from maksplit.quick_entry import token_table  # noqa: E402
+from maksplit.shared import Room  # noqa: E402
+from maksplit.totals import cents_totals, decimal_totals  # noqa: E402
+from receipts import BASE_NAMES, member_names, quick_entry_lines, receipt_store  # noqa: E402
+
+REPO = Path(__file__).resolve().parent.parent
+ITEM_SIZES = (10, 100, 1000, 10000)
+MEMBER_SIZES = (3, 8, 20)
+RERUN_ITEM_SIZES = (10, 100, 1000)
+# Session state keys a rerun may leave besides the rendered rows' widgets
+RERUN_OTHER_KEYS = 150
+# Cases that run streamlit_app.py, and so take longer per call
+APP_CASES = ("full_rerun", "app_edit_row")
+
+
+def measure(func, min_time: float = 0.2, max_repeat: int = 1000) -> tuple[float, int]:
+    """Return (median seconds per call, peak traced bytes of one call)."""
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < 3 or (time.perf_counter() < deadline and len(timings) < max_repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def core_cases(items: int, members: int):
+    """Yield (case name, callable) pairs for one receipt size."""
+    store = receipt_store(items, members)
+    ledger = Ledger.from_store(store)
+    names = member_names(members)
+
+    yield "calculate_totals[cents]", lambda: cents_totals(ledger.cents_subtotals(), 825, 499)
+    yield "calculate_totals[decimal]", lambda: decimal_totals(ledger.subtotals(), Decimal("8.25"), Decimal("4.99"))
+    yield "recompute_from_scratch", lambda: Ledger.from_store(store)
+
+    old = store.contribution(items // 2)
+    new = (old[0] + 1, tuple(names))
+
+    def edit_row():
+        ledger.replace(old, new)
+        ledger.replace(new, old)
+        ledger.cents_subtotals()
+
+    yield "edit_row", edit_row
+
+    def add_remove_member():
+        store.add_member("Zed")
+        ledger.add_member("Zed")
+        store.remove_member("Zed")
+        Ledger.from_store(store)
+
+    yield "add_remove_member", add_remove_member
+
+    lines = quick_entry_lines(items, members)
+    table = token_table(tuple(names))
+    yield "process_input_text", lambda: [table.parse(line) for line in lines]
+    yield "bulk_import", lambda: parse_lines(lines, names)
+
+
+def preloaded_app(items: int, members: int):
+    """Run streamlit_app.py once through AppTest with a receipt preloaded into session state."""
+    from streamlit.testing.v1 import AppTest
+
+    # AppTest runs the script without a browser session; keep its warnings quiet
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    store = receipt_store(items, members)
+    store.append()
+    app = AppTest.from_file(str(REPO / "streamlit_app.py"), default_timeout=120)
+    app.session_state["room"] = Room(store, member_names(members)[len(BASE_NAMES):])
+    app.session_state["active_index"] = len(store) - 1
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return app, store
+
+
+def rerun_case(items: int, members: int):
+    """Time one full script rerun with the receipt preloaded into session state."""
+    app, store = preloaded_app(items, members)
+    # Widget state is only kept for the rows the grid renders (a cost input,
+    # a delete button and a checkbox per member), however long the receipt
+    rendered = min(len(store) + 1, GRID_WINDOW_BEFORE + GRID_WINDOW_AFTER + 2)
+    keys = sum(1 for _ in app.session_state)
+    if keys > rendered * (members + 2) + RERUN_OTHER_KEYS:
+        raise RuntimeError(f"{keys} session state keys after one run of {items} items and {members} members")
+    return "full_rerun", app.run
+
+
+def app_edit_case(items: int, members: int):
+    """Time typing quick-entry text into the last item through the app's own callbacks."""
+    app, store = preloaded_app(items, members)
+    # The last item, just above the blank row at the end, so nothing is appended
+    key = f"cost_{store.ids[-2]}"
+    texts = itertools.cycle(["12.50mr", "9.99 " + " ".join(member_names(members)).lower()])
+
+    def edit_row():
+        app.text_input(key=key).input(next(texts))
+        app.run()
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+    return "app_edit_row", edit_row
+
+
+def run(include_rerun: bool) -> dict[str, dict]:
+    results = {}
+    for items in ITEM_SIZES:
+        for members in MEMBER_SIZES:
+            cases = list(core_cases(items, members))
+            if include_rerun and items in RERUN_ITEM_SIZES:
+                cases += [rerun_case(items, members), app_edit_case(items, members)]
+            for case, func in cases:
+                seconds, peak = measure(func, min_time=0.5 if case in APP_CASES else 0.2)
+                key = f"{case}/items={items}/members={members}"
+                results[key] = {"ms": seconds * 1000, "peak_kib": peak / 1024}
+                print(f"{key:<52} {seconds * 1000:10.3f} ms {peak / 1024:10.1f} KiB", flush=True)
+    return results
+
+
+def regressions(results: dict, limits: dict[str, float]) -> list[str]:
+    """Cases whose latency exceeds their limit in ms."""
+    return [
+        f"{key}: {results[key]['ms']:.3f} ms > {limit:.3f} ms"
+        for key, limit in limits.items()
+        if key in results and results[key]["ms"] > limit
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-rerun", action="store_true", help="skip the cases that run streamlit_app.py")
+    parser.add_argument("--save", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="results JSON from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.5,
+                        help="allowed slowdown factor against --baseline (default 1.5)")
+    parser.add_argument("--thresholds", type=Path, help="JSON of {case key: max ms}")
+    args = parser.parse_args()
+
+    results = run(include_rerun=not args.no_rerun)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2, sort_keys=True))
+
+    failures = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        failures += regressions(results, {key: value["ms"] * args.max_regression for key, value in baseline.items()})
+    if args.thresholds:
+        failures += regressions(results, json.loads(args.thresholds.read_text()))
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""Split engine for the Shopping Expense Splitter app."""
+
+from maksplit.entry_store import EntryStore
+from maksplit.ledger import Ledger, parse_cost, row_contribution, to_cents
+from maksplit.totals import compute_totals, parse_extra
+
+__all__ = ["EntryStore", "Ledger", "compute_totals", "parse_cost", "parse_extra", "row_contribution", "to_cents"]
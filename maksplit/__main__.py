@@ -0,0 +1,5 @@
+import sys
+
+from maksplit.cli import main
+
+sys.exit(main())
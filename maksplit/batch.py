@@ -0,0 +1,73 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Iterable, Iterator, Mapping, Optional
+
+from maksplit.ledger import Ledger
+from maksplit.quick_entry import BASE_NAMES
+from maksplit.totals import compute_totals, parse_extra
+
+# Sessions handed to each worker per round trip; amortizes pickling
+DEFAULT_CHUNKSIZE = 256
+
+
+def session_names(session: Mapping) -> list[str]:
+    """The members of a session: the base group plus its temporary members."""
+    return BASE_NAMES + list(session.get("temp_members", ()))
+
+
+def settle(session: Mapping, engine: str = "cents") -> tuple[dict, dict, float, float]:
+    """
+    Split one stored session, exactly as calculate_totals does in the app.
+
+    session has the st.session_state shape: "entries" (a list of
+    {"cost": str, name: bool} rows), "temp_members", and optionally
+    "show_tax"/"tax_amount" and "show_delivery"/"delivery_amount".
+    """
+    tax = parse_extra(session.get("tax_amount", "")) if session.get("show_tax") else Decimal('0')
+    delivery = parse_extra(session.get("delivery_amount", "")) if session.get("show_delivery") else Decimal('0')
+    ledger = Ledger.from_entries(session["entries"], session_names(session))
+    return compute_totals(ledger, tax, delivery, engine)
+
+
+def _settle_chunk(chunk: list, engine: str) -> list:
+    return [settle(session, engine) for session in chunk]
+
+
+def _chunks(sessions: Iterable[Mapping], size: int) -> Iterator[list]:
+    chunk = []
+    for session in sessions:
+        chunk.append(session)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def settle_many(sessions: Iterable[Mapping], engine: str = "cents", processes: Optional[int] = None,
+                chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[tuple[dict, dict, float, float]]:
+    """
+    Settle many sessions across a process pool, yielding results in input order.
+
+    Sessions are sent to the workers in chunks of `chunksize` and results are
+    streamed back as soon as the chunk at the head of the queue is done, so
+    memory stays bounded by the chunks in flight rather than the whole batch.
+    With processes=1 everything runs in this process.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for session in sessions:
+            yield settle(session, engine)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = deque()
+        for chunk in _chunks(sessions, chunksize):
+            pending.append(pool.submit(_settle_chunk, chunk, engine))
+            # Keep every worker busy, plus one chunk queued each
+            if len(pending) >= processes * 2:
+                yield from pending.popleft().result()
+        for future in pending:
+            yield from future.result()
@@ -0,0 +1,131 @@
+import csv
+import io
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Iterator, TextIO
+
+from maksplit.ledger import parse_cost
+from maksplit.quick_entry import token_table
+
+# Cell values that tick a member column in a CSV/TSV with a header row
+_TRUTHY = frozenset({"1", "x", "y", "yes", "true", "✓"})
+# What decode_lines() reads bytes that are not UTF-8 as
+_UNREADABLE = "\ufffd"
+
+
+@dataclass
+class ImportResult:
+    """Rows parsed by a bulk import, plus per-line errors and warnings."""
+    costs: list[str] = field(default_factory=list)
+    selected: list[tuple[str, ...]] = field(default_factory=list)
+    errors: list[tuple[int, str, str]] = field(default_factory=list)
+    warnings: list[tuple[int, str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.costs)
+
+    def check_encoding(self, line_no: int, text: str):
+        """Warn about a line that had bytes decode_lines() could not read."""
+        if _UNREADABLE in text:
+            self.warnings.append((line_no, text, "not UTF-8, some characters could not be read"))
+
+
+def decode_lines(stream: BinaryIO) -> TextIO:
+    """
+    Read an uploaded or opened file as UTF-8 text lines.
+
+    A file in another encoding (a cp1252 CSV from Excel, say) does not stop
+    the import: bytes that are not UTF-8 read as U+FFFD and the parsers
+    warn about the lines they are on. A UTF-8 byte order mark is dropped.
+    """
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+
+
+def _check_amount(amount: str) -> str:
+    """Return an error message for an unusable amount, or "" if it is fine."""
+    if not amount:
+        return "no amount found"
+    cost = parse_cost(amount)
+    if cost is None:
+        return "amount is negative" if amount.startswith("-") else f"invalid amount '{amount}'"
+    return ""
+
+
+def parse_lines(lines: Iterable[str], names: list[str]) -> ImportResult:
+    """
+    Parse quick-entry lines ("100mr", "12.50 a") in one pass.
+
+    Blank lines are skipped; a line with a bad amount is recorded in
+    result.errors (1-based line number, text, message) and the import carries
+    on. Lines with ambiguous member words are imported and noted in
+    result.warnings.
+    """
+    table = token_table(tuple(names))
+    result = ImportResult()
+    for line_no, line in enumerate(lines, start=1):
+        text = line.strip()
+        if not text:
+            continue
+        result.check_encoding(line_no, text)
+        amount, selected, ambiguous = table.parse(text)
+        error = _check_amount(amount)
+        if error:
+            result.errors.append((line_no, text, error))
+            continue
+        result.costs.append(amount)
+        result.selected.append(selected)
+        if ambiguous:
+            result.warnings.append((line_no, text, "; ".join(map(table.describe, ambiguous))))
+    return result
+
+
+def parse_table(lines: Iterable[str], names: list[str], delimiter: str = ",") -> ImportResult:
+    """
+    Parse CSV/TSV receipt lines.
+
+    If the first row has a "cost" column, the other columns named after
+    members are read as ticks (1/x/yes/true). Otherwise each row's cells are
+    joined and read as quick-entry text, so "12.50,mr" works too.
+    """
+    rows = csv.reader(lines, delimiter=delimiter)
+    first = next(rows, None)
+    if first is None:
+        return ImportResult()
+    header = [cell.strip() for cell in first]
+    if "cost" not in (cell.lower() for cell in header):
+        return parse_lines(_joined(first, rows), names)
+
+    result = ImportResult()
+    cost_col = [cell.lower() for cell in header].index("cost")
+    member_cols = [(col, name) for col, name in enumerate(header) if name in names]
+    for line_no, row in enumerate(rows, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        result.check_encoding(line_no, delimiter.join(row))
+        amount = row[cost_col].strip() if cost_col < len(row) else ""
+        amount = amount.lstrip("$")
+        error = _check_amount(amount)
+        if error:
+            result.errors.append((line_no, delimiter.join(row), error))
+            continue
+        result.costs.append(amount)
+        result.selected.append(tuple(
+            name for col, name in member_cols
+            if col < len(row) and row[col].strip().lower() in _TRUTHY
+        ))
+    return result
+
+
+def _joined(first: list[str], rows: Iterator[list[str]]) -> Iterator[str]:
+    yield "".join(first)
+    for row in rows:
+        yield "".join(row)
+
+
+def parse_upload(filename: str, lines: Iterable[str], names: list[str]) -> ImportResult:
+    """Parse an uploaded file, picking the format from its extension."""
+    suffix = filename.lower().rsplit(".", 1)[-1]
+    if suffix == "csv":
+        return parse_table(lines, names, ",")
+    if suffix == "tsv":
+        return parse_table(lines, names, "\t")
+    return parse_lines(lines, names)
@@ -0,0 +1,79 @@
+from functools import lru_cache
+
+# Distinct (totals, subtotals, tax, delivery) combinations kept rendered
+CARD_CACHE_SIZE = 128
+
+_SPLIT_CARD = """<div style='background-color: #f8f9fa; padding: 1.5rem; border-radius: 0.5rem; border-left: 4px solid #007bff; box-shadow: 0 2px 4px rgba(0,0,0,0.1); margin-bottom: 1rem;'>
+<h3 style='margin: 0 0 1rem 0; color: #007bff; font-size: 1.1rem;'>💰 Total Split</h3>
+{body}
+</div>"""
+
+_EMPTY_SPLITS = "<p style='color: #6c757d; font-size: 0.9rem; margin: 0;'>Add items to see splits</p>"
+
+_AMOUNT_CARD = """<div style='background-color: #fff3cd; padding: 1.5rem; border-radius: 0.5rem; border-left: 4px solid #ffc107; box-shadow: 0 2px 4px rgba(0,0,0,0.1); text-align: center; margin-bottom: 1rem;'>
+<h3 style='margin: 0 0 1rem 0; color: #856404; font-size: 1.1rem;'>💵 Total Amount</h3>
+{breakdown}
+<div style='font-size: 1.8rem; font-weight: bold; color: #ff4b4b;'>${total:.2f}</div>
+</div>"""
+
+_BREAKDOWN_LINE = "<div style='font-size: 0.85rem; color: #856404; margin-bottom: 0.3rem;'>{label}: ${amount:.2f}</div>"
+
+
+def _split_line(person: str, sub: float, total: float, has_extras: bool) -> str:
+    extra = total - sub
+    if has_extras and extra > 0:
+        amount_html = (
+            f"<span style='color: #6c757d;'>${sub:.2f}</span>"
+            f" <span style='color: #6c757d;'>+</span> "
+            f"<span style='color: #856404;'>${extra:.2f}</span>"
+            f" <span style='color: #6c757d;'>=</span> "
+            f"<span style='font-weight: bold; color: #28a745;'>${total:.2f}</span>"
+        )
+    else:
+        amount_html = f"<span style='font-weight: bold; color: #28a745;'>${total:.2f}</span>"
+    return (
+        f"<div style='display: flex; justify-content: space-between; padding: 0.5rem 0; border-bottom: 1px solid #e9ecef; font-size: 0.9rem;'>"
+        f"<span style='font-weight: 500;'>{person}:</span>"
+        f"<span>{amount_html}</span>"
+        f"</div>"
+    )
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def _render(totals: tuple, subtotals: tuple, tax_applied: float, delivery_applied: float) -> tuple[str, str]:
+    has_extras = tax_applied > 0 or delivery_applied > 0
+    subtotal_by_person = dict(subtotals)
+
+    if any(total for _, total in totals):
+        body = "".join(
+            _split_line(person, subtotal_by_person[person], total, has_extras) for person, total in totals
+        )
+    else:
+        body = _EMPTY_SPLITS
+    split_card = _SPLIT_CARD.format(body=body)
+
+    breakdown = ""
+    if has_extras:
+        breakdown += _BREAKDOWN_LINE.format(label="Subtotal", amount=sum(subtotal_by_person.values()))
+        if tax_applied > 0:
+            breakdown += _BREAKDOWN_LINE.format(label="Tax", amount=tax_applied)
+        if delivery_applied > 0:
+            breakdown += _BREAKDOWN_LINE.format(label="Delivery", amount=delivery_applied)
+    amount_card = _AMOUNT_CARD.format(breakdown=breakdown, total=sum(total for _, total in totals))
+    return split_card, amount_card
+
+
+def render_cards(totals: dict, subtotals: dict, tax_applied: float, delivery_applied: float) -> tuple[str, str]:
+    """
+    Return the (Total Split, Total Amount) card HTML.
+
+    Rendering is memoized on the inputs with bounded LRU eviction, so a rerun
+    that did not change any total reuses the markup from the last one.
+    """
+    return _render(tuple(totals.items()), tuple(subtotals.items()), tax_applied, delivery_applied)
+
+
+def card_cache_stats() -> dict[str, int]:
+    """Hit/miss counters of the card cache, for monitoring."""
+    info = _render.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
@@ -0,0 +1,63 @@
+from typing import Sequence
+
+
+def allocate(total: int, weights: Sequence[int]) -> list[int]:
+    """
+    Split total cents in proportion to weights, summing exactly to total.
+
+    Uses the largest-remainder method: everyone gets the floor of their exact
+    share, then the leftover cents go to the largest fractional parts, ties
+    broken by position.
+    """
+    weight_sum = sum(weights)
+    if not total or not weight_sum:
+        return [0] * len(weights)
+    shares = [total * weight // weight_sum for weight in weights]
+    remainders = [total * weight % weight_sum for weight in weights]
+    leftover = total - sum(shares)
+    for position in sorted(range(len(weights)), key=lambda i: (-remainders[i], i))[:leftover]:
+        shares[position] += 1
+    return shares
+
+
+def item_shares(cents: int, size: int) -> list[int]:
+    """
+    Split one item's cents equally between size people.
+
+    The leftover cents go round the sharers starting from a position derived
+    from the amount itself rather than always from the first member, so the
+    extra pennies spread out and a row's shares never depend on where the row
+    sits in the grid.
+    """
+    base, leftover = divmod(cents, size)
+    start = base % size
+    return [base + ((position - start) % size < leftover) for position in range(size)]
+
+
+def weighted_shares(cents: int, weights: Sequence[int]) -> list[int]:
+    """
+    Split one item's cents in proportion to weights.
+
+    Largest remainder, with ties going round the sharers in the same order
+    item_shares() uses, so equal weights give exactly item_shares().
+    """
+    total = sum(weights)
+    size = len(weights)
+    if not total:
+        return [0] * size
+    shares = [cents * weight // total for weight in weights]
+    remainders = [cents * weight % total for weight in weights]
+    start = (cents // size) % size
+    order = sorted(range(size), key=lambda i: (-remainders[i], (i - start) % size))
+    for position in order[:cents - sum(shares)]:
+        shares[position] += 1
+    return shares
+
+
+# Item tax rates are stored as integer thousandths of a percent (8.875% -> 8875)
+TAX_RATE_SCALE = 1000
+
+
+def item_tax(cents, rate):
+    """Tax in whole cents (half up) on an item at rate; works on ints and numpy arrays alike."""
+    return (2 * cents * rate + 100 * TAX_RATE_SCALE) // (200 * TAX_RATE_SCALE)
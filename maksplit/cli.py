@@ -0,0 +1,136 @@
+"""Split receipts from the command line, without starting Streamlit.
+
+    python -m maksplit receipt.txt more.csv --tax 8.25 --delivery 4.99
+    cat receipt.txt | python -m maksplit - --member Zed --json
+
+Each file is read as quick-entry lines ("100mr"), or as CSV/TSV when it has
+that extension, and split on its own. "-" reads quick-entry lines from stdin.
+With --receipt-text, files are plain-text or OCR'd receipts instead: every
+item is split between everyone, and the receipt's own tax is used unless
+--tax is given.
+
+--export and --export-totals write every receipt's per-item allocations and
+per-person totals to a .csv, .jsonl or .parquet file:
+
+    python -m maksplit stop1.txt stop2.txt --tax 3.10 --export items.parquet
+"""
+import argparse
+import json
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional
+
+from maksplit.bulk_import import decode_lines, parse_upload
+from maksplit.entry_store import EntryStore
+from maksplit.export import FORMATS, Split, write_items, write_people
+from maksplit.quick_entry import BASE_NAMES
+from maksplit.receipt_text import parse_receipt
+from maksplit.totals import ENGINES, compute_totals, parse_extra
+
+
+def split_receipt(filename: str, lines, names: list[str], tax: Decimal, delivery: Decimal,
+                  engine: str = "cents", receipt_text: bool = False, splits: Optional[list] = None) -> dict:
+    """
+    Parse and split one receipt, returning a JSON-ready summary.
+
+    When a splits list is given, the receipt is added to it as a Split for
+    exporting.
+    """
+    if receipt_text:
+        result = parse_receipt(lines, tuple(names))
+        tax = tax or parse_extra(result.tax)
+    else:
+        result = parse_upload(filename, lines, names)
+    store = EntryStore(names, capacity=max(len(result), 1))
+    store.extend(result.costs, result.selected)
+    if splits is not None:
+        splits.append(Split(filename, store, tax, delivery))
+    totals, subtotals, tax_applied, delivery_applied = compute_totals(store, tax, delivery, engine)
+    return {
+        "file": filename,
+        "items": len(result),
+        "totals": totals,
+        "subtotals": subtotals,
+        "tax": tax_applied,
+        "delivery": delivery_applied,
+        "total": sum(totals.values()),
+        "errors": [{"line": line, "text": text, "error": error} for line, text, error in result.errors],
+        "warnings": [{"line": line, "text": text, "warning": warning} for line, text, warning in result.warnings],
+    }
+
+
+def _print_summary(summary: dict):
+    print(f"{summary['file']}: {summary['items']} items")
+    for person, total in summary["totals"].items():
+        print(f"  {person:<12} ${total:10.2f}")
+    print(f"  {'Total':<12} ${summary['total']:10.2f}")
+    for error in summary["errors"]:
+        print(f"  skipped line {error['line']} ({error['text']}): {error['error']}")
+    for warning in summary["warnings"]:
+        print(f"  line {warning['line']} ({warning['text']}): {warning['warning']}")
+
+
+def export_format(path: str) -> str:
+    """The export format a file name asks for, from its extension."""
+    fmt = Path(path).suffix.lstrip(".").lower()
+    return "jsonl" if fmt in ("json", "ndjson") else fmt
+
+
+def _export_path(path: str) -> str:
+    if export_format(path) not in FORMATS:
+        raise argparse.ArgumentTypeError(f"{path}: expected a .csv, .jsonl or .parquet file")
+    return path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m maksplit", description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="receipt files (.txt quick-entry, .csv, .tsv); - for stdin")
+    parser.add_argument("--member", action="append", default=[], help="extra member beyond MS/AD/RS (repeatable)")
+    parser.add_argument("--tax", default="", help="tax amount added to every receipt")
+    parser.add_argument("--delivery", default="", help="delivery amount added to every receipt")
+    parser.add_argument("--engine", choices=ENGINES, default="cents", help="split arithmetic (default cents)")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per receipt")
+    parser.add_argument("--receipt-text", action="store_true",
+                        help="read the files as plain-text or OCR'd receipts, split between everyone")
+    parser.add_argument("--export", type=_export_path, metavar="PATH",
+                        help="write each item's split per member, with its share of the extras (.csv, .jsonl, .parquet)")
+    parser.add_argument("--export-totals", type=_export_path, metavar="PATH",
+                        help="write each receipt's per-member subtotal, item tax, extras and total")
+    args = parser.parse_args(argv)
+
+    names = BASE_NAMES + [name for name in args.member if name not in BASE_NAMES]
+    tax, delivery = parse_extra(args.tax), parse_extra(args.delivery)
+    failed = False
+    splits = [] if args.export or args.export_totals else None
+    for filename in args.files:
+        start = time.perf_counter()
+        try:
+            if filename == "-":
+                summary = split_receipt("<stdin>", decode_lines(sys.stdin.buffer), names, tax, delivery,
+                                        args.engine, args.receipt_text, splits)
+            else:
+                with open(filename, "rb") as handle:
+                    summary = split_receipt(filename, decode_lines(handle), names, tax, delivery, args.engine,
+                                            args.receipt_text, splits)
+        except OSError as exc:
+            print(f"{filename}: {exc.strerror}", file=sys.stderr)
+            failed = True
+            continue
+        summary["ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if args.json:
+            print(json.dumps(summary))
+        else:
+            _print_summary(summary)
+
+    for path, write in ((args.export, write_items), (args.export_totals, write_people)):
+        if not path:
+            continue
+        try:
+            with open(path, "wb") as out:
+                write(splits, out, export_format(path))
+        except (OSError, RuntimeError) as exc:
+            print(f"{path}: {exc.strerror if isinstance(exc, OSError) else exc}", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
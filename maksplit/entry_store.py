@@ -0,0 +1,354 @@
+from decimal import Decimal
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from maksplit.cents import item_tax
+from maksplit.kernel import row_shares, split_groups
+from maksplit.ledger import Contribution, check_cost, split_subtotal
+
+
+class RowState(NamedTuple):
+    """Everything stored for one row, to put it back as it was."""
+    row_id: int
+    index: int
+    cost: str
+    selected: tuple[str, ...]
+    weights: dict[str, int]  # the weights that differ from 1
+    tax_rate: int
+    payer: str
+
+
+class EntryStore:
+    """
+    Columnar storage for the item rows.
+
+    Instead of one dict per row, the store keeps the cost text, a vector of
+    costs in integer cents and a boolean matrix with one row per entry and one
+    column per member. Both axes are over-allocated, so appending a row or
+    adding a member is a single in-place write, and removing a member is one
+    column shift.
+
+    Every row also gets an id that never changes or gets reused, so widgets
+    keyed on it keep their state when earlier rows are deleted, and a payer:
+    the member who paid for it, or "" for whoever paid the bill.
+
+    Uneven splits are a weight matrix alongside the selection matrix (1 by
+    default, so ticked members split equally) and per-item tax a vector of
+    rates in thousandths of a percent.
+
+    Each cost is parsed once, when it is set. Costs that are not a usable
+    amount count as 0 cents and are listed in errors by row id with the
+    reason, so nothing has to parse them again to find or explain them.
+    """
+
+    def __init__(self, names: Iterable[str], capacity: int = 16):
+        self.names = list(names)
+        self._columns = {name: i for i, name in enumerate(self.names)}
+        self.costs: list[str] = []
+        self.payers: list[str] = []
+        self._cents = np.zeros(capacity, dtype=np.int64)
+        self._mask = np.zeros((capacity, max(len(self.names), 4)), dtype=bool)
+        self._weights = np.ones(self._mask.shape, dtype=np.int64)
+        self._tax_rates = np.zeros(capacity, dtype=np.int64)
+        self.ids: list[int] = []
+        self._positions: dict[int, int] = {}
+        self._next_id = 0
+        self.errors: dict[int, str] = {}
+
+    @classmethod
+    def from_mask(cls, names: Iterable[str], costs: list[str], mask: np.ndarray,
+                  ids: Optional[list[int]] = None, payers: Optional[list[str]] = None,
+                  weights: Optional[np.ndarray] = None, tax_rates: Optional[np.ndarray] = None) -> "EntryStore":
+        """Build a store from cost strings and a row x member boolean matrix (and the other columns, if kept)."""
+        store = cls(names, capacity=max(len(costs), 16))
+        rows, cols = mask.shape
+        store._mask[:rows, :cols] = mask
+        if weights is not None:
+            store._weights[:rows, :cols] = weights
+        if tax_rates is not None:
+            store._tax_rates[:rows] = tax_rates
+        checked = [check_cost(cost) for cost in costs]
+        store._cents[:rows] = [cents for cents, _ in checked]
+        store.costs = list(costs)
+        store.payers = list(payers) if payers is not None else [""] * rows
+        store._add_ids(range(rows) if ids is None else ids)
+        store.errors = {row_id: error for row_id, (_, error) in zip(store.ids, checked) if error}
+        return store
+
+    def __len__(self) -> int:
+        return len(self.costs)
+
+    def copy(self) -> "EntryStore":
+        """An independent copy, to read while the original keeps changing."""
+        store = EntryStore.__new__(EntryStore)
+        store.__dict__.update(self.__dict__)
+        for name in ("names", "costs", "payers", "ids"):
+            setattr(store, name, list(getattr(self, name)))
+        for name in ("_columns", "_positions", "errors"):
+            setattr(store, name, dict(getattr(self, name)))
+        for name in ("_cents", "_mask", "_weights", "_tax_rates"):
+            setattr(store, name, getattr(self, name).copy())
+        return store
+
+    def row_indices(self, start: int = 0):
+        """Yield row indices from start, including rows appended while iterating."""
+        index = start
+        while index < len(self):
+            yield index
+            index += 1
+
+    @property
+    def cents(self) -> np.ndarray:
+        """Cost of each row in cents (0 for blank or invalid costs)."""
+        return self._cents[:len(self)]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Row x member selection matrix."""
+        return self._mask[:len(self), :len(self.names)]
+
+    @property
+    def weights(self) -> np.ndarray:
+        """Row x member split weights (only ticked members' weights count)."""
+        return self._weights[:len(self), :len(self.names)]
+
+    @property
+    def tax_rates(self) -> np.ndarray:
+        """Item tax rate of each row, in thousandths of a percent."""
+        return self._tax_rates[:len(self)]
+
+    def _add_ids(self, ids: Iterable[int]):
+        ids = list(ids)
+        start = len(self.ids)
+        self.ids.extend(ids)
+        self._positions.update(zip(ids, range(start, start + len(ids))))
+        self._next_id = max(self._next_id, max(ids, default=-1) + 1)
+
+    def _new_ids(self, count: int):
+        self._add_ids(range(self._next_id, self._next_id + count))
+
+    def _note_error(self, row_id: int, error: str):
+        if error:
+            self.errors[row_id] = error
+        else:
+            self.errors.pop(row_id, None)
+
+    def index_of(self, row_id: int) -> int:
+        """Current position of the row with this id."""
+        return self._positions[row_id]
+
+    def _reserve_rows(self, rows: int):
+        capacity = self._cents.shape[0]
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2)
+        self._cents = np.resize(self._cents, capacity)
+        self._cents[len(self):] = 0
+        mask = np.zeros((capacity, self._mask.shape[1]), dtype=bool)
+        mask[:len(self)] = self._mask[:len(self)]
+        self._mask = mask
+        weights = np.ones(mask.shape, dtype=np.int64)
+        weights[:len(self)] = self._weights[:len(self)]
+        self._weights = weights
+        self._tax_rates = np.resize(self._tax_rates, capacity)
+        self._tax_rates[len(self):] = 0
+
+    def append(self, cost: str = "", selected: Iterable[str] = (), row_id: Optional[int] = None) -> int:
+        """Add a row at the end (under a new id unless one is given) and return its index."""
+        index = len(self)
+        self._reserve_rows(index + 1)
+        self.costs.append(cost)
+        self.payers.append("")
+        self._cents[index], error = check_cost(cost)
+        self._mask[index] = False
+        self._weights[index] = 1
+        self._tax_rates[index] = 0
+        for name in selected:
+            self._mask[index, self._columns[name]] = True
+        self._add_ids([self._next_id if row_id is None else row_id])
+        self._note_error(self.ids[index], error)
+        return index
+
+    def extend(self, costs: list[str], selected: list[Iterable[str]]):
+        """Append many rows at once, growing the arrays a single time."""
+        start = len(self)
+        self._reserve_rows(start + len(costs))
+        checked = [check_cost(cost) for cost in costs]
+        self._cents[start:start + len(costs)] = [cents for cents, _ in checked]
+        self._mask[start:start + len(costs)] = False
+        self._weights[start:start + len(costs)] = 1
+        self._tax_rates[start:start + len(costs)] = 0
+        rows, cols = [], []
+        for offset, names in enumerate(selected):
+            for name in names:
+                rows.append(start + offset)
+                cols.append(self._columns[name])
+        self._mask[rows, cols] = True
+        self.costs.extend(costs)
+        self.payers.extend([""] * len(costs))
+        self._new_ids(len(costs))
+        self.errors.update((row_id, error) for row_id, (_, error) in zip(self.ids[start:], checked) if error)
+
+    def set_weights(self, index: int, weights: dict[str, int]):
+        """Set a row's split weights; members not given go back to 1."""
+        self._weights[index] = 1
+        for name, weight in weights.items():
+            self._weights[index, self._columns[name]] = weight
+
+    def split_weights(self, index: int) -> dict[str, int]:
+        """A row's weights that differ from 1."""
+        row = self._weights[index]
+        return {name: int(row[col]) for name, col in self._columns.items() if row[col] != 1}
+
+    def set_tax_rate(self, index: int, rate: int):
+        self._tax_rates[index] = rate
+
+    def tax_rate(self, index: int) -> int:
+        return int(self._tax_rates[index])
+
+    def set_payer(self, index: int, name: str):
+        self.payers[index] = name
+
+    def set_cost(self, index: int, cost: str):
+        self.costs[index] = cost
+        self._cents[index], error = check_cost(cost)
+        self._note_error(self.ids[index], error)
+
+    def flag(self, index: int, name: str) -> bool:
+        return bool(self._mask[index, self._columns[name]])
+
+    def set_flag(self, index: int, name: str, value: bool):
+        self._mask[index, self._columns[name]] = value
+
+    def selected(self, index: int) -> tuple[str, ...]:
+        row = self._mask[index]
+        return tuple(name for name, col in self._columns.items() if row[col])
+
+    def contribution(self, index: int) -> Contribution:
+        """Return what the row adds to the split: cents, sharers, weights if uneven, item tax."""
+        cents = int(self._cents[index])
+        selected = self.selected(index)
+        weights = tuple(int(self._weights[index, self._columns[name]]) for name in selected)
+        if len(set(weights)) <= 1:
+            weights = None
+        return Contribution(cents, selected, weights, int(item_tax(cents, int(self._tax_rates[index]))))
+
+    def row_state(self, index: int) -> RowState:
+        return RowState(self.ids[index], index, self.costs[index], self.selected(index),
+                        self.split_weights(index), self.tax_rate(index), self.payers[index])
+
+    def set_row_state(self, index: int, state: RowState):
+        """Overwrite a row's cost, ticks, split, tax and payer (not its id or position)."""
+        self.set_cost(index, state.cost)
+        self._mask[index] = False
+        for name in state.selected:
+            if name in self._columns:
+                self._mask[index, self._columns[name]] = True
+        self.set_weights(index, {name: weight for name, weight in state.weights.items() if name in self._columns})
+        self._tax_rates[index] = state.tax_rate
+        self.payers[index] = state.payer if state.payer in self._columns or not state.payer else ""
+
+    def insert_rows(self, states: list[RowState]):
+        """Put removed rows back under their old ids, at the positions they had (or at the end, if past it)."""
+        states = sorted(states, key=lambda state: state.index)
+        count, added = len(self), len(states)
+        self._reserve_rows(count + added)
+        # Where each row ends up: its old position, or the end if the store has
+        # since shrunk below it (rows deleted elsewhere, or trimmed by an import)
+        positions = [min(state.index, count + offset) for offset, state in enumerate(states)]
+        # np.insert takes positions in the current rows, before any insert
+        at = [position - offset for offset, position in enumerate(positions)]
+        for array, fill in ((self._cents, 0), (self._mask, False), (self._weights, 1), (self._tax_rates, 0)):
+            array[:count + added] = np.insert(array[:count], at, fill, axis=0)
+        for position, state in zip(positions, states):
+            self.costs.insert(position, state.cost)
+            self.payers.insert(position, "")
+            self.ids.insert(position, state.row_id)
+        for position, state in zip(positions, states):
+            self.set_row_state(position, state)
+        self._positions = {row_id: index for index, row_id in enumerate(self.ids)}
+        self._next_id = max(self._next_id, max(self.ids, default=-1) + 1)
+
+    def row(self, index: int) -> dict:
+        """Return a row in the old {"cost": ..., name: bool} dict shape."""
+        row = self._mask[index]
+        return {"cost": self.costs[index], **{name: bool(row[col]) for name, col in self._columns.items()}}
+
+    def delete(self, indices: Iterable[int]) -> list[int]:
+        """Remove rows by index, returning the ids of the removed rows."""
+        keep = np.ones(len(self), dtype=bool)
+        keep[list(indices)] = False
+        count = int(keep.sum())
+        self._cents[:count] = self._cents[:len(keep)][keep]
+        self._cents[count:] = 0
+        self._mask[:count] = self._mask[:len(keep)][keep]
+        self._mask[count:] = False
+        self._weights[:count] = self._weights[:len(keep)][keep]
+        self._weights[count:] = 1
+        self._tax_rates[:count] = self._tax_rates[:len(keep)][keep]
+        self._tax_rates[count:] = 0
+        self.costs = [cost for cost, kept in zip(self.costs, keep) if kept]
+        self.payers = [payer for payer, kept in zip(self.payers, keep) if kept]
+        removed = [row_id for row_id, kept in zip(self.ids, keep) if not kept]
+        self.ids = [row_id for row_id, kept in zip(self.ids, keep) if kept]
+        self._positions = {row_id: index for index, row_id in enumerate(self.ids)}
+        for row_id in removed:
+            self.errors.pop(row_id, None)
+        return removed
+
+    def add_member(self, name: str):
+        """Add an empty member column."""
+        if name in self._columns:
+            return
+        width = len(self.names)
+        if width == self._mask.shape[1]:
+            self._mask = np.concatenate([self._mask, np.zeros_like(self._mask)], axis=1)
+            self._weights = np.concatenate([self._weights, np.ones_like(self._weights)], axis=1)
+        self._mask[:, width] = False
+        self._weights[:, width] = 1
+        self.names.append(name)
+        self._columns[name] = width
+
+    def remove_member(self, name: str):
+        """Drop a member column, shifting the later columns left."""
+        if name not in self._columns:
+            return
+        col = self._columns[name]
+        width = len(self.names)
+        self._mask[:, col:width - 1] = self._mask[:, col + 1:width]
+        self._mask[:, width - 1] = False
+        self._weights[:, col:width - 1] = self._weights[:, col + 1:width]
+        self._weights[:, width - 1] = 1
+        self.names.remove(name)
+        self._columns = {name: i for i, name in enumerate(self.names)}
+        self.payers = ["" if payer == name else payer for payer in self.payers]
+
+    def split_sums(self) -> dict[str, dict[int, int]]:
+        """
+        Per-person cents grouped by split denominator, as one matrix product.
+
+        On an equal row the denominator is the split size and the numerator
+        the row's cents; on an uneven row they are the total weight and
+        cents * weight. The math stays in int64, so it is exact.
+        """
+        keys, sums = split_groups(self.cents, self.mask, self.weights)
+        return {
+            name: {int(key): int(total) for key, total in zip(keys, sums[:, col]) if total}
+            for name, col in self._columns.items()
+        }
+
+    def cents_subtotals(self) -> dict[str, int]:
+        """Per-person whole-cent subtotals, splitting every row at once."""
+        totals = row_shares(self.cents, self.mask, self.weights).sum(axis=0)
+        return {name: int(totals[col]) for name, col in self._columns.items()}
+
+    def item_tax_cents(self) -> dict[str, int]:
+        """Per-person item tax in whole cents, split like the items."""
+        taxes = item_tax(self.cents, self.tax_rates)
+        totals = row_shares(taxes, self.mask, self.weights).sum(axis=0)
+        return {name: int(totals[col]) for name, col in self._columns.items()}
+
+    def subtotals(self) -> dict[str, Decimal]:
+        """Per-person unrounded subtotals, recomputed from scratch."""
+        return {name: split_subtotal(groups) for name, groups in self.split_sums().items()}
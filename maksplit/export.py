@@ -0,0 +1,247 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from maksplit.cents import allocate, item_tax
+from maksplit.entry_store import EntryStore
+from maksplit.kernel import row_shares
+from maksplit.ledger import cents_of
+
+# Rows split at a time while exporting; bounds the working memory whatever the receipt's length
+CHUNK_ROWS = 2048
+
+FORMATS = ("csv", "jsonl", "parquet")
+MIME_TYPES = {"csv": "text/csv", "jsonl": "application/jsonl", "parquet": "application/vnd.apache.parquet"}
+
+# One line per item and member sharing it, and one per receipt and member
+ITEM_COLUMNS = ("receipt", "item", "row_id", "cost", "member", "share", "item_tax", "extras", "total")
+PERSON_COLUMNS = ("receipt", "member", "subtotal", "item_tax", "extras", "total")
+_MONEY = {"cost", "share", "item_tax", "extras", "total", "subtotal"}
+
+
+class Split(NamedTuple):
+    """
+    One receipt to export, with the tax and delivery shared out on top.
+
+    source gives the per-person subtotals: the receipt's Ledger, or None to
+    add them up from the store a chunk at a time.
+    """
+    receipt: str
+    store: EntryStore
+    tax: Decimal = Decimal(0)
+    delivery: Decimal = Decimal(0)
+    source: Optional[object] = None
+
+
+def _chunk_shares(store: EntryStore, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+    cents, mask, weights = store.cents[start:stop], store.mask[start:stop], store.weights[start:stop]
+    return row_shares(cents, mask, weights), row_shares(item_tax(cents, store.tax_rates[start:stop]), mask, weights)
+
+
+def person_cents(split: Split, chunk_rows: int = CHUNK_ROWS) -> dict[str, tuple[int, int, int]]:
+    """
+    {member: (subtotal, item tax, extras)} in cents.
+
+    The extras are shared out exactly as cents_totals() does, so the exported
+    totals are the app's to the cent.
+    """
+    if split.source is not None:
+        subtotals = split.source.cents_subtotals()
+        taxes = split.source.item_tax_cents()
+    else:
+        store = split.store
+        subtotal_sums = np.zeros(len(store.names), dtype=np.int64)
+        tax_sums = np.zeros(len(store.names), dtype=np.int64)
+        for start in range(0, len(store), chunk_rows):
+            shares, row_taxes = _chunk_shares(store, start, min(start + chunk_rows, len(store)))
+            subtotal_sums += shares.sum(axis=0)
+            tax_sums += row_taxes.sum(axis=0)
+        subtotals = dict(zip(store.names, subtotal_sums.tolist()))
+        taxes = dict(zip(store.names, tax_sums.tolist()))
+    names = list(subtotals)
+    extras = allocate(cents_of(split.tax) + cents_of(split.delivery), [subtotals[name] for name in names])
+    return {name: (subtotals[name], taxes.get(name, 0), extra) for name, extra in zip(names, extras)}
+
+
+def allocation_chunks(split: Split, chunk_rows: int = CHUNK_ROWS) -> Iterator[dict[str, np.ndarray]]:
+    """
+    The per-item allocations of a receipt as column arrays, chunk_rows rows at a time.
+
+    Each chunk has one entry per item and member sharing it: "item" (its
+    1-based position), "row_id", "cost", "member" (a column of store.names),
+    and that member's "share", "item_tax", "extras" and "total", all in
+    cents. A member's extras are spread over their items in proportion to
+    their shares by rounding the running total half up, so the items add up
+    to the member's extras exactly without holding every row at once. The
+    store's arrays are only sliced, never copied whole.
+    """
+    store = split.store
+    people = person_cents(split, chunk_rows)
+    subtotals = np.array([people[name][0] for name in store.names], dtype=np.int64)
+    extras = np.array([people[name][2] for name in store.names], dtype=np.int64)
+    divisor = 2 * np.maximum(subtotals, 1)
+    running = np.zeros(len(store.names), dtype=np.int64)
+    owed = np.zeros(len(store.names), dtype=np.int64)
+    for start in range(0, len(store), chunk_rows):
+        stop = min(start + chunk_rows, len(store))
+        shares, taxes = _chunk_shares(store, start, stop)
+        cents, mask = store.cents[start:stop], store.mask[start:stop]
+        cumulative = running + np.cumsum(shares, axis=0)
+        owed_after = (2 * extras * cumulative + divisor // 2) // divisor
+        row_extras = np.diff(owed_after, axis=0, prepend=owed[None, :])
+        running, owed = cumulative[-1], owed_after[-1]
+
+        rows, members = np.nonzero(mask & (cents != 0)[:, None])
+        share, tax, extra = shares[rows, members], taxes[rows, members], row_extras[rows, members]
+        yield {
+            "item": rows + start + 1,
+            "row_id": np.asarray(store.ids[start:stop], dtype=np.int64)[rows],
+            "cost": cents[rows],
+            "member": members,
+            "share": share,
+            "item_tax": tax,
+            "extras": extra,
+            "total": share + tax + extra,
+        }
+
+
+def _item_lines(splits: Iterable[Split], chunk_rows: int) -> Iterator[tuple[str, list[str], dict]]:
+    for split in splits:
+        for chunk in allocation_chunks(split, chunk_rows):
+            yield split.receipt, split.store.names, chunk
+
+
+def _person_rows(splits: Iterable[Split]) -> Iterator[dict]:
+    for split in splits:
+        for name, (subtotal, tax, extras) in person_cents(split).items():
+            yield {"receipt": split.receipt, "member": name, "subtotal": subtotal, "item_tax": tax,
+                   "extras": extras, "total": subtotal + tax + extras}
+
+
+def _money(cents) -> str:
+    return f"{cents / 100:.2f}"
+
+
+def write_items(splits: Iterable[Split], out: BinaryIO, fmt: str, chunk_rows: int = CHUNK_ROWS):
+    """
+    Write the per-item allocations of some receipts to a binary stream.
+
+    Rows are written as each chunk is split, so memory stays flat however
+    many items there are. Amounts are dollars: "12.34" in CSV, numbers in
+    JSON lines and float64 columns in Parquet.
+    """
+    if fmt == "parquet":
+        _write_parquet_items(splits, out, chunk_rows)
+        return
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            writer = csv.writer(text)
+            writer.writerow(ITEM_COLUMNS)
+            for receipt, names, chunk in _item_lines(splits, chunk_rows):
+                writer.writerows(
+                    (receipt, item, row_id, _money(cost), names[member], _money(share), _money(tax),
+                     _money(extra), _money(total))
+                    for item, row_id, cost, member, share, tax, extra, total in zip(
+                        *(chunk[column].tolist() for column in ITEM_COLUMNS[1:]))
+                )
+        elif fmt == "jsonl":
+            for receipt, names, chunk in _item_lines(splits, chunk_rows):
+                receipt_json = json.dumps(receipt)
+                member_json = [json.dumps(name) for name in names]
+                text.writelines(
+                    f'{{"receipt":{receipt_json},"item":{item},"row_id":{row_id},"cost":{cost / 100},'
+                    f'"member":{member_json[member]},"share":{share / 100},"item_tax":{tax / 100},'
+                    f'"extras":{extra / 100},"total":{total / 100}}}\n'
+                    for item, row_id, cost, member, share, tax, extra, total in zip(
+                        *(chunk[column].tolist() for column in ITEM_COLUMNS[1:]))
+                )
+        else:
+            raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+    finally:
+        text.flush()
+        text.detach()
+
+
+def write_people(splits: Iterable[Split], out: BinaryIO, fmt: str):
+    """Write every receipt's per-person subtotal, item tax, extras and total to a binary stream."""
+    rows = _person_rows(splits)
+    if fmt == "parquet":
+        pa, pq = _pyarrow()
+        rows = list(rows)
+        table = pa.table({
+            column: [row[column] / 100 if column in _MONEY else row[column] for row in rows]
+            for column in PERSON_COLUMNS
+        })
+        pq.write_table(table, out)
+        return
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    try:
+        if fmt == "csv":
+            writer = csv.writer(text)
+            writer.writerow(PERSON_COLUMNS)
+            writer.writerows(
+                [_money(row[column]) if column in _MONEY else row[column] for column in PERSON_COLUMNS]
+                for row in rows
+            )
+        elif fmt == "jsonl":
+            text.writelines(json.dumps({
+                column: row[column] / 100 if column in _MONEY else row[column] for column in PERSON_COLUMNS
+            }) + "\n" for row in rows)
+        else:
+            raise ValueError(f"unknown format {fmt!r}, expected one of {FORMATS}")
+    finally:
+        text.flush()
+        text.detach()
+
+
+def available_formats() -> tuple[str, ...]:
+    """FORMATS, less parquet when pyarrow cannot be imported."""
+    try:
+        _pyarrow()
+    except RuntimeError:
+        return tuple(fmt for fmt in FORMATS if fmt != "parquet")
+    return FORMATS
+
+
+def _pyarrow():
+    # pyarrow comes with Streamlit, but the split engine and CLI run without it
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)") from exc
+    return pa, pq
+
+
+def _write_parquet_items(splits: Iterable[Split], out: BinaryIO, chunk_rows: int):
+    pa, pq = _pyarrow()
+    schema = pa.schema([
+        ("receipt", pa.dictionary(pa.int32(), pa.string())),
+        ("item", pa.int64()),
+        ("row_id", pa.int64()),
+        ("cost", pa.float64()),
+        ("member", pa.dictionary(pa.int32(), pa.string())),
+        ("share", pa.float64()),
+        ("item_tax", pa.float64()),
+        ("extras", pa.float64()),
+        ("total", pa.float64()),
+    ])
+    with pq.ParquetWriter(out, schema) as writer:
+        for receipt, names, chunk in _item_lines(splits, chunk_rows):
+            rows = len(chunk["item"])
+            if not rows:
+                continue
+            columns = {
+                "receipt": pa.DictionaryArray.from_arrays(np.zeros(rows, dtype=np.int32), [receipt]),
+                "member": pa.DictionaryArray.from_arrays(chunk["member"].astype(np.int32), names),
+            }
+            for column in ITEM_COLUMNS:
+                if column not in columns:
+                    values = chunk[column]
+                    columns[column] = values / 100 if column in _MONEY else values
+            writer.write_batch(pa.record_batch([columns[column] for column in ITEM_COLUMNS], schema=schema))
@@ -0,0 +1,31 @@
+# Rows rendered as widgets around the active row when the grid is windowed
+GRID_WINDOW_BEFORE = 10
+GRID_WINDOW_AFTER = 4
+
+
+def grid_window(active_index: int, row_count: int, before: int = GRID_WINDOW_BEFORE, after: int = GRID_WINDOW_AFTER) -> tuple[int, int]:
+    """
+    Return the [start, stop) range of rows to render as editable widgets.
+
+    The window holds at most before + after + 1 rows around the active row and
+    is shifted back inside the grid near either end, so the widget count per
+    rerun stays bounded however long the receipt gets.
+    """
+    size = before + after + 1
+    if row_count <= size:
+        return 0, row_count
+    start = max(0, min(active_index - before, row_count - size))
+    return start, start + size
+
+
+def summarize_rows(entries, start: int, stop: int) -> str:
+    """Read-only markdown summary of the rows in [start, stop) that have a cost."""
+    lines = []
+    for index in range(start, stop):
+        cost = entries.costs[index]
+        if not cost.strip():
+            continue
+        people = ", ".join(entries.selected(index)) or "nobody"
+        error = entries.errors.get(entries.ids[index])
+        lines.append(f"`#{index + 1}` ${cost} — {people}" + (f" ⚠️ {error}, counted as $0" if error else ""))
+    return "  \n".join(lines) or "_No amounts entered_"
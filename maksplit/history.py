@@ -0,0 +1,96 @@
+from collections import deque
+from typing import NamedTuple, Optional
+
+from maksplit.shared import Room
+
+# Changes kept for undo; older ones are dropped
+HISTORY_SIZE = 100
+
+
+class Change(NamedTuple):
+    """
+    One undoable change and what it touched, before and after.
+
+    kind is "rows" (edited rows: RowStates), "insert" or "delete" (rows
+    added or removed: RowStates), "add_members" or "remove_members"
+    (MemberStates, or names for an add) or "settings" (tax/delivery dicts).
+    """
+    kind: str
+    before: tuple
+    after: tuple
+    label: str
+
+
+class History:
+    """
+    Undo and redo stacks of Changes, newest last.
+
+    A Change holds only the rows or members it touched, so undoing it costs
+    as much as the change did however long the receipt is, and nothing has
+    to be copied on every edit. The undo stack keeps the last `size` changes;
+    recording a new change clears the redo stack.
+
+    There are no periodic checkpoints of the whole receipt: since each Change
+    carries its own before-state, undo never replays from one, and dropping
+    the oldest change is all the eviction the log needs.
+    """
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        self._done: deque[Change] = deque(maxlen=size)
+        self._undone: list[Change] = []
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def record(self, change: Change):
+        self._done.append(change)
+        self._undone.clear()
+
+    def undo(self) -> Optional[Change]:
+        """Take the last change off the undo stack, for the caller to revert."""
+        if not self._done:
+            return None
+        change = self._done.pop()
+        self._undone.append(change)
+        return change
+
+    def redo(self) -> Optional[Change]:
+        """Take the last undone change back, for the caller to apply again."""
+        if not self._undone:
+            return None
+        change = self._undone.pop()
+        self._done.append(change)
+        return change
+
+    def next_undo(self) -> Optional[Change]:
+        return self._done[-1] if self._done else None
+
+    def next_redo(self) -> Optional[Change]:
+        return self._undone[-1] if self._undone else None
+
+
+def replay(room: Room, change: Change, undo: bool, origin: str = "") -> list[int]:
+    """
+    Revert (undo=True) or re-apply a room change; returns the ids of the
+    rows whose widgets need re-seeding. "settings" changes are left to the
+    caller, since the extras live in each session rather than the room.
+    """
+    kind = change.kind
+    if kind == "rows":
+        return room.restore_rows(change.before if undo else change.after, origin)
+    if kind in ("insert", "delete"):
+        states = change.after if kind == "insert" else change.before
+        if (kind == "insert") == undo:
+            return room.delete_rows([state.row_id for state in states], origin)
+        return room.insert_rows(list(states), origin)
+    if kind == "add_members" and undo or kind == "remove_members" and not undo:
+        names = change.after if kind == "add_members" else [state.name for state in change.before]
+        for name in names:
+            room.remove_member(name, origin)
+    elif kind == "add_members":
+        for name in change.after:
+            room.add_member(name, origin)
+    elif kind == "remove_members":
+        for state in change.before:
+            room.restore_member(state, origin)
+    return []
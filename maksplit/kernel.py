@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def uneven_rows(mask: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Rows whose ticked members do not all carry the same weight."""
+    high = np.where(mask, weights, 0).max(axis=1, initial=0)
+    low = np.where(mask, weights, high[:, None]).min(axis=1, initial=np.iinfo(np.int64).max)
+    return high != low
+
+
+def row_shares(cents: np.ndarray, mask: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Every row's cents split between its members, as a row x member matrix.
+
+    Rows with equal weights are vectorized item_shares(): cents // size each,
+    and the leftover cents go to the sharers whose position among the row's
+    members, counted round from (cents // size) % size, is below the
+    leftover. The other rows are vectorized weighted_shares(): floors of the
+    exact shares, then the leftover cents by largest remainder, ties in that
+    same rotated order. Both paths are whole-array int64 operations, so
+    mixing modes costs no per-row Python.
+    """
+    counts = mask.sum(axis=1)
+    sizes = np.maximum(counts, 1)
+    base, leftover = np.divmod(cents, sizes)
+    start = base % sizes
+    position = np.cumsum(mask, axis=1) - 1
+    rotated = (position - start[:, None]) % sizes[:, None]
+    shares = (base[:, None] + (rotated < leftover[:, None])) * mask
+
+    if (weights == 1).all():
+        return shares
+    uneven = np.flatnonzero(uneven_rows(mask, weights))
+    if uneven.size:
+        ticked = np.where(mask[uneven], weights[uneven], 0)
+        part, remainder = np.divmod(cents[uneven, None] * ticked, ticked.sum(axis=1)[:, None])
+        short = cents[uneven] - part.sum(axis=1)
+        rank = np.lexsort((rotated[uneven], -remainder), axis=-1).argsort(axis=1)
+        shares[uneven] = part + (rank < short[:, None])
+    return shares
+
+
+def split_groups(cents: np.ndarray, mask: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-member numerators grouped by denominator, for exact Decimal subtotals.
+
+    A member's exact share of a row is numerator / denominator: cents / size
+    on equal rows, cents * weight / total weight on the others. Returns the
+    distinct denominators and, for each, the per-member numerator sums.
+    """
+    counts = mask.sum(axis=1)
+    if (weights == 1).all():
+        denominators, numerators = counts, cents[:, None] * mask
+    else:
+        uneven = uneven_rows(mask, weights)
+        ticked = np.where(mask, weights, 0)
+        denominators = np.where(uneven, ticked.sum(axis=1), counts)
+        numerators = cents[:, None] * np.where(uneven[:, None], ticked, mask)
+    used = (denominators > 0) & (cents != 0)
+    keys, group = np.unique(denominators[used], return_inverse=True)
+    # Sort rows by denominator and sum each run of equal denominators
+    order = np.argsort(group, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(group[order]) != 0]) if order.size else order
+    sums = np.add.reduceat(numerators[used][order], starts, axis=0) if order.size else numerators[:0]
+    return keys, sums
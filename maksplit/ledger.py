@@ -0,0 +1,180 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Iterable, NamedTuple, Optional
+
+from maksplit.cents import item_shares, weighted_shares
+
+
+def parse_cost(value: str) -> Optional[Decimal]:
+    """Parse a cost string, returning None for blank, invalid or negative values."""
+    if not value.strip():
+        return None
+    try:
+        cost = Decimal(value)
+    except InvalidOperation:
+        return None
+    if not cost.is_finite() or cost < 0:
+        return None
+    return cost
+
+
+def cents_of(amount: Decimal) -> int:
+    """Round a Decimal dollar amount to whole cents (half up)."""
+    return int(amount.scaleb(2).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def check_cost(value: str) -> tuple[int, str]:
+    """
+    Parse a cost string into (whole cents, error).
+
+    error is "" for a usable amount or a blank, and otherwise says why the
+    cost counts as 0. The store calls this once per cost as it is set and
+    keeps both, so nothing downstream parses costs or catches errors.
+    """
+    if not value.strip():
+        return 0, ""
+    try:
+        cost = Decimal(value)
+    except InvalidOperation:
+        return 0, "Not a number"
+    if not cost.is_finite():
+        return 0, "Not a number"
+    if cost < 0:
+        return 0, "Negative amount"
+    return cents_of(cost), ""
+
+
+def to_cents(value: str) -> int:
+    """Parse a cost string into whole cents; unusable values count as 0."""
+    return check_cost(value)[0]
+
+
+class Contribution(NamedTuple):
+    """What one row adds to the split."""
+    cents: int
+    selected: tuple[str, ...]
+    weights: Optional[tuple[int, ...]] = None  # None for an equal split
+    tax: int = 0  # item tax in cents
+
+
+def split_subtotal(groups: dict[int, int]) -> Decimal:
+    """Turn {denominator: numerator sum} (on equal rows, split size: cents) into an unrounded dollar subtotal."""
+    return sum((Decimal(cents) / size for size, cents in sorted(groups.items())), Decimal('0')).scaleb(-2)
+
+
+def row_contribution(entry: dict, names: Iterable[str]) -> tuple[int, tuple[str, ...]]:
+    """Return the (cents, selected_people) pair a single entry dict adds to the split."""
+    return to_cents(entry["cost"]), tuple(name for name in names if entry.get(name, False))
+
+
+class Ledger:
+    """
+    Running per-person subtotals, updated by row deltas instead of a full rescan.
+
+    For each person the ledger keeps the cents of their items grouped by how
+    many people share the item. A subtotal is then sum(cents / group_size), so
+    an edit only touches the people on the old and new row, and the result is
+    exactly what a from-scratch recompute over the same rows produces.
+
+    Alongside, it keeps whole-cent subtotals where each item is split with
+    item_shares(), for the integer-cents engine.
+
+    Uneven rows are grouped by their total weight instead, with each member's
+    cents scaled by their weight, and split with weighted_shares(). Item tax
+    is kept per person in whole cents.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._sums = {name: {} for name in names}
+        self._cents = {name: 0 for name in self._sums}
+        self._tax = {name: 0 for name in self._sums}
+        self._cache = {}
+
+    @classmethod
+    def from_entries(cls, entries: list[dict], names: Iterable[str]) -> "Ledger":
+        """Build a ledger by posting every entry dict once."""
+        names = list(names)
+        ledger = cls(names)
+        for entry in entries:
+            ledger.post(*row_contribution(entry, names))
+        return ledger
+
+    @classmethod
+    def from_store(cls, store) -> "Ledger":
+        """Build a ledger from an EntryStore's vectorized split sums."""
+        ledger = cls(store.names)
+        ledger._sums = store.split_sums()
+        ledger._cents = store.cents_subtotals()
+        ledger._tax = store.item_tax_cents()
+        return ledger
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._sums)
+
+    def _apply(self, sign: int, cents: int, selected: tuple[str, ...], weights=None, tax: int = 0):
+        if not cents or not selected:
+            return
+        size = len(selected)
+        if weights is None:
+            shares, tax_shares = item_shares(cents, size), item_shares(tax, size)
+            parts = [(size, cents)] * size
+        else:
+            shares, tax_shares = weighted_shares(cents, weights), weighted_shares(tax, weights)
+            parts = [(sum(weights), cents * weight) for weight in weights]
+        for person, share, tax_share, (denominator, numerator) in zip(selected, shares, tax_shares, parts):
+            self._cents[person] += sign * share
+            self._tax[person] += sign * tax_share
+            if numerator:
+                groups = self._sums[person]
+                total = groups.get(denominator, 0) + sign * numerator
+                if total:
+                    groups[denominator] = total
+                else:
+                    groups.pop(denominator, None)
+            self._cache.pop(person, None)
+
+    def post(self, cents: int, selected: tuple[str, ...], weights=None, tax: int = 0):
+        """Add a row's contribution."""
+        self._apply(1, cents, selected, weights, tax)
+
+    def retract(self, cents: int, selected: tuple[str, ...], weights=None, tax: int = 0):
+        """Remove a previously posted row's contribution."""
+        self._apply(-1, cents, selected, weights, tax)
+
+    def replace(self, old: tuple, new: tuple):
+        """Swap one row's contribution for another (an edit)."""
+        if old == new:
+            return
+        self.retract(*old)
+        self.post(*new)
+
+    def add_member(self, name: str):
+        """Add a member with no items; existing splits are unaffected."""
+        self._sums.setdefault(name, {})
+        self._cents.setdefault(name, 0)
+        self._tax.setdefault(name, 0)
+
+    def subtotal(self, name: str) -> Decimal:
+        if name not in self._cache:
+            self._cache[name] = split_subtotal(self._sums[name])
+        return self._cache[name]
+
+    def subtotals(self) -> dict[str, Decimal]:
+        """Per-person unrounded subtotals."""
+        return {name: self.subtotal(name) for name in self._sums}
+
+    def cents_subtotals(self) -> dict[str, int]:
+        """Per-person subtotals in whole cents, summing exactly to the item total."""
+        return dict(self._cents)
+
+    def item_tax_cents(self) -> dict[str, int]:
+        """Per-person item tax in whole cents."""
+        return dict(self._tax)
+
+    def matches(self, store) -> bool:
+        """Check the running totals against a from-scratch recompute of the store."""
+        return (
+            self.subtotals() == store.subtotals()
+            and self._cents == store.cents_subtotals()
+            and self._tax == store.item_tax_cents()
+        )
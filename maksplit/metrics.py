@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+# Reruns kept per phase for the latency percentiles
+WINDOW = 1024
+QUANTILES = (0.5, 0.9, 0.99)
+
+log = logging.getLogger("maksplit.metrics")
+
+
+class RerunMetrics:
+    """
+    Timings and counts for one script (or fragment) run.
+
+    Wrap each phase in ``with metrics.phase(name):``; a phase entered twice in
+    the same run adds up. Counts are free-form, such as widgets emitted.
+    """
+
+    def __init__(self, scope: str = "app"):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.phases: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+def deep_size(value, seen: Optional[set] = None) -> int:
+    """
+    Approximate bytes held by a value and everything it refers to.
+
+    Numpy arrays count their buffers; objects shared between several keys
+    (the room's entries are also st.session_state.entries) count once.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) + (value.nbytes if value.base is None else 0)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        size += deep_size(vars(value), seen)
+    return size
+
+
+class MetricsRegistry:
+    """
+    Rolling rerun latencies for the whole server process.
+
+    Every finished run is added with record(). The registry keeps the last
+    WINDOW durations of each phase for percentiles, plus running counts and
+    sums, and renders them in the Prometheus text format. write_textfile()
+    replaces the file atomically so a node_exporter textfile collector never
+    reads half of it.
+    """
+
+    def __init__(self, window: int = WINDOW):
+        self.lock = threading.Lock()
+        self._window = window
+        self._seconds: dict[tuple[str, str], deque] = {}
+        self._totals: dict[tuple[str, str], list] = {}  # [count, sum]
+        self._gauges: dict[str, float] = {}
+        self._last_write = 0.0
+
+    def record(self, run: RerunMetrics, gauges: Optional[dict] = None) -> dict:
+        """Add a finished run; returns its structured record, which is also logged."""
+        phases = dict(run.phases, total=run.elapsed())
+        with self.lock:
+            for name, seconds in phases.items():
+                key = (run.scope, name)
+                self._seconds.setdefault(key, deque(maxlen=self._window)).append(seconds)
+                totals = self._totals.setdefault(key, [0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+            self._gauges.update(run.counts)
+            self._gauges.update(gauges or {})
+        record = {
+            "scope": run.scope,
+            "ms": {name: round(seconds * 1000, 3) for name, seconds in phases.items()},
+            **run.counts,
+            **(gauges or {}),
+        }
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps(record, sort_keys=True))
+        return record
+
+    def percentiles(self, scope: str = "app") -> dict[str, dict[float, float]]:
+        """{phase: {quantile: milliseconds}} over the recent runs of a scope."""
+        with self.lock:
+            samples = {name: list(values) for (run_scope, name), values in self._seconds.items() if run_scope == scope}
+        return {
+            name: dict(zip(QUANTILES, np.quantile(values, QUANTILES) * 1000))
+            for name, values in samples.items()
+        }
+
+    def prometheus_text(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP maksplit_rerun_seconds Script and fragment run time by phase.",
+            "# TYPE maksplit_rerun_seconds summary",
+        ]
+        with self.lock:
+            samples = {key: list(values) for key, values in self._seconds.items()}
+            totals = {key: tuple(value) for key, value in self._totals.items()}
+            gauges = dict(self._gauges)
+        for (scope, name), values in sorted(samples.items()):
+            labels = f'scope="{scope}",phase="{name}"'
+            for quantile, seconds in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                lines.append(f'maksplit_rerun_seconds{{{labels},quantile="{quantile}"}} {seconds:.6f}')
+            count, total = totals[scope, name]
+            lines.append(f"maksplit_rerun_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"maksplit_rerun_seconds_count{{{labels}}} {count}")
+        for name, value in sorted(gauges.items()):
+            lines.append(f"# TYPE maksplit_{name} gauge")
+            lines.append(f"maksplit_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path, every: float = 0.0) -> bool:
+        """Write prometheus_text() to path, at most once every `every` seconds."""
+        now = time.monotonic()
+        with self.lock:
+            if self._last_write and now - self._last_write < every:
+                return False
+            self._last_write = now
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        partial.write_text(self.prometheus_text())
+        os.replace(partial, path)
+        return True
+
+
+def format_table(percentiles: dict[str, dict[float, float]], order: Iterable[str] = ()) -> list[dict]:
+    """Rows of phase and p50/p90/p99 milliseconds, in the given phase order first."""
+    names = [name for name in order if name in percentiles]
+    names += sorted(name for name in percentiles if name not in names)
+    return [
+        {"phase": name, **{f"p{round(q * 100)} ms": round(percentiles[name][q], 3) for q in QUANTILES}}
+        for name in names
+    ]
@@ -0,0 +1,128 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import NamedTuple
+
+# The default group, and the quick-entry letters that tick them
+BASE_NAMES = ["MS", "AD", "RS"]
+INITIALS = {'m': "MS", 'r': "RS", 'a': "AD"}
+
+# One pass over the text: runs of amount characters or runs of letters
+_TOKENS = re.compile(r"[0-9.\-]+|[^\W\d_]+")
+# The amount characters alone, for tables that never need the words
+_AMOUNT = re.compile(r"[0-9.\-]+")
+_ASCII_AMOUNT = str.maketrans("", "", "".join(chr(c) for c in range(128) if chr(c) not in "0123456789.-"))
+# QuickEntry(...) without the Python-level __new__ call, for the fast path
+_new_entry = tuple.__new__
+
+
+class QuickEntry(NamedTuple):
+    amount: str
+    selected: tuple[str, ...]
+    ambiguous: tuple[str, ...]
+
+
+class TokenTable:
+    """
+    Precompiled lookup from typed words to members.
+
+    A word ticks a member if it is the member's name, a prefix only that
+    member's name starts with, or (for the base members) their quick-entry
+    initial. Words that match nothing are read letter by letter, which keeps
+    the old "100mra" behaviour. Prefixes shared by several members are kept
+    aside so they can be reported instead of guessed.
+
+    When no prefix is shared and every name and prefix ticks just what its
+    letters tick, as with the base names alone, a word always ticks the same
+    members as its letters. parse() then skips splitting the text into words
+    and only looks for each member's letter in it.
+    """
+
+    def __init__(self, names: tuple[str, ...]):
+        self.names = names
+        self.aliases: dict[str, str] = {}
+        self.ambiguous: dict[str, tuple[str, ...]] = {}
+
+        # Base initials and exact names take precedence over prefixes
+        for initial, name in INITIALS.items():
+            if name in names:
+                self.aliases[initial] = name
+        for name in names:
+            self.aliases.setdefault(name.lower(), name)
+
+        owners = defaultdict(list)
+        for name in names:
+            lowered = name.lower()
+            for end in range(1, len(lowered) + 1):
+                if name not in owners[lowered[:end]]:
+                    owners[lowered[:end]].append(name)
+        for prefix, members in owners.items():
+            if prefix in self.aliases:
+                continue
+            if len(members) == 1:
+                self.aliases[prefix] = members[0]
+            else:
+                self.ambiguous[prefix] = tuple(members)
+
+        letters = {key: name for key, name in self.aliases.items() if len(key) == 1 and key.isalpha()}
+        by_letters = not self.ambiguous and len(set(letters.values())) == len(letters) and all(
+            {letters[letter] for letter in key if letter in letters} == {name} for key, name in self.aliases.items()
+        )
+        # (letter, member) in the members' order, or None to parse word by word
+        self.letters = tuple(
+            (letter, name) for name in names for letter, owner in letters.items() if owner == name
+        ) if by_letters else None
+
+    def _resolve(self, word: str, selected: set, ambiguous: list):
+        if word in self.aliases:
+            selected.add(self.aliases[word])
+        elif word in self.ambiguous:
+            ambiguous.append(word)
+        else:
+            for letter in word:
+                if letter in self.aliases:
+                    selected.add(self.aliases[letter])
+                elif letter in self.ambiguous:
+                    ambiguous.append(letter)
+
+    def parse(self, text: str) -> QuickEntry:
+        """Parse text such as "12.50 ms+ram" into amount, members and ambiguous words."""
+        if self.letters is not None:
+            lowered = text.lower()
+            return _new_entry(QuickEntry, (
+                text.translate(_ASCII_AMOUNT) if text.isascii() else "".join(_AMOUNT.findall(text)),
+                tuple([name for letter, name in self.letters if letter in lowered]),
+                (),
+            ))
+        amount = []
+        selected = set()
+        ambiguous = []
+        for token in _TOKENS.findall(text):
+            if token[0] in "0123456789.-":
+                amount.append(token)
+            else:
+                self._resolve(token.lower(), selected, ambiguous)
+        return QuickEntry(
+            "".join(amount),
+            tuple(name for name in self.names if name in selected),
+            tuple(ambiguous),
+        )
+
+    def describe(self, word: str) -> str:
+        """Explain an ambiguous word for the user."""
+        return f"'{word}' could be " + " or ".join(self.ambiguous.get(word, ()))
+
+
+@lru_cache(maxsize=16)
+def token_table(names: tuple[str, ...]) -> TokenTable:
+    """Build (once per member set) the token table for these names."""
+    return TokenTable(names)
+
+
+def parse_quick_entry(text: str, names: list[str]) -> tuple[str, dict]:
+    """
+    Process quick-entry text such as "100mr" into an amount and checkbox states.
+    Returns a tuple of (cleaned_amount, checkbox_states)
+    """
+    amount, selected, _ = token_table(tuple(names)).parse(text)
+    return amount, {name: name in selected for name in names}
@@ -0,0 +1,109 @@
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable
+
+from maksplit.bulk_import import ImportResult
+from maksplit.ledger import cents_of
+
+# A price at the end of a line: "$4.99", "12,99", "3.00-" (a discount), then
+# an optional tax flag such as "E", "N", "TX" or "*". OCR misreads some
+# digits as letters, so those are accepted after the first digit.
+_PRICE = re.compile(
+    r"(?<![\w.,])(?P<sign>-)?\$?\s?(?P<whole>\d[\dOoIlSBg]{0,2}(?:,[\dOoIlSBg]{3})+|\d[\dOoIlSBg]{0,6})[.,]"
+    r"(?P<cents>[\dOoIlSBg]{2})(?P<trail>-)?(?:\s+[A-Z]{1,2}|\s*\*)?\s*$"
+)
+_OCR_DIGITS = str.maketrans("OoIlSBg", "0011589")
+# ...and digits as letters in the words
+_OCR_LETTERS = str.maketrans("015", "ois")
+
+# Lines that carry the bill's figures rather than an item, matched on the
+# text before the price once leading "*", "-" and spaces are stripped
+_SUBTOTAL = re.compile(r"sub\s*-?\s*total\b", re.IGNORECASE)
+_TAX = re.compile(r"(?:(?:sales|state|city|county|local)\s+)?(?:tax|hst|gst|pst|qst|vat)\b", re.IGNORECASE)
+_TOTAL = re.compile(r"(?:grand\s+)?total\b|(?:amount|balance)\s+due\b", re.IGNORECASE)
+# Lines after the items, or in between, that have a price but are not one
+_SKIP = re.compile(
+    r"(?:change|cash|tend(?:er)?(?:ed)?|payment|paid|visa|master\s*card|mc\b|amex|discover|debit|credit|card|"
+    r"auth|approved|you\s+saved|savings|total\s+savings|points|rewards|tip|gratuity)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class ReceiptImport(ImportResult):
+    """
+    Items read from a receipt's text, plus the bill's own figures.
+
+    tax and subtotal are the amounts printed on the receipt ("" if there was
+    no such line). The printed total is only checked against, in a warning.
+    """
+    tax: str = ""
+    subtotal: str = ""
+
+
+def _amount(match: re.Match) -> Decimal:
+    whole = match["whole"].translate(_OCR_DIGITS).replace(",", "")
+    amount = Decimal(f"{whole}.{match['cents'].translate(_OCR_DIGITS)}")
+    return -amount if match["sign"] or match["trail"] else amount
+
+
+def _label(text: str) -> str:
+    return text.strip(" \t*-:#=.").strip()
+
+
+def parse_receipt(lines: Iterable[str], selected: tuple[str, ...] = ()) -> ReceiptImport:
+    """
+    Read the line items of a plain-text or OCR'd receipt in one pass.
+
+    A line ending in a price is an item, unless its text says it is the
+    subtotal, a tax line (several are added up), the total or a payment. A
+    negative price ("3.00-", as instant savings print) comes off the item
+    above it. Items stop at the total. Every item is ticked for `selected`.
+
+    Lines that cannot be read are skipped quietly, since most of a receipt
+    is headers and footers. When the items don't add up to the printed
+    subtotal, or items and tax to the total, a warning says so.
+    """
+    result = ReceiptImport()
+    items: list[Decimal] = []
+    tax = subtotal = total = None
+    for line_no, line in enumerate(lines, start=1):
+        text = line.strip()
+        if not text:
+            continue
+        result.check_encoding(line_no, text)
+        match = _PRICE.search(text)
+        if match is None:
+            continue
+        label = _label(text[:match.start()])
+        words = label.translate(_OCR_LETTERS)
+        amount = _amount(match)
+        if _SUBTOTAL.match(words):
+            subtotal = amount
+        elif _TAX.match(words) and total is None:
+            tax = (tax or Decimal(0)) + amount
+        elif total is not None or _SKIP.match(words):
+            pass
+        elif _TOTAL.match(words):
+            total = amount
+        elif amount < 0:
+            if items and items[-1] + amount >= 0:
+                items[-1] += amount
+            else:
+                result.warnings.append((line_no, text, "discount with no item above it"))
+        elif amount:
+            items.append(amount)
+
+    result.costs = [f"{item:f}" for item in items]
+    result.selected = [tuple(selected)] * len(items)
+    result.tax = f"{tax:f}" if tax else ""
+    result.subtotal = f"{subtotal:f}" if subtotal is not None else ""
+
+    item_cents = sum(cents_of(item) for item in items)
+    billed_cents = item_cents + cents_of(tax or Decimal(0))
+    if subtotal is not None and cents_of(subtotal) != item_cents:
+        result.warnings.append((0, f"subtotal {subtotal:f}", f"items add up to {item_cents / 100:.2f}"))
+    elif total is not None and cents_of(total) != billed_cents:
+        result.warnings.append((0, f"total {total:f}", f"items and tax add up to {billed_cents / 100:.2f}"))
+    return result
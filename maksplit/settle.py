@@ -0,0 +1,128 @@
+import heapq
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from maksplit.cents import item_tax
+
+# Groups with at most this many non-zero balances get the exact solver
+EXACT_LIMIT = 12
+# Seconds the exact solver may take before settle_up() falls back to greedy
+TIME_BUDGET = 0.05
+
+
+class Transfer(NamedTuple):
+    debtor: str
+    creditor: str
+    cents: int
+
+
+def paid_cents(entries, default_payer: str) -> dict[str, int]:
+    """
+    Cents each member paid for the shared rows, item tax included.
+
+    Rows without a payer were paid by default_payer. Rows nobody is ticked
+    on are left out: nobody owes anything for them.
+    """
+    shared = (entries.mask.sum(axis=1) > 0) & (entries.cents > 0)
+    charged = entries.cents + item_tax(entries.cents, entries.tax_rates)
+    paid = dict.fromkeys(entries.names, 0)
+    for index in np.flatnonzero(shared):
+        paid[entries.payers[index] or default_payer] += int(charged[index])
+    return paid
+
+
+def net_balances(totals: dict[str, float], paid: dict[str, int], default_payer: str) -> dict[str, int]:
+    """
+    Paid minus owed, in cents, from the calculate_totals() per-person totals.
+
+    The extras (tax and delivery) and any rounding left over are counted as
+    paid by default_payer, so the balances always sum to zero.
+    """
+    owed = {name: round(total * 100) for name, total in totals.items()}
+    balances = {name: paid.get(name, 0) - owed[name] for name in owed}
+    balances[default_payer] += -sum(balances.values())
+    return balances
+
+
+def greedy_transfers(balances: dict[str, int]) -> list[Transfer]:
+    """
+    Settle by repeatedly paying the largest creditor from the largest debtor.
+
+    O(n log n) and at most n - 1 transfers, though not always the fewest.
+    """
+    creditors = [(-cents, name) for name, cents in balances.items() if cents > 0]
+    debtors = [(cents, name) for name, cents in balances.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        cents = min(-credit, -debt)
+        transfers.append(Transfer(debtor, creditor, cents))
+        if -credit > cents:
+            heapq.heappush(creditors, (credit + cents, creditor))
+        if -debt > cents:
+            heapq.heappush(debtors, (debt + cents, debtor))
+    return transfers
+
+
+def exact_transfers(balances: dict[str, int], deadline: float = float("inf")) -> Optional[list[Transfer]]:
+    """
+    The fewest transfers that settle the balances, or None past the deadline.
+
+    The minimum is (members with a balance) minus (the most groups they can
+    be split into that each sum to zero), so a dynamic program over subsets
+    finds that partition, and each group settles greedily in size - 1
+    transfers. O(2^n * n) in the number of non-zero balances.
+    """
+    names = [name for name, cents in balances.items() if cents]
+    values = [balances[name] for name in names]
+    full = (1 << len(names)) - 1
+    sums = [0] * (full + 1)
+    groups = [0] * (full + 1)
+    last = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        if not mask & 0xFFF and time.perf_counter() > deadline:
+            return None
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + values[low.bit_length() - 1]
+        best, pick, rest = -1, 0, mask
+        while rest:
+            bit = rest & -rest
+            rest ^= bit
+            if groups[mask ^ bit] > best:
+                best, pick = groups[mask ^ bit], bit
+        groups[mask] = best + (sums[mask] == 0)
+        last[mask] = pick
+
+    # Walk back to the order members were added in; zero-sum prefixes close a group
+    order, mask = [], full
+    while mask:
+        order.append(last[mask].bit_length() - 1)
+        mask ^= last[mask]
+    transfers, group, running = [], {}, 0
+    for position in reversed(order):
+        group[names[position]] = values[position]
+        running += values[position]
+        if running == 0:
+            transfers += greedy_transfers(group)
+            group = {}
+    return transfers
+
+
+def settle_up(balances: dict[str, int], exact_limit: int = EXACT_LIMIT,
+              time_budget: float = TIME_BUDGET) -> list[Transfer]:
+    """
+    Payments that clear the balances.
+
+    Small groups get the exact minimum; groups above exact_limit members
+    with a balance, or that run out of time_budget, get the greedy plan.
+    """
+    if sum(1 for cents in balances.values() if cents) <= exact_limit:
+        transfers = exact_transfers(balances, time.perf_counter() + time_budget)
+        if transfers is not None:
+            return transfers
+    return greedy_transfers(balances)
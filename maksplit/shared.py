@@ -0,0 +1,256 @@
+import threading
+from collections import deque
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from maksplit.entry_store import EntryStore, RowState
+from maksplit.ledger import Ledger
+
+# Deltas kept for sessions catching up; a session further behind resyncs in full
+LOG_SIZE = 1024
+
+
+class Delta(NamedTuple):
+    """One change to a room, as broadcast to the sessions viewing it."""
+    version: int
+    origin: str
+    kind: str  # "row", "append", "delete" or "members"
+    row_ids: tuple[int, ...] = ()
+    name: str = ""
+
+
+class MemberState(NamedTuple):
+    """A temporary member's column, to put it back after removing them."""
+    name: str
+    rows: tuple[int, ...]  # ids of the rows they were ticked on
+    weights: tuple[tuple[int, int], ...]  # (row id, weight) where the weight was not 1
+    paid: tuple[int, ...]  # ids of the rows they paid for
+
+
+class Room:
+    """
+    The entries, ledger and temporary members of one receipt.
+
+    Every change goes through a method here, which updates the store and the
+    ledger under the room's lock and logs a Delta. A browser session edits
+    its own room; in shared mode several sessions hold the same room and
+    replay each other's deltas onto their widget state with changes_since().
+    """
+
+    def __init__(self, entries: EntryStore, temp_members: Iterable[str] = ()):
+        self.entries = entries
+        self.temp_members = list(temp_members)
+        self.ledger = Ledger.from_store(entries)
+        self.version = 0
+        self.lock = threading.RLock()
+        self._log: deque[Delta] = deque(maxlen=LOG_SIZE)
+
+    @classmethod
+    def new(cls, names: Iterable[str]) -> "Room":
+        """An empty receipt with one blank row."""
+        entries = EntryStore(names)
+        entries.append()
+        return cls(entries)
+
+    def _publish(self, origin: str, kind: str, row_ids: Iterable[int] = (), name: str = ""):
+        self.version += 1
+        self._log.append(Delta(self.version, origin, kind, tuple(row_ids), name))
+
+    def changes_since(self, version: int) -> Optional[list[Delta]]:
+        """Deltas after `version`, or None if they are no longer all in the log."""
+        with self.lock:
+            if version == self.version:
+                return []
+            if not self._log or self._log[0].version > version + 1:
+                return None
+            return [delta for delta in self._log if delta.version > version]
+
+    def _index(self, row_id: int) -> Optional[int]:
+        try:
+            return self.entries.index_of(row_id)
+        except KeyError:
+            # Deleted by another session since this one last rendered it
+            return None
+
+    def set_row(self, row_id: int, cost: str, selected: Iterable[str], origin: str = "") -> bool:
+        """Replace a row's cost and ticks; False if the row is gone."""
+        with self.lock:
+            index = self._index(row_id)
+            if index is None:
+                return False
+            entries = self.entries
+            old = entries.contribution(index)
+            selected = set(selected)
+            entries.set_cost(index, cost)
+            for name in entries.names:
+                entries.set_flag(index, name, name in selected)
+            self.ledger.replace(old, entries.contribution(index))
+            self._publish(origin, "row", (row_id,))
+            return True
+
+    def set_flag(self, row_id: int, name: str, value: bool, origin: str = "") -> bool:
+        """Tick or untick one member on a row; False if nothing changed."""
+        with self.lock:
+            index = self._index(row_id)
+            if index is None or name not in self.entries.names or self.entries.flag(index, name) == value:
+                return False
+            old = self.entries.contribution(index)
+            self.entries.set_flag(index, name, value)
+            self.ledger.replace(old, self.entries.contribution(index))
+            self._publish(origin, "row", (row_id,))
+            return True
+
+    def set_split(self, row_id: int, weights: dict[str, int], tax_rate: int, origin: str = "") -> bool:
+        """Set a row's split weights (empty for an equal split) and item tax rate."""
+        with self.lock:
+            index = self._index(row_id)
+            if index is None:
+                return False
+            old = self.entries.contribution(index)
+            self.entries.set_weights(index, weights)
+            self.entries.set_tax_rate(index, tax_rate)
+            self.ledger.replace(old, self.entries.contribution(index))
+            self._publish(origin, "row", (row_id,))
+            return True
+
+    def set_payer(self, row_id: int, payer: str, origin: str = "") -> bool:
+        """Record who paid for a row ("" for whoever paid the bill)."""
+        with self.lock:
+            index = self._index(row_id)
+            if index is None or self.entries.payers[index] == payer:
+                return False
+            self.entries.set_payer(index, payer)
+            self._publish(origin, "row", (row_id,))
+            return True
+
+    def append_row(self, origin: str = "") -> int:
+        """Add a blank row at the end and return its id."""
+        with self.lock:
+            row_id = self.entries.ids[self.entries.append()]
+            self._publish(origin, "append", (row_id,))
+            return row_id
+
+    def delete_rows(self, row_ids: Iterable[int], origin: str = "") -> list[int]:
+        """Delete rows by id, keeping at least one row; returns the ids removed."""
+        with self.lock:
+            indices = [index for index in map(self._index, row_ids) if index is not None]
+            if not indices:
+                return []
+            for index in indices:
+                self.ledger.retract(*self.entries.contribution(index))
+            removed = self.entries.delete(indices)
+            if not len(self.entries):
+                self.entries.append()
+            self._publish(origin, "delete", removed)
+            return removed
+
+    def import_rows(self, costs: list[str], selected: list[Iterable[str]], origin: str = "") -> list[int]:
+        """
+        Append many rows in one batch, keeping a blank row at the end.
+
+        Trailing blank rows are replaced by the import; their ids are returned.
+        """
+        with self.lock:
+            entries = self.entries
+            row_count = len(entries)
+            blank_start = row_count
+            while blank_start > 0 and not entries.costs[blank_start - 1].strip():
+                blank_start -= 1
+            removed = entries.delete(range(blank_start, row_count)) if blank_start < row_count else []
+            entries.extend(costs, selected)
+            entries.append()
+            self.ledger = Ledger.from_store(entries)
+            self._publish(origin, "delete", removed)
+            return removed
+
+    def row_states(self, row_ids: Iterable[int]) -> list[RowState]:
+        """The current state of the rows that still exist."""
+        with self.lock:
+            indices = [index for index in map(self._index, row_ids) if index is not None]
+            return [self.entries.row_state(index) for index in indices]
+
+    def restore_rows(self, states: Iterable[RowState], origin: str = "") -> list[int]:
+        """Put rows that still exist back to an earlier state; returns their ids."""
+        with self.lock:
+            restored = []
+            for state in states:
+                index = self._index(state.row_id)
+                if index is None:
+                    continue
+                old = self.entries.contribution(index)
+                self.entries.set_row_state(index, state)
+                self.ledger.replace(old, self.entries.contribution(index))
+                restored.append(state.row_id)
+            if restored:
+                self._publish(origin, "row", restored)
+            return restored
+
+    def insert_rows(self, states: list[RowState], origin: str = "") -> list[int]:
+        """Put deleted rows back where they were; returns their ids."""
+        with self.lock:
+            states = [state for state in states if self._index(state.row_id) is None]
+            if not states:
+                return []
+            self.entries.insert_rows(states)
+            for state in states:
+                self.ledger.post(*self.entries.contribution(self.entries.index_of(state.row_id)))
+            row_ids = [state.row_id for state in states]
+            self._publish(origin, "append", row_ids)
+            return row_ids
+
+    def member_state(self, name: str) -> MemberState:
+        with self.lock:
+            entries = self.entries
+            col = entries.names.index(name)
+            return MemberState(
+                name,
+                tuple(entries.ids[index] for index in np.flatnonzero(entries.mask[:, col])),
+                tuple((entries.ids[index], int(entries.weights[index, col]))
+                      for index in np.flatnonzero(entries.weights[:, col] != 1)),
+                tuple(row_id for row_id, payer in zip(entries.ids, entries.payers) if payer == name),
+            )
+
+    def restore_member(self, state: MemberState, origin: str = "") -> bool:
+        """Bring back a removed temporary member (as the last one) with their ticks, weights and payments."""
+        with self.lock:
+            if not self.add_member(state.name, origin):
+                return False
+            entries = self.entries
+            for row_id in state.rows:
+                index = self._index(row_id)
+                if index is not None:
+                    entries.set_flag(index, state.name, True)
+            col = entries.names.index(state.name)
+            for row_id, weight in state.weights:
+                index = self._index(row_id)
+                if index is not None:
+                    entries.weights[index, col] = weight
+            for row_id in state.paid:
+                index = self._index(row_id)
+                if index is not None:
+                    entries.set_payer(index, state.name)
+            self.ledger = Ledger.from_store(entries)
+            return True
+
+    def add_member(self, name: str, origin: str = "") -> bool:
+        """Add a temporary member as an empty column; False if the name is taken."""
+        with self.lock:
+            if name in self.entries.names:
+                return False
+            self.temp_members.append(name)
+            self.entries.add_member(name)
+            self.ledger.add_member(name)
+            self._publish(origin, "members", name=name)
+            return True
+
+    def remove_member(self, name: str, origin: str = "") -> bool:
+        """Drop a temporary member and their ticks."""
+        with self.lock:
+            if name not in self.temp_members:
+                return False
+            self.temp_members.remove(name)
+            self.entries.remove_member(name)
+            self.ledger = Ledger.from_store(self.entries)
+            self._publish(origin, "members", name=name)
+            return True
@@ -0,0 +1,191 @@
+import json
+import sqlite3
+import struct
+import threading
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from maksplit.entry_store import EntryStore
+
+# Settings saved alongside the rows, with their defaults
+SETTINGS = {"show_tax": False, "show_delivery": False, "tax_amount": "", "delivery_amount": ""}
+
+# Row edits kept in the log before they are folded into a fresh snapshot
+COMPACT_AFTER = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (session TEXT PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS ops (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ops_session ON ops (session, id);
+CREATE TABLE IF NOT EXISTS trips (session TEXT PRIMARY KEY, data TEXT NOT NULL);
+"""
+
+
+@dataclass
+class SessionSnapshot:
+    """Everything needed to bring a session back: the rows, members and extras."""
+    entries: EntryStore
+    temp_members: list[str] = field(default_factory=list)
+    settings: dict = field(default_factory=lambda: dict(SETTINGS))
+
+
+def encode_snapshot(snapshot: SessionSnapshot) -> bytes:
+    """
+    Pack a snapshot as a compressed blob.
+
+    The blob is a length-prefixed JSON header (names, row ids, members,
+    settings, cost strings, payers, and the uneven weights and item tax rates
+    as sparse [row, ...] lists) followed by the selection matrix packed eight
+    ticks to a byte.
+    """
+    store = snapshot.entries
+    weights = store.weights
+    tax_rates = store.tax_rates
+    header = json.dumps({
+        "names": store.names,
+        "ids": store.ids,
+        "temp_members": snapshot.temp_members,
+        "settings": snapshot.settings,
+        "costs": store.costs,
+        "payers": store.payers,
+        "weights": [[int(row), int(col), int(weights[row, col])] for row, col in np.argwhere(weights != 1)],
+        "tax_rates": [[int(row), int(tax_rates[row])] for row in np.flatnonzero(tax_rates)],
+    }, separators=(",", ":")).encode()
+    return zlib.compress(struct.pack("<I", len(header)) + header + np.packbits(store.mask).tobytes())
+
+
+def decode_snapshot(blob: bytes) -> SessionSnapshot:
+    raw = zlib.decompress(blob)
+    (length,) = struct.unpack_from("<I", raw)
+    header = json.loads(raw[4:4 + length])
+    shape = (len(header["costs"]), len(header["names"]))
+    bits = np.frombuffer(raw, dtype=np.uint8, offset=4 + length)
+    mask = np.unpackbits(bits, count=shape[0] * shape[1]).reshape(shape).astype(bool)
+    weights = np.ones(shape, dtype=np.int64)
+    for row, col, weight in header.get("weights", ()):
+        weights[row, col] = weight
+    tax_rates = np.zeros(shape[0], dtype=np.int64)
+    for row, rate in header.get("tax_rates", ()):
+        tax_rates[row] = rate
+    return SessionSnapshot(
+        EntryStore.from_mask(header["names"], header["costs"], mask, header.get("ids"), header.get("payers"),
+                             weights, tax_rates),
+        header["temp_members"],
+        {**SETTINGS, **header["settings"]},
+    )
+
+
+def _set_row(store: EntryStore, row_id: int, cost: str, selected: list[str], payer: str = "",
+             weights: Optional[dict] = None, tax_rate: int = 0):
+    try:
+        index = store.index_of(row_id)
+    except KeyError:
+        index = store.append(row_id=row_id)
+    store.set_cost(index, cost)
+    store.set_payer(index, payer if payer in store.names else "")
+    store.set_weights(index, {name: weight for name, weight in (weights or {}).items() if name in store.names})
+    store.set_tax_rate(index, tax_rate)
+    for name in store.names:
+        store.set_flag(index, name, name in selected)
+
+
+class SnapshotStore:
+    """
+    Session snapshots in a local SQLite file.
+
+    A session is a full snapshot plus an append-only log of row edits and
+    setting changes since it was taken, so autosaving a single edit is one
+    small insert. Structural changes (deletes, imports, member changes) and
+    long logs are folded into a new snapshot, which clears the log.
+    """
+
+    def __init__(self, path):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def save(self, session: str, snapshot: SessionSnapshot):
+        """Write a full snapshot and drop the log it supersedes."""
+        blob = encode_snapshot(snapshot)
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("INSERT OR REPLACE INTO snapshots (session, data) VALUES (?, ?)", (session, blob))
+            self._db.execute("DELETE FROM ops WHERE session = ?", (session,))
+            self._db.execute("COMMIT")
+
+    def _append(self, session: str, kind: str, data) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO ops (session, kind, data) VALUES (?, ?, ?)",
+                (session, kind, json.dumps(data, separators=(",", ":"))),
+            )
+            return cursor.lastrowid
+
+    def append_row(self, session: str, row_id: int, cost: str, selected, payer: str = "",
+                   weights: Optional[dict] = None, tax_rate: int = 0) -> int:
+        """Log one row's new cost, ticks, payer, uneven weights and tax rate; returns the log position."""
+        return self._append(session, "row", [row_id, cost, list(selected), payer, weights or {}, tax_rate])
+
+    def append_settings(self, session: str, settings: dict) -> int:
+        """Log new tax/delivery settings; returns the log position."""
+        return self._append(session, "settings", settings)
+
+    def pending(self, session: str) -> int:
+        """Number of logged changes since the last snapshot."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM ops WHERE session = ?", (session,)).fetchone()[0]
+
+    def load(self, session: str) -> Optional[SessionSnapshot]:
+        """Rebuild a session from its snapshot and log, or None if it was never saved."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM snapshots WHERE session = ?", (session,)).fetchone()
+            ops = self._db.execute("SELECT kind, data FROM ops WHERE session = ? ORDER BY id", (session,)).fetchall()
+        if row is None:
+            return None
+        snapshot = decode_snapshot(row[0])
+        for kind, data in ops:
+            data = json.loads(data)
+            if kind == "row":
+                _set_row(snapshot.entries, *data)
+            elif kind == "settings":
+                snapshot.settings.update(data)
+        return snapshot
+
+    def delete(self, session: str):
+        """Forget a session's snapshot and log."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM snapshots WHERE session = ?", (session,))
+            self._db.execute("DELETE FROM ops WHERE session = ?", (session,))
+            self._db.execute("COMMIT")
+
+    def save_trip(self, session: str, receipts: list[tuple[str, str]], active: int):
+        """Record a trip's receipts as (key, name) pairs, and which one is open."""
+        data = json.dumps({"receipts": receipts, "active": active}, separators=(",", ":"))
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO trips (session, data) VALUES (?, ?)", (session, data))
+
+    def load_trip(self, session: str) -> Optional[tuple[list[tuple[str, str]], int]]:
+        """A trip's (key, name) receipt pairs and open receipt, or None for a single-receipt session."""
+        with self._lock:
+            row = self._db.execute("SELECT data FROM trips WHERE session = ?", (session,)).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        return [tuple(pair) for pair in data["receipts"]], data["active"]
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,77 @@
+from decimal import Decimal
+from typing import Optional
+
+from maksplit.cents import allocate
+from maksplit.ledger import cents_of, parse_cost
+
+_CENT = Decimal('0.01')
+
+# Arithmetic engines behind compute_totals()
+ENGINES = ("cents", "decimal")
+
+
+def parse_extra(value: str) -> Decimal:
+    """Parse a tax or delivery amount; blank, invalid or negative values count as 0."""
+    amount = parse_cost(value)
+    return Decimal('0') if amount is None else amount
+
+
+def decimal_totals(subtotals: dict[str, Decimal], tax: Decimal, delivery: Decimal,
+                   item_tax: Optional[dict[str, int]] = None) -> tuple[dict, dict, float, float]:
+    """
+    Add pro-rata tax and delivery, and any per-item tax, to Decimal subtotals.
+
+    Returns (totals, subtotals, tax, delivery) as floats rounded to the cent,
+    the calculate_totals() contract, with item tax counted in tax. Each
+    figure is rounded on its own, so the per-person totals may not add up to
+    the grand total.
+    """
+    grand_subtotal = sum(subtotals.values())
+    extras = tax + delivery
+    totals = dict(subtotals)
+    if extras > 0 and grand_subtotal > 0:
+        for name, subtotal in subtotals.items():
+            proportion = subtotal / grand_subtotal
+            totals[name] = subtotal + extras * proportion
+    if item_tax:
+        for name, cents in item_tax.items():
+            totals[name] += Decimal(cents).scaleb(-2)
+        tax += Decimal(sum(item_tax.values())).scaleb(-2)
+
+    result_totals = {k: float(v.quantize(_CENT)) for k, v in totals.items()}
+    result_subtotals = {k: float(v.quantize(_CENT)) for k, v in subtotals.items()}
+    return result_totals, result_subtotals, float(tax.quantize(_CENT)), float(delivery.quantize(_CENT))
+
+
+def cents_totals(subtotals: dict[str, int], tax: int, delivery: int,
+                 item_tax: Optional[dict[str, int]] = None) -> tuple[dict, dict, float, float]:
+    """
+    Add pro-rata tax and delivery, and any per-item tax, to whole-cent subtotals.
+
+    Same contract as decimal_totals(), but the extras are shared out with a
+    largest-remainder allocation, so the per-person totals always add up to
+    the subtotal plus extras to the cent.
+    """
+    names = list(subtotals)
+    item_tax = item_tax or {}
+    extras = allocate(tax + delivery, [subtotals[name] for name in names])
+    result_totals = {
+        name: (subtotals[name] + item_tax.get(name, 0) + extra) / 100 for name, extra in zip(names, extras)
+    }
+    tax += sum(item_tax.values())
+    result_subtotals = {name: cents / 100 for name, cents in subtotals.items()}
+    return result_totals, result_subtotals, tax / 100, delivery / 100
+
+
+def compute_totals(source, tax: Decimal, delivery: Decimal, engine: str = "cents") -> tuple[dict, dict, float, float]:
+    """
+    Split a receipt's subtotals plus extras with the chosen engine.
+
+    source is anything with subtotals(), cents_subtotals() and
+    item_tax_cents(): a Ledger or an EntryStore.
+    """
+    if engine == "cents":
+        return cents_totals(source.cents_subtotals(), cents_of(tax), cents_of(delivery), source.item_tax_cents())
+    if engine == "decimal":
+        return decimal_totals(source.subtotals(), tax, delivery, source.item_tax_cents())
+    raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
@@ -0,0 +1,99 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from maksplit.history import History
+from maksplit.shared import Room
+from maksplit.snapshots import SETTINGS
+from maksplit.totals import compute_totals, parse_extra
+
+# Name of a trip's first receipt, and of a session that never added another
+FIRST_RECEIPT = "Receipt 1"
+
+
+@dataclass
+class Receipt:
+    """
+    One stop of a trip: its room, its own tax and delivery, and its undo history.
+
+    key tells its snapshot apart from the trip's other receipts ("" for the
+    first one, which keeps the session's own snapshot).
+    """
+    name: str
+    room: Room
+    settings: dict = field(default_factory=lambda: dict(SETTINGS))
+    key: str = ""
+    history: History = field(default_factory=History)
+    _cached: Optional[tuple] = field(default=None, repr=False)
+
+    def extras(self) -> tuple[Decimal, Decimal]:
+        """The tax and delivery to share out, 0 where they are switched off."""
+        settings = self.settings
+        tax = parse_extra(settings["tax_amount"]) if settings["show_tax"] else Decimal(0)
+        delivery = parse_extra(settings["delivery_amount"]) if settings["show_delivery"] else Decimal(0)
+        return tax, delivery
+
+    def totals(self, engine: str = "cents") -> tuple[dict, dict, float, float]:
+        """
+        compute_totals() of this receipt with its own extras.
+
+        Kept until the room's version or the settings change, so a receipt
+        nobody touched costs a tuple comparison. The result is shared: treat
+        it as read-only.
+        """
+        with self.room.lock:
+            key = (self.room.version, tuple(self.settings.items()), engine)
+            if self._cached is None or self._cached[0] != key:
+                self._cached = (key, compute_totals(self.room.ledger, *self.extras(), engine))
+            return self._cached[1]
+
+
+class Trip:
+    """
+    The receipts of one shopping trip and the one being edited.
+
+    Each receipt splits its own items and extras; totals() adds up what each
+    person owes across them from the receipts' cached totals, so a rerun
+    after one edit recomputes one receipt and sums the rest, whatever their
+    length.
+    """
+
+    def __init__(self, receipts: Iterable[Receipt], active: int = 0):
+        self.receipts = list(receipts)
+        self.active = min(max(active, 0), len(self.receipts) - 1)
+
+    def __len__(self) -> int:
+        return len(self.receipts)
+
+    @property
+    def active_receipt(self) -> Receipt:
+        return self.receipts[self.active]
+
+    def add(self, receipt: Receipt) -> int:
+        """Append a receipt; returns its position."""
+        self.receipts.append(receipt)
+        return len(self.receipts) - 1
+
+    def remove(self, index: int) -> Receipt:
+        """Drop a receipt (never the last one left), keeping the same one active if it stays."""
+        if len(self.receipts) == 1:
+            raise ValueError("a trip keeps at least one receipt")
+        receipt = self.receipts.pop(index)
+        if index < self.active or self.active == len(self.receipts):
+            self.active -= 1
+        return receipt
+
+    def totals(self, engine: str = "cents") -> tuple[dict[str, float], list[tuple[str, dict[str, float]]]]:
+        """
+        (per-person totals for the whole trip, [(receipt name, its per-person totals)]).
+
+        People who are on only some receipts (temporary members) owe nothing
+        on the others. Totals are added up in whole cents so the trip figures
+        agree with the receipts' to the cent.
+        """
+        per_receipt = [(receipt.name, receipt.totals(engine)[0]) for receipt in self.receipts]
+        cents: dict[str, int] = {}
+        for _, totals in per_receipt:
+            for name, amount in totals.items():
+                cents[name] = cents.get(name, 0) + round(amount * 100)
+        return {name: amount / 100 for name, amount in cents.items()}, per_receipt
@@ -1,6 +1,29 @@
 import streamlit as st
-import pandas as pd
-from decimal import Decimal, InvalidOperation
+from streamlit.errors import StreamlitAPIException
+from decimal import Decimal
+from typing import Optional
+import io
+import os
+import sqlite3
+import uuid
+from maksplit.bulk_import import decode_lines, parse_lines, parse_upload
+from maksplit.cards import card_cache_stats, render_cards
+from maksplit.cents import TAX_RATE_SCALE, item_shares, weighted_shares
+from maksplit.export import FORMATS, MIME_TYPES, Split, available_formats, write_items, write_people
+from maksplit.grid import GRID_WINDOW_AFTER, GRID_WINDOW_BEFORE, grid_window, summarize_rows
+from maksplit.history import HISTORY_SIZE, Change, History, replay
+from maksplit.ledger import cents_of, check_cost, parse_cost
+from maksplit.metrics import MetricsRegistry, RerunMetrics, deep_size, format_table
+from maksplit.quick_entry import BASE_NAMES, token_table
+from maksplit.receipt_text import parse_receipt
+from maksplit.settle import net_balances, paid_cents, settle_up
+from maksplit.shared import Room
+from maksplit.snapshots import COMPACT_AFTER, SETTINGS, SessionSnapshot, SnapshotStore
+from maksplit.totals import parse_extra
+from maksplit.trip import FIRST_RECEIPT, Receipt, Trip
+
+# Phase timings of this run, recorded at the end of the script
+run_metrics = RerunMetrics()
 
 # Configure Streamlit page settings
 st.set_page_config(
@@ -10,104 +33,118 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Initialize temporary members in session state
-if "temp_members" not in st.session_state:
-    st.session_state.temp_members = []
+# Sessions are autosaved here and restored from the ?session= id in the URL
+SNAPSHOT_PATH = os.environ.get("MAKSPLIT_SNAPSHOTS", ".maksplit/snapshots.sqlite3")
+# Sessions opened with ?room=<name> share one receipt and check it for edits this often (seconds)
+ROOM_POLL_SECONDS = 1.0
+# Rerun latencies are written here in the Prometheus text format, if set
+METRICS_PATH = os.environ.get("MAKSPLIT_METRICS", "")
+METRICS_WRITE_SECONDS = 10.0
+# Changes each session can undo
+UNDO_HISTORY = int(os.environ.get("MAKSPLIT_HISTORY", HISTORY_SIZE))
+
+@st.cache_resource
+def snapshot_store():
+    """The shared snapshot database, or None if it cannot be opened."""
+    try:
+        return SnapshotStore(SNAPSHOT_PATH)
+    except (OSError, sqlite3.Error):
+        return None
+
+@st.cache_resource
+def shared_room(room_id: str) -> Room:
+    """The receipt every session opened with ?room=room_id edits."""
+    store = snapshot_store()
+    snapshot = store.load(f"room:{room_id}") if store else None
+    if snapshot is None:
+        return Room.new(BASE_NAMES)
+    return Room(snapshot.entries, snapshot.temp_members)
+
+@st.cache_resource
+def metrics_registry() -> MetricsRegistry:
+    """Rerun latencies of every session on this server."""
+    return MetricsRegistry()
+
+def snapshot_key(receipt: Optional[Receipt] = None) -> str:
+    """Where this session autosaves a receipt (the open one by default): its room's snapshot, or its own."""
+    room_id = st.session_state.room_id
+    if room_id:
+        return f"room:{room_id}"
+    receipt = receipt or st.session_state.trip.active_receipt
+    session_id = st.session_state.session_id
+    return f"{session_id}#{receipt.key}" if receipt.key else session_id
+
+def restore_trip() -> Trip:
+    """Load this browser session's receipts, or start a trip with one empty receipt."""
+    store = snapshot_store()
+    session_id = st.session_state.session_id
+    saved = store.load_trip(session_id) if store else None
+    pairs, active = saved or ([("", FIRST_RECEIPT)], 0)
+    receipts = []
+    for key, name in pairs:
+        snapshot = store.load(f"{session_id}#{key}" if key else session_id) if store else None
+        if snapshot is None:
+            receipts.append(Receipt(name, Room.new(BASE_NAMES), key=key, history=History(UNDO_HISTORY)))
+        else:
+            receipts.append(Receipt(name, Room(snapshot.entries, snapshot.temp_members), snapshot.settings,
+                                    key, History(UNDO_HISTORY)))
+    return Trip(receipts, active)
+
+def open_receipt(receipt: Receipt):
+    """Make a receipt the one the page edits: its room, undo history and extras"""
+    room = receipt.room
+    st.session_state.room = room
+    st.session_state.history = receipt.history
+    st.session_state.update(receipt.settings)
+    st.session_state.room_version = room.version
+    st.session_state.active_index = len(room.entries) - 1
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = st.query_params.get("session") or uuid.uuid4().hex
+    st.query_params["session"] = st.session_state.session_id
+    st.session_state.room_id = st.query_params.get("room", "")
+    # ?debug=1 shows the rerun timings panel at the bottom of the page
+    st.session_state.debug = st.query_params.get("debug", "") not in ("", "0") or bool(os.environ.get("MAKSPLIT_DEBUG"))
+
+# A trip holds one or more receipts, each a room with the entries, ledger
+# and temporary members; shared rooms are the same object in every session
+# that joined them, and stay a single receipt
+if "trip" not in st.session_state:
+    with run_metrics.phase("restore"):
+        if st.session_state.room_id:
+            room = shared_room(st.session_state.room_id)
+        else:
+            # A room handed in before the first run (the benchmarks preload one)
+            room = st.session_state.get("room")
+        if room is not None:
+            trip = Trip([Receipt(FIRST_RECEIPT, room, history=History(UNDO_HISTORY))])
+        else:
+            trip = restore_trip()
+        st.session_state.trip = trip
+        open_receipt(trip.active_receipt)
+
+# Shorthands for the room's rows and temporary members (the workspace swaps
+# in a copy of them while it renders)
+st.session_state.entries = st.session_state.room.entries
+st.session_state.temp_members = st.session_state.room.temp_members
 
 # Get the appropriate names based on the state
 def get_names():
-    base_names = ["MS", "AD", "RS"]
-    return base_names + st.session_state.temp_members
+    return BASE_NAMES + st.session_state.temp_members
 
-# Custom CSS for better alignment and to hide default menu items
+# Styles and the GitHub logo are static files the browser fetches once and
+# caches, so reruns only send the two short tags below
 st.markdown("""
-    <style>
-    .stTextInput > label { display: none; }
-    .stCheckbox { margin-top: 0px !important; }
-    .stCheckbox > label { font-size: 0.9rem; }
-    div[data-testid="column"] { gap: 0rem; }
-    /* Reduce spacing between rows */
-    .row-widget { margin-bottom: -1rem; }
-    
-    /* Reduce main container padding for wider layout */
-    .main .block-container {
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-        padding-left: 1rem;
-        padding-right: 1rem;
-        max-width: 100%;
-    }
-    
-    /* Ensure columns have proper spacing */
-    .stColumns > div {
-        padding: 0 0.5rem;
-    }
-    
-    /* Hide all default menu items */
-    #MainMenu {visibility: hidden;}
-    header {visibility: hidden;}
-    footer {visibility: hidden;}
-    [data-testid="stToolbar"] {visibility: hidden;}
-    
-    /* Retro-style GitHub button */
-    .custom-github-btn {
-        position: fixed;
-        right: 1rem;
-        top: 1rem;
-        padding: 0.7rem 1.2rem;
-        background: #ffd700;
-        color: #000000;
-        border-radius: 0;
-        text-decoration: none;
-        display: flex;
-        align-items: center;
-        gap: 0.7rem;
-        font-size: 0.8rem;
-        font-family: 'Press Start 2P', monospace;
-        text-transform: uppercase;
-        border: 3px solid #000000;
-        box-shadow: 4px 4px 0px #000000;
-        transition: all 0.1s ease;
-        z-index: 1000;
-    }
-    
-    .custom-github-btn:hover {
-        transform: translate(2px, 2px);
-        box-shadow: 2px 2px 0px #000000;
-        background: #ffed4a;
-    }
-    
-    .custom-github-btn:active {
-        transform: translate(4px, 4px);
-        box-shadow: 0px 0px 0px #000000;
-    }
-
-    .github-logo {
-        width: 20px;
-        height: 20px;
-        display: inline-block;
-    }
-    </style>
-    
-    <!-- Import Google Font -->
-    <link href="https://fonts.googleapis.com/css2?family=Press+Start+2P&display=swap" rel="stylesheet">
-    
-    <!-- Custom GitHub button -->
+    <style>@import url("app/static/app.css");</style>
     <a href="https://www.linkedin.com/posts/saifeemustafa_shopping-expense-splitter-activity-7284066826970435584-A-Kj" 
        target="_blank" 
        class="custom-github-btn">
         Fork this app
-        <svg class="github-logo" viewBox="0 0 24 24" fill="#000000">
-            <path d="M12 0c-6.626 0-12 5.373-12 12 0 5.302 3.438 9.8 8.207 11.387.599.111.793-.261.793-.577v-2.234c-3.338.726-4.033-1.416-4.033-1.416-.546-1.387-1.333-1.756-1.333-1.756-1.089-.745.083-.729.083-.729 1.205.084 1.839 1.237 1.839 1.237 1.07 1.834 2.807 1.304 3.492.997.107-.775.418-1.305.762-1.604-2.665-.305-5.467-1.334-5.467-5.931 0-1.311.469-2.381 1.236-3.221-.124-.303-.535-1.524.117-3.176 0 0 1.008-.322 3.301 1.23.957-.266 1.983-.399 3.003-.404 1.02.005 2.047.138 3.006.404 2.291-1.552 3.297-1.23 3.297-1.23.653 1.653.242 2.874.118 3.176.77.84 1.235 1.911 1.235 3.221 0 4.609-2.807 5.624-5.479 5.921.43.372.823 1.102.823 2.222v3.293c0 .319.192.694.801.576 4.765-1.589 8.199-6.086 8.199-11.386 0-6.627-5.373-12-12-12z"/>
-        </svg>
+        <img class="github-logo" src="app/static/github.svg" alt="">
     </a>
 """, unsafe_allow_html=True)
 
 # Initialize session state more efficiently
-if "entries" not in st.session_state:
-    st.session_state.entries = [{"cost": "", **{name: False for name in get_names()}}]
-if "last_entry_count" not in st.session_state:
-    st.session_state.last_entry_count = 1
 if "active_index" not in st.session_state:
     st.session_state.active_index = 0
 if "show_tax" not in st.session_state:
@@ -119,6 +156,61 @@ if "tax_amount" not in st.session_state:
 if "delivery_amount" not in st.session_state:
     st.session_state.delivery_amount = ""
 
+def autosave():
+    """Snapshot the whole session (after deletes, imports and member changes)."""
+    store = snapshot_store()
+    if store:
+        # From the room itself: the session's entries are the copy the workspace last rendered
+        room = st.session_state.room
+        with room.lock:
+            entries, temp_members = room.entries.copy(), list(room.temp_members)
+        store.save(snapshot_key(), SessionSnapshot(
+            entries, temp_members, {key: st.session_state[key] for key in SETTINGS},
+        ))
+
+def autosave_row(row_id: int):
+    """Log one edited row, folding the log into a snapshot once it grows long."""
+    store = snapshot_store()
+    if store:
+        room = st.session_state.room
+        with room.lock:
+            index = room.entries.index_of(row_id)
+            entries = room.entries
+            store.append_row(snapshot_key(), row_id, entries.costs[index], entries.selected(index),
+                             entries.payers[index], entries.split_weights(index), entries.tax_rate(index))
+        if store.pending(snapshot_key()) > COMPACT_AFTER:
+            autosave()
+
+def autosave_settings():
+    """Log the current tax and delivery settings."""
+    store = snapshot_store()
+    if store:
+        store.append_settings(snapshot_key(), {key: st.session_state[key] for key in SETTINGS})
+
+# Start each session from a full snapshot, so logged row edits have a base to replay onto
+if "snapshot_saved" not in st.session_state:
+    st.session_state.snapshot_saved = True
+    autosave()
+
+def sync_room():
+    """Drop the widget state of rows and members other sessions changed, so it re-seeds"""
+    room = st.session_state.room
+    changes = room.changes_since(st.session_state.room_version)
+    if changes is None:
+        # Too far behind for the room's log: re-seed every row
+        drop_row_widgets(room.entries.ids)
+        st.session_state.room_version = room.version
+        return
+    for delta in changes:
+        if delta.origin == st.session_state.session_id:
+            continue
+        if delta.kind == "members":
+            drop_member_widgets(delta.name)
+        else:
+            drop_row_widgets(delta.row_ids)
+    if changes:
+        st.session_state.room_version = changes[-1].version
+
 def move_to_next_row(current_index):
     """Move focus to the next row's text input"""
     if current_index < len(st.session_state.entries) - 1:
@@ -131,111 +223,473 @@ def process_input_text(text: str) -> tuple[str, dict]:
     Process the input text to extract amount and determine which checkboxes should be ticked.
     Returns a tuple of (cleaned_amount, checkbox_states)
     """
-    # Initialize checkbox states
     names = get_names()
-    checkbox_states = {name: False for name in names}
-    
-    # Convert text to lowercase for case-insensitive matching
-    text_lower = text.lower()
-    
-    # Check for special characters
-    if 'm' in text_lower:
-        checkbox_states["MS"] = True
-    if 'r' in text_lower:
-        checkbox_states["RS"] = True
-    if 'a' in text_lower:
-        checkbox_states["AD"] = True
-    
-    # Extract numbers from the text
-    cleaned_amount = ''.join(c for c in text if c.isdigit() or c == '.' or c == '-')
-    
-    return cleaned_amount, checkbox_states
+    table = token_table(tuple(names))
+    amount, selected, ambiguous = table.parse(text)
+    for word in ambiguous:
+        st.toast(table.describe(word))
+    return amount, {name: name in selected for name in names}
 
-def handle_input_change(index: int):
+def handle_input_change(row_id: int):
     """Handle input changes and focus management"""
     # Get the current value from the input
-    current_value = st.session_state[f"cost_{index}"]
+    current_value = st.session_state[f"cost_{row_id}"]
     cleaned_amount, checkbox_states = process_input_text(current_value)
     
-    # Update the entry in the session state
-    st.session_state.entries[index]["cost"] = cleaned_amount
-    names = get_names()
-    for name in names:
-        st.session_state.entries[index][name] = checkbox_states[name]
-        st.session_state[f"{name}_{index}"] = checkbox_states[name]
+    # Update the entry in the room, unless another session deleted it meanwhile
+    selected = [name for name, ticked in checkbox_states.items() if ticked]
+    room = st.session_state.room
+    if record_rows([row_id], "edit an item", lambda: room.set_row(row_id, cleaned_amount, selected, st.session_state.session_id)):
+        for name, ticked in checkbox_states.items():
+            st.session_state[f"{name}_{row_id}"] = ticked
+        autosave_row(row_id)
 
-def handle_checkbox_change(index: int, name: str):
+def handle_checkbox_change(row_id: int, name: str):
     """Handle checkbox changes"""
     # Get the current checkbox value from the session state
-    checkbox_key = f"{name}_{index}"
+    checkbox_key = f"{name}_{row_id}"
     if checkbox_key in st.session_state:
-        st.session_state.entries[index][name] = st.session_state[checkbox_key]
+        set_entry_flag(row_id, name, st.session_state[checkbox_key])
+
+def set_entry_flag(row_id: int, name: str, value: bool):
+    """Tick or untick one member on a row, keeping the ledger in step"""
+    room = st.session_state.room
+    try:
+        if room.entries.flag(room.entries.index_of(row_id), name) == value:
+            return
+    except KeyError:
+        # The row or the member is gone
+        return
+    if record_rows([row_id], f"{'tick' if value else 'untick'} {name}",
+                   lambda: room.set_flag(row_id, name, value, st.session_state.session_id)):
+        autosave_row(row_id)
+
+def record_rows(row_ids: list[int], label: str, change) -> bool:
+    """Run change() on some rows, keeping their before and after states for undo"""
+    room = st.session_state.room
+    with room.lock:
+        before = room.row_states(row_ids)
+        changed = change()
+        if changed:
+            st.session_state.history.record(Change("rows", tuple(before), tuple(room.row_states(row_ids)), label))
+    return changed
+
+def delete_entries(row_ids: list[int]):
+    """Delete rows, retracting them from the ledger"""
+    room = st.session_state.room
+    with room.lock:
+        states = {state.row_id: state for state in room.row_states(row_ids)}
+        removed = room.delete_rows(row_ids, st.session_state.session_id)
+    if removed:
+        st.session_state.history.record(Change(
+            "delete", tuple(states[row_id] for row_id in removed), (),
+            f"delete {len(removed)} item{'s' if len(removed) > 1 else ''}",
+        ))
+    # Widgets are keyed by row id, so only the deleted rows' state goes
+    drop_row_widgets(removed)
+    autosave()
+
+def drop_row_widgets(row_ids: list[int]):
+    """Drop the widget state of removed rows"""
+    names = get_names()
+    # The split editor's inputs are keyed by member and split mode as well
+    split_prefixes = tuple(f"split_{row_id}_" for row_id in row_ids)
+    for key in [key for key in st.session_state if key.startswith(split_prefixes)]:
+        del st.session_state[key]
+    for row_id in row_ids:
+        st.session_state.pop(f"cost_{row_id}", None)
+        st.session_state.pop(f"delete_{row_id}", None)
+        st.session_state.pop(f"item_tax_{row_id}", None)
+        for name in names:
+            st.session_state.pop(f"{name}_{row_id}", None)
+
+def drop_member_widgets(name: str):
+    """Drop a removed member's checkbox and split editor state on every row"""
+    for row_id in st.session_state.entries.ids:
+        st.session_state.pop(f"{name}_{row_id}", None)
+    # Split editor inputs are keyed split_<row id>_<name>_<mode>, and no mode has a "_"
+    for key in [key for key in st.session_state if str(key).startswith("split_")
+                and str(key)[len("split_"):].partition("_")[2].rpartition("_")[0] == name]:
+        del st.session_state[key]
+
+def import_entries(result):
+    """Append bulk-imported rows in one batch, keeping a blank row at the end"""
+    room = st.session_state.room
+    with room.lock:
+        drop_row_widgets(room.import_rows(result.costs, result.selected, st.session_state.session_id))
+        # The imported rows sit just before the blank row the import keeps at the end
+        imported = room.entries.ids[len(room.entries) - 1 - len(result):-1]
+        st.session_state.history.record(Change(
+            "insert", (), tuple(room.row_states(imported)), f"import {len(result)} items",
+        ))
+    st.session_state.active_index = len(room.entries) - 1
+    autosave()
+
+def add_member(name: str):
+    """Add a temporary member as an empty column"""
+    if st.session_state.room.add_member(name, st.session_state.session_id):
+        st.session_state.history.record(Change("add_members", (), (name,), f"add {name}"))
+    autosave()
+
+def remove_members(names: list[str], label: str):
+    """Remove temporary members, keeping their columns for undo"""
+    room = st.session_state.room
+    with room.lock:
+        states = tuple(room.member_state(name) for name in names if name in room.temp_members)
+        for state in states:
+            drop_member_widgets(state.name)
+            room.remove_member(state.name, st.session_state.session_id)
+    if states:
+        st.session_state.history.record(Change("remove_members", states, (), label))
+    autosave()
+
+def settings() -> dict:
+    return {key: st.session_state[key] for key in SETTINGS}
+
+def record_settings(before: dict, label: str):
+    """Log the tax and delivery settings, keeping the change for undo"""
+    after = settings()
+    if after != before:
+        st.session_state.history.record(Change("settings", tuple(before.items()), tuple(after.items()), label))
+    autosave_settings()
+
+def save_trip():
+    """Record the trip's receipts, so a reload brings every one of them back"""
+    store = snapshot_store()
+    if store:
+        trip = st.session_state.trip
+        store.save_trip(st.session_state.session_id, [(r.key, r.name) for r in trip.receipts], trip.active)
+
+# Widget state tied to the open receipt's rows, besides what drop_row_widgets() clears
+RECEIPT_WIDGET_PREFIXES = ("split_", "item_tax_", "payers_", "tax_input", "delivery_input")
+
+def switch_receipt(index: int):
+    """Open another receipt of the trip, leaving the current one as it is"""
+    trip = st.session_state.trip
+    current = trip.active_receipt
+    current.settings = settings()
+    # Row ids start at 0 on every receipt, so none of this receipt's widget state may carry over
+    drop_row_widgets(current.room.entries.ids)
+    for key in [key for key in st.session_state if str(key).startswith(RECEIPT_WIDGET_PREFIXES)]:
+        del st.session_state[key]
+    trip.active = index
+    open_receipt(trip.active_receipt)
+    st.session_state.receipt = index
+    save_trip()
+
+def select_receipt():
+    switch_receipt(st.session_state.receipt)
+
+def add_receipt():
+    """Start a new, empty receipt on the trip and open it"""
+    trip = st.session_state.trip
+    name = st.session_state.new_receipt_input.strip() or f"Receipt {len(trip) + 1}"
+    st.session_state.new_receipt_input = ""
+    # The trip's active index must still point at the receipt being left
+    index = trip.add(Receipt(name, Room.new(BASE_NAMES), key=uuid.uuid4().hex[:8], history=History(UNDO_HISTORY)))
+    switch_receipt(index)
+    autosave()
+
+def remove_receipt():
+    """Drop the open receipt from the trip and open its neighbour"""
+    trip = st.session_state.trip
+    index = trip.active
+    receipt = trip.active_receipt
+    switch_receipt(index - 1 if index else 1)
+    trip.remove(index)
+    st.session_state.receipt = trip.active
+    save_trip()
+    store = snapshot_store()
+    if store:
+        store.delete(snapshot_key(receipt))
+
+def undo_redo(undo: bool) -> Optional[Change]:
+    """Revert the last change, or re-apply the last undone one"""
+    history = st.session_state.history
+    change = history.undo() if undo else history.redo()
+    if change is None:
+        return None
+    if change.kind == "settings":
+        st.session_state.update(dict(change.before if undo else change.after))
+        st.session_state.pop("tax_input", None)
+        st.session_state.pop("delivery_input", None)
+        autosave_settings()
+        return change
+    if change.kind == "add_members":
+        for name in change.after:
+            drop_member_widgets(name)
+    drop_row_widgets(replay(st.session_state.room, change, undo, st.session_state.session_id))
+    autosave()
+    return change
+
+def prefill_tax(amount: str):
+    """Show the tax input filled with a receipt's printed tax"""
+    before = settings()
+    st.session_state.show_tax = True
+    st.session_state.tax_amount = amount
+    # The input takes its value from tax_amount only when it has no state of its own
+    st.session_state.pop("tax_input", None)
+    record_settings(before, "fill in the receipt's tax")
 
 def handle_tax_input_change(widget_key: str):
+    before = settings()
     st.session_state.tax_amount = st.session_state[widget_key]
+    record_settings(before, "change the tax")
 
 def handle_delivery_input_change(widget_key: str):
+    before = settings()
     st.session_state.delivery_amount = st.session_state[widget_key]
+    record_settings(before, "change the delivery")
 
-def is_valid_number(value: str) -> bool:
-    """Validate if the input string is a valid positive number."""
-    if not value.strip():
-        return True
-    try:
-        num = Decimal(value)
-        return num >= 0
-    except InvalidOperation:
-        return False
+def show_amount_error(col, value: str):
+    """Say under an amount input why what was typed counts as $0"""
+    _, error = check_cost(value)
+    if error:
+        col.caption(f":red[{error}, counted as $0]")
+
+# Arithmetic behind calculate_totals(): "cents" splits in whole cents so the
+# totals always reconcile, "decimal" is the original Decimal path
+SPLIT_ENGINE = "cents"
 
 def calculate_totals():
     """Calculate split expenses with pro-rata tax and delivery."""
+    # Item subtotals are kept up to date by the ledger as rows change, and the
+    # receipt keeps its totals until its rows or extras change again
+    receipt = st.session_state.trip.active_receipt
+    receipt.settings = settings()
+    return receipt.totals(SPLIT_ENGINE)
+
+# How the uneven-split editor reads its numbers; each is stored as a weight in hundredths
+SPLIT_MODES = ["Shares", "Percent", "Fixed $"]
+
+def split_defaults(index: int, mode: str) -> list[str]:
+    """Current split of a row, shown in the editor's mode"""
+    entries = st.session_state.entries
+    cents, selected, weights, _ = entries.contribution(index)
+    if mode == "Fixed $":
+        shares = weighted_shares(cents, weights) if weights else item_shares(cents, len(selected))
+        return [f"{share / 100:.2f}" for share in shares]
+    if weights is None:
+        return ["1" if mode == "Shares" else f"{100 / len(selected):.2f}" for _ in selected]
+    if mode == "Shares":
+        return [f"{Decimal(weight).scaleb(-2).normalize():f}" for weight in weights]
+    return [f"{100 * weight / sum(weights):.2f}" for weight in weights]
+
+def render_split_editor():
+    """Edit one item's uneven split and item tax"""
+    with st.expander("⚖️ Uneven split or item tax"):
+        room = st.session_state.room
+        entries = st.session_state.entries
+        # Picked by number, so the payload stays one input however long the receipt is
+        row_count = len(entries)
+        # Rows may have been deleted since, here or on another device
+        if st.session_state.get("split_item", 1) > row_count:
+            st.session_state.pop("split_item", None)
+        active = min(st.session_state.active_index, row_count - 1)
+        if active and active == row_count - 1 and not entries.costs[active].strip():
+            # The blank row at the end: offer the last item instead
+            active -= 1
+        number = st.number_input(
+            "Item", min_value=1, max_value=row_count, step=1, key="split_item", value=active + 1,
+        )
+        index = number - 1
+        row_id = entries.ids[index]
+        selected = entries.selected(index)
+        if not entries.cents[index] or not selected:
+            st.caption(f"Item {number} needs a cost and someone ticked on it first.")
+            return
+        st.caption(f"Item {number}: ${entries.costs[index]}, shared by {', '.join(selected)}")
+        mode = st.radio("Split by", SPLIT_MODES, horizontal=True, key="split_mode")
+        values = {}
+        for col, name, default in zip(st.columns(len(selected)), selected, split_defaults(index, mode)):
+            values[name] = col.text_input(name, value=default, key=f"split_{row_id}_{name}_{mode}")
+        rate_text = st.text_input(
+            "Item tax %", key=f"item_tax_{row_id}",
+            value=f"{Decimal(entries.tax_rate(index)) / TAX_RATE_SCALE:f}" if entries.tax_rate(index) else "",
+        )
+
+        apply_col, even_col, _ = st.columns([1, 1, 2])
+        if apply_col.button("Apply", key="apply_split"):
+            amounts = {name: parse_cost(text) for name, text in values.items()}
+            rate = parse_extra(rate_text)
+            if None in amounts.values() or not any(amounts.values()):
+                st.error("Enter a number of at least 0 for everyone, and more than 0 for someone.")
+                return
+            if mode == "Percent" and sum(amounts.values()) != 100:
+                st.warning(f"Percentages add up to {sum(amounts.values())}%; splitting in proportion.")
+            if mode == "Fixed $" and cents_of(sum(amounts.values())) != entries.cents[index]:
+                st.warning("Amounts don't add up to the item cost; splitting in proportion.")
+            weights = {name: cents_of(amount) for name, amount in amounts.items()}
+            if record_rows([row_id], "split an item unevenly",
+                           lambda: room.set_split(row_id, weights, int(rate * TAX_RATE_SCALE), st.session_state.session_id)):
+                autosave_row(row_id)
+                rerun_workspace()
+        if even_col.button("Split evenly", key="reset_split"):
+            if record_rows([row_id], "split an item evenly",
+                           lambda: room.set_split(row_id, {}, entries.tax_rate(index), st.session_state.session_id)):
+                autosave_row(row_id)
+                rerun_workspace()
+
+def render_settlement(totals: dict):
+    """Show who pays whom, from the split and who paid for each item"""
+    with st.expander("💸 Settle up"):
+        names = get_names()
+        default_payer = st.selectbox("Who paid the bill?", names, key="default_payer")
+        room = st.session_state.room
+        entries = st.session_state.entries
+        items = [index for index in range(len(entries)) if entries.cents[index]]
+        # The per-item table is only built (and sent) when someone else paid for something
+        per_item = st.toggle("Someone else paid for some items", key="per_item_payers", value=any(entries.payers))
+        if items and per_item:
+            # Keyed on the listed rows, so edits never land on a row that moved
+            edited = st.data_editor(
+                [{"Item": f"Item {index + 1}", "Cost": entries.costs[index], "Paid by": entries.payers[index] or None}
+                 for index in items],
+                column_config={"Paid by": st.column_config.SelectboxColumn(
+                    options=names, help="Leave blank for whoever paid the bill")},
+                disabled=["Item", "Cost"],
+                hide_index=True,
+                key=f"payers_{hash(tuple(entries.ids[index] for index in items))}",
+            )
+            for index, row in zip(items, edited):
+                row_id = entries.ids[index]
+                if record_rows([row_id], "change who paid",
+                               lambda: room.set_payer(row_id, row["Paid by"] or "", st.session_state.session_id)):
+                    entries.set_payer(index, row["Paid by"] or "")
+                    autosave_row(row_id)
+
+        balances = net_balances(totals, paid_cents(entries, default_payer), default_payer)
+        transfers = settle_up(balances)
+        if transfers:
+            st.markdown("\n".join(
+                f"- **{debtor}** pays **{creditor}** ${cents / 100:.2f}" for debtor, creditor, cents in transfers
+            ))
+        else:
+            st.markdown("Everyone is settled up.")
+
+def render_trip_totals():
+    """What everyone owes on each receipt of the trip, and in all"""
+    trip = st.session_state.trip
+    people, per_receipt = trip.totals(SPLIT_ENGINE)
+    with st.expander(f"🧾 Trip total ({len(trip)} receipts)", expanded=True):
+        rows = [
+            {"Receipt": name, **{person: f"${totals.get(person, 0):.2f}" for person in people},
+             "Total": f"${sum(totals.values()):.2f}"}
+            for name, totals in per_receipt
+        ]
+        rows.append({"Receipt": "Whole trip", **{person: f"${amount:.2f}" for person, amount in people.items()},
+                     "Total": f"${sum(people.values()):.2f}"})
+        st.table(rows)
+
+def rerun_workspace():
+    """Rerun only the workspace fragment, or the whole app outside a fragment rerun"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def render_item_grid(metrics: RerunMetrics):
+    """Render the item rows, windowed around the active row on long receipts"""
+    entries = st.session_state.entries
     names = get_names()
-    subtotals = {name: Decimal('0') for name in names}
-    
-    for entry in st.session_state.entries:
-        if not entry["cost"].strip():
-            continue
-        try:
-            cost = Decimal(entry["cost"])
-            if cost < 0:
-                continue
-            selected_people = [key for key in names if entry[key]]
-            if selected_people:
-                split_cost = cost / len(selected_people)
-                for person in selected_people:
-                    subtotals[person] += split_cost
-        except InvalidOperation:
-            continue
-    
-    grand_subtotal = sum(subtotals.values())
-    
-    tax_val = Decimal('0')
-    delivery_val = Decimal('0')
-    if st.session_state.show_tax and st.session_state.tax_amount.strip():
-        try:
-            tv = Decimal(st.session_state.tax_amount)
-            if tv >= 0:
-                tax_val = tv
-        except InvalidOperation:
-            pass
-    if st.session_state.show_delivery and st.session_state.delivery_amount.strip():
-        try:
-            dv = Decimal(st.session_state.delivery_amount)
-            if dv >= 0:
-                delivery_val = dv
-        except InvalidOperation:
-            pass
+    row_count = len(entries)
+    start, stop = 0, row_count
+    if row_count > GRID_WINDOW_BEFORE + GRID_WINDOW_AFTER + 1:
+        st.toggle("Edit all rows", key="show_all_rows")
+        if not st.session_state.get("show_all_rows", False):
+            start, stop = grid_window(st.session_state.active_index, row_count)
+    page_size = stop - start
 
-    extras = tax_val + delivery_val
-    totals = dict(subtotals)
-    if extras > 0 and grand_subtotal > 0:
-        for name in names:
-            proportion = subtotals[name] / grand_subtotal
-            totals[name] = subtotals[name] + extras * proportion
+    # Rows outside the window are shown read-only; paging moves the window
+    if start > 0:
+        with st.expander(f"Items 1–{start} (read-only)"):
+            st.markdown(summarize_rows(entries, 0, start))
+        if st.button("⬆️ Earlier items", key="grid_page_up"):
+            st.session_state.active_index = max(0, start - page_size + GRID_WINDOW_BEFORE)
+            rerun_workspace()
+
+    # Costs are checked once as they are set; rows outside the window are counted here
+    if entries.errors:
+        invalid = len(entries.errors)
+        st.caption(f":red[⚠️ {invalid} item{'s' if invalid > 1 else ''} with a cost that is not an amount, "
+                   f"counted as $0]")
+
+    entries_to_delete = []
+
+    # Process existing entries and add new ones dynamically
+    for index in entries.row_indices(start):
+        # Rows appended while rendering the last row stay in the window
+        if index >= stop and stop < row_count:
+            break
+        row_id = entries.ids[index]
+        metrics.count("grid_rows")
+        metrics.count("grid_widgets", len(names) + 2)
+        # Create columns: cost input + checkboxes for all names + delete button
+        col_weights = [3] + [1] * len(names) + [1]
+        cols = st.columns(col_weights)
+        
+        # Cost input
+        current_value = cols[0].text_input(
+            "Cost",
+            value=entries.costs[index],
+            key=f"cost_{row_id}",
+            placeholder=f"Item {index + 1} amount",
+            label_visibility="collapsed",
+            on_change=lambda r=row_id: handle_input_change(r)
+        )
+        error = entries.errors.get(row_id)
+        if error:
+            cols[0].caption(f":red[{error}, counted as $0]")
+        
+        # If this is the last row and user started typing, add a new row
+        if index == len(entries) - 1 and current_value.strip():
+            # Added to the copy too, so the new row renders in this run
+            entries.append(row_id=st.session_state.room.append_row(st.session_state.session_id))
+            move_to_next_row(index)
+        
+        # Checkboxes for all names (base + temporary)
+        for i, name in enumerate(names):
+            cb_key = f"{name}_{row_id}"
+            # Seeded from the rows; only a click (the on_change callback) writes back
+            if cb_key not in st.session_state:
+                st.session_state[cb_key] = entries.flag(index, name)
+            cols[i+1].checkbox(
+                name, 
+                key=cb_key,
+                on_change=lambda r=row_id, n=name: handle_checkbox_change(r, n)
+            )
+        
+        # Delete button
+        delete_col_index = len(names) + 1
+        if cols[delete_col_index].button("🗑️", key=f"delete_{row_id}"):
+            entries_to_delete.append(row_id)
 
-    result_totals = {k: float(v.quantize(Decimal('0.01'))) for k, v in totals.items()}
-    result_subtotals = {k: float(v.quantize(Decimal('0.01'))) for k, v in subtotals.items()}
-    return result_totals, result_subtotals, float(tax_val.quantize(Decimal('0.01'))), float(delivery_val.quantize(Decimal('0.01')))
+    if stop < row_count:
+        if st.button("⬇️ Later items", key="grid_page_down"):
+            st.session_state.active_index = min(row_count - 1, stop + GRID_WINDOW_BEFORE)
+            rerun_workspace()
+        with st.expander(f"Items {stop + 1}–{row_count} (read-only)"):
+            st.markdown(summarize_rows(entries, stop, row_count))
+
+    # Process deletions after the loop
+    if entries_to_delete:
+        delete_entries(entries_to_delete)
+        rerun_workspace()
+
+# Each stop of a trip is its own receipt, with its own tax and delivery.
+# Shared rooms are a single receipt, so they don't offer this
+if not st.session_state.room_id:
+    trip = st.session_state.trip
+    if "receipt" not in st.session_state:
+        st.session_state.receipt = trip.active
+    receipt_col, name_col, add_col, remove_col = st.columns([2, 2, 1, 1])
+    receipt_col.selectbox(
+        "Receipt", list(range(len(trip))), key="receipt",
+        format_func=lambda index: trip.receipts[index].name, on_change=select_receipt,
+    )
+    name_col.text_input("New receipt", placeholder="Store name (e.g., Costco)", key="new_receipt_input")
+    add_col.button("Add Receipt", key="add_receipt_button", on_click=add_receipt)
+    remove_col.button("Remove Receipt", key="remove_receipt_button", on_click=remove_receipt, disabled=len(trip) == 1)
 
 # Add temporary member section
 st.markdown("---")
@@ -247,22 +701,15 @@ with col1:
 with col2:
     if st.button("Add Member", key="add_member_button"):
         if new_member.strip() and new_member.strip() not in get_names():
-            st.session_state.temp_members.append(new_member.strip())
-            # Add the new member to all existing entries
-            for entry in st.session_state.entries:
-                entry[new_member.strip()] = False
+            add_member(new_member.strip())
             st.rerun()
         elif new_member.strip() in get_names():
             st.error("Member already exists!")
 
 with col3:
     if st.button("Clear All", key="clear_temp_members_button"):
-        st.session_state.temp_members = []
-        # Remove temp members from all entries
-        for entry in st.session_state.entries:
-            for temp_member in st.session_state.temp_members:
-                if temp_member in entry:
-                    del entry[temp_member]
+        # Remove temp member columns from the entries
+        remove_members(list(st.session_state.temp_members), "clear all temporary members")
         st.rerun()
 
 # Show current temporary members with individual remove buttons
@@ -272,360 +719,269 @@ if st.session_state.temp_members:
     for idx, member in enumerate(st.session_state.temp_members):
         with member_cols[idx]:
             if st.button(f"❌ {member}", key=f"remove_temp_{idx}"):
-                st.session_state.temp_members.remove(member)
-                for entry in st.session_state.entries:
-                    entry.pop(member, None)
+                remove_members([member], f"remove {member}")
                 st.rerun()
     st.markdown("---")
 
 # Header
 st.markdown("<h1 style='text-align: center;'>Shopping Expense Splitter 🛍️</h1>", unsafe_allow_html=True)
 
-# Calculate totals
-totals, subtotals, tax_applied, delivery_applied = calculate_totals()
-subtotal_sum = sum(subtotals.values())
-total_sum = sum(totals.values())
+# Bulk import: paste quick-entry lines or upload a CSV/TSV in one go, or a
+# receipt's own text (an e-receipt or an OCR dump) with everyone ticked
+with st.expander("📥 Bulk import"):
+    receipt_text = st.radio(
+        "Format", ["Quick entry", "Receipt text"], horizontal=True, key="bulk_format",
+    ) == "Receipt text"
+    pasted = st.text_area(
+        "One item per line", key="bulk_text",
+        placeholder="KS ORG EGGS 24CT  8.99\nBANANAS  1.49\nTAX  0.73" if receipt_text else "12.50mr\n30a\n8.99mra",
+    )
+    uploaded = st.file_uploader("Or upload a receipt file", type=["csv", "tsv", "txt"], key="bulk_file")
+    if st.button("Import", key="bulk_import_button"):
+        lines = decode_lines(uploaded) if uploaded is not None else pasted.splitlines()
+        if receipt_text:
+            result = parse_receipt(lines, tuple(get_names()))
+        elif uploaded is not None:
+            result = parse_upload(uploaded.name, lines, get_names())
+        else:
+            result = parse_lines(lines, get_names())
+        if len(result):
+            import_entries(result)
+            st.success(f"Imported {len(result)} items")
+        if receipt_text and result.tax:
+            prefill_tax(result.tax)
+            st.info(f"Filled in the receipt's tax of ${result.tax}")
+        if result.errors:
+            st.warning(f"Skipped {len(result.errors)} lines:\n\n" + "\n".join(
+                f"- line {line_no}: `{text}` ({error})" for line_no, text, error in result.errors[:20]
+            ))
+        if result.warnings:
+            st.info(f"Check {len(result.warnings)} lines:\n\n" + "\n".join(
+                f"- line {line_no}: `{text}` ({note})" for line_no, text, note in result.warnings[:20]
+            ))
 
-# Check if we have temporary members to determine layout
-has_temp_members = len(st.session_state.temp_members) > 0
+# The item grid and the split cards re-run on their own when a row changes,
+# without re-rendering the member bar, the styles or the guide sections
+@st.fragment
+def render_workspace():
+    # Timed on its own, since the fragment also reruns without the rest of the script
+    metrics = RerunMetrics("workspace")
+    sync_room()
+    # The workspace renders from a copy of the rows, so sessions sharing the
+    # room wait for the lock only while it is taken; edits still go to the room
+    room = st.session_state.room
+    with room.lock:
+        st.session_state.entries = room.entries.copy()
+        st.session_state.temp_members = list(room.temp_members)
+    totals = layout_workspace(metrics)
+    with metrics.phase("split_editor"):
+        render_split_editor()
+    with metrics.phase("settlement"):
+        render_settlement(totals)
+    if len(st.session_state.trip) > 1:
+        with metrics.phase("trip"):
+            render_trip_totals()
+    st.session_state.workspace_record = metrics_registry().record(metrics)
 
-if has_temp_members:
-    # When temporary members exist, use two-column layout: Left (Form), Right (Cards stacked)
-    left_col, right_col = st.columns([3, 1])
-    
-    with left_col:
-        # Main expense splitter form
-        st.markdown("### 🛍️ Add Items")
-        
-        # Dynamic form with automatic row addition
-        form_changed = False
-        entries_to_delete = []
-
-        # Process existing entries and add new ones dynamically
-        for index, entry in enumerate(st.session_state.entries):
-            names = get_names()
-            # Create columns: cost input + checkboxes for all names + delete button
-            col_weights = [3] + [1] * len(names) + [1]
-            cols = st.columns(col_weights)
-            
-            # Cost input
-            current_value = cols[0].text_input(
-                "Cost",
-                value=entry["cost"],
-                key=f"cost_{index}",
-                placeholder=f"Item {index + 1} amount",
-                label_visibility="collapsed",
-                on_change=lambda i=index: handle_input_change(i)
-            )
-            
-            # If this is the last row and user started typing, add a new row
-            if index == len(st.session_state.entries) - 1 and current_value.strip():
-                st.session_state.entries.append({"cost": "", **{name: False for name in get_names()}})
-                form_changed = True
-                move_to_next_row(index)
-            
-            # Checkboxes for all names (base + temporary)
-            for i, name in enumerate(names):
-                cb_key = f"{name}_{index}"
-                if cb_key not in st.session_state:
-                    st.session_state[cb_key] = st.session_state.entries[index].get(name, False)
-                entry[name] = cols[i+1].checkbox(
-                    name, 
-                    key=cb_key,
-                    on_change=lambda i=index, n=name: handle_checkbox_change(i, n)
-                )
-            
-            # Delete button
-            delete_col_index = len(names) + 1
-            if cols[delete_col_index].button("🗑️", key=f"delete_{index}"):
-                entries_to_delete.append(index)
-
-        # Process deletions after the loop
-        if entries_to_delete:
-            for index in sorted(entries_to_delete, reverse=True):
-                st.session_state.entries.pop(index)
-            if not st.session_state.entries:
-                st.session_state.entries.append({"cost": "", **{name: False for name in get_names()}})
-            st.rerun()
+# Column widths and the column each workspace component goes into. Every
+# component is rendered once with the same keys whichever layout is used,
+# so adding the first temporary member keeps the widgets' state
+WORKSPACE_LAYOUTS = {
+    # Temporary members widen the grid: the form on the left, both cards stacked on the right
+    "stacked": ([3, 1], {"form": 0, "split_card": 1, "amount_card": 1}),
+    # Otherwise the form sits between the Total Split and Total Amount cards
+    "centered": ([1, 2, 1], {"split_card": 0, "form": 1, "amount_card": 2}),
+}
 
-        # Tax & Delivery toggle buttons
-        tax_col, delivery_col, _ = st.columns([1, 1, 2])
-        with tax_col:
-            if st.button("Remove Tax" if st.session_state.show_tax else "Add Tax", key="toggle_tax_temp"):
-                st.session_state.show_tax = not st.session_state.show_tax
-                if not st.session_state.show_tax:
-                    st.session_state.tax_amount = ""
-                st.rerun()
-        with delivery_col:
-            if st.button("Remove Delivery" if st.session_state.show_delivery else "Add Delivery", key="toggle_delivery_temp"):
-                st.session_state.show_delivery = not st.session_state.show_delivery
-                if not st.session_state.show_delivery:
-                    st.session_state.delivery_amount = ""
-                st.rerun()
+def toggle_extra(flag: str, amount: str):
+    """Show or hide the tax or delivery input, clearing the amount when hidden"""
+    before = settings()
+    st.session_state[flag] = not st.session_state[flag]
+    if not st.session_state[flag]:
+        st.session_state[amount] = ""
+    record_settings(before, f"{'add' if st.session_state[flag] else 'remove'} {amount.split('_')[0]}")
 
-        if st.session_state.show_tax or st.session_state.show_delivery:
-            extra_cols = st.columns(2)
-            if st.session_state.show_tax:
-                with extra_cols[0]:
-                    st.text_input(
-                        "Tax Amount",
-                        value=st.session_state.tax_amount,
-                        placeholder="Enter tax amount",
-                        key="tax_input_temp",
-                        on_change=handle_tax_input_change,
-                        args=("tax_input_temp",),
-                    )
-            if st.session_state.show_delivery:
-                with extra_cols[1]:
-                    st.text_input(
-                        "Delivery Amount",
-                        value=st.session_state.delivery_amount,
-                        placeholder="Enter delivery amount",
-                        key="delivery_input_temp",
-                        on_change=handle_delivery_input_change,
-                        args=("delivery_input_temp",),
-                    )
-
-    with right_col:
-        # Total Split card (top)
-        has_extras = tax_applied > 0 or delivery_applied > 0
-        if any(totals.values()):
-            splits_lines = []
-            for person in totals:
-                sub = subtotals[person]
-                extra = totals[person] - sub
-                if has_extras and extra > 0:
-                    amount_html = (
-                        f"<span style='color: #6c757d;'>${sub:.2f}</span>"
-                        f" <span style='color: #6c757d;'>+</span> "
-                        f"<span style='color: #856404;'>${extra:.2f}</span>"
-                        f" <span style='color: #6c757d;'>=</span> "
-                        f"<span style='font-weight: bold; color: #28a745;'>${totals[person]:.2f}</span>"
-                    )
-                else:
-                    amount_html = f"<span style='font-weight: bold; color: #28a745;'>${totals[person]:.2f}</span>"
-                splits_lines.append(
-                    f"<div style='display: flex; justify-content: space-between; padding: 0.5rem 0; border-bottom: 1px solid #e9ecef; font-size: 0.9rem;'>"
-                    f"<span style='font-weight: 500;'>{person}:</span>"
-                    f"<span>{amount_html}</span>"
-                    f"</div>"
-                )
-            splits_html = "".join(splits_lines)
-            st.markdown(f"""<div style='background-color: #f8f9fa; padding: 1.5rem; border-radius: 0.5rem; border-left: 4px solid #007bff; box-shadow: 0 2px 4px rgba(0,0,0,0.1); margin-bottom: 1rem;'>
-<h3 style='margin: 0 0 1rem 0; color: #007bff; font-size: 1.1rem;'>💰 Total Split</h3>
-{splits_html}
-</div>""", unsafe_allow_html=True)
-        else:
-            st.markdown("""<div style='background-color: #f8f9fa; padding: 1.5rem; border-radius: 0.5rem; border-left: 4px solid #007bff; box-shadow: 0 2px 4px rgba(0,0,0,0.1); margin-bottom: 1rem;'>
-<h3 style='margin: 0 0 1rem 0; color: #007bff; font-size: 1.1rem;'>💰 Total Split</h3>
-<p style='color: #6c757d; font-size: 0.9rem; margin: 0;'>Add items to see splits</p>
-</div>""", unsafe_allow_html=True)
-        
-        # Total Amount card (bottom)
-        breakdown_lines = ""
-        if tax_applied > 0 or delivery_applied > 0:
-            breakdown_lines += f"<div style='font-size: 0.85rem; color: #856404; margin-bottom: 0.3rem;'>Subtotal: ${subtotal_sum:.2f}</div>"
-            if tax_applied > 0:
-                breakdown_lines += f"<div style='font-size: 0.85rem; color: #856404; margin-bottom: 0.3rem;'>Tax: ${tax_applied:.2f}</div>"
-            if delivery_applied > 0:
-                breakdown_lines += f"<div style='font-size: 0.85rem; color: #856404; margin-bottom: 0.3rem;'>Delivery: ${delivery_applied:.2f}</div>"
-        st.markdown(f"""<div style='background-color: #fff3cd; padding: 1.5rem; border-radius: 0.5rem; border-left: 4px solid #ffc107; box-shadow: 0 2px 4px rgba(0,0,0,0.1); text-align: center; margin-bottom: 1rem;'>
-<h3 style='margin: 0 0 1rem 0; color: #856404; font-size: 1.1rem;'>💵 Total Amount</h3>
-{breakdown_lines}
-<div style='font-size: 1.8rem; font-weight: bold; color: #ff4b4b;'>${total_sum:.2f}</div>
-</div>""", unsafe_allow_html=True)
-
-else:
-    # When no temporary members, use three-column layout: Left (Total Split), Middle (Form), Right (Total Amount)
-    left_col, middle_col, right_col = st.columns([1, 2, 1])
-
-    with left_col:
-        # Left card - Total Split
-        has_extras = tax_applied > 0 or delivery_applied > 0
-        if any(totals.values()):
-            splits_lines = []
-            for person in totals:
-                sub = subtotals[person]
-                extra = totals[person] - sub
-                if has_extras and extra > 0:
-                    amount_html = (
-                        f"<span style='color: #6c757d;'>${sub:.2f}</span>"
-                        f" <span style='color: #6c757d;'>+</span> "
-                        f"<span style='color: #856404;'>${extra:.2f}</span>"
-                        f" <span style='color: #6c757d;'>=</span> "
-                        f"<span style='font-weight: bold; color: #28a745;'>${totals[person]:.2f}</span>"
-                    )
-                else:
-                    amount_html = f"<span style='font-weight: bold; color: #28a745;'>${totals[person]:.2f}</span>"
-                splits_lines.append(
-                    f"<div style='display: flex; justify-content: space-between; padding: 0.5rem 0; border-bottom: 1px solid #e9ecef; font-size: 0.9rem;'>"
-                    f"<span style='font-weight: 500;'>{person}:</span>"
-                    f"<span>{amount_html}</span>"
-                    f"</div>"
-                )
-            splits_html = "".join(splits_lines)
-            st.markdown(f"""<div style='background-color: #f8f9fa; padding: 1.5rem; border-radius: 0.5rem; border-left: 4px solid #007bff; box-shadow: 0 2px 4px rgba(0,0,0,0.1); margin-bottom: 1rem;'>
-<h3 style='margin: 0 0 1rem 0; color: #007bff; font-size: 1.1rem;'>💰 Total Split</h3>
-{splits_html}
-</div>""", unsafe_allow_html=True)
-        else:
-            st.markdown("""<div style='background-color: #f8f9fa; padding: 1.5rem; border-radius: 0.5rem; border-left: 4px solid #007bff; box-shadow: 0 2px 4px rgba(0,0,0,0.1); margin-bottom: 1rem;'>
-<h3 style='margin: 0 0 1rem 0; color: #007bff; font-size: 1.1rem;'>💰 Total Split</h3>
-<p style='color: #6c757d; font-size: 0.9rem; margin: 0;'>Add items to see splits</p>
-</div>""", unsafe_allow_html=True)
-
-    with middle_col:
-        # Main expense splitter form
-        st.markdown("### 🛍️ Add Items")
-        
-        # Dynamic form with automatic row addition
-        form_changed = False
-        entries_to_delete = []
-
-        # Process existing entries and add new ones dynamically
-        for index, entry in enumerate(st.session_state.entries):
-            names = get_names()
-            # Create columns: cost input + checkboxes for all names + delete button
-            col_weights = [3] + [1] * len(names) + [1]
-            cols = st.columns(col_weights)
-            
-            # Cost input
-            current_value = cols[0].text_input(
-                "Cost",
-                value=entry["cost"],
-                key=f"cost_{index}",
-                placeholder=f"Item {index + 1} amount",
-                label_visibility="collapsed",
-                on_change=lambda i=index: handle_input_change(i)
+def render_extras():
+    """Tax & Delivery toggle buttons and their amount inputs"""
+    tax_col, delivery_col, _ = st.columns([1, 1, 2])
+    tax_col.button(
+        "Remove Tax" if st.session_state.show_tax else "Add Tax",
+        key="toggle_tax", on_click=toggle_extra, args=("show_tax", "tax_amount"),
+    )
+    delivery_col.button(
+        "Remove Delivery" if st.session_state.show_delivery else "Add Delivery",
+        key="toggle_delivery", on_click=toggle_extra, args=("show_delivery", "delivery_amount"),
+    )
+
+    if st.session_state.show_tax or st.session_state.show_delivery:
+        extra_cols = st.columns(2)
+        if st.session_state.show_tax:
+            extra_cols[0].text_input(
+                "Tax Amount",
+                value=st.session_state.tax_amount,
+                placeholder="Enter tax amount",
+                key="tax_input",
+                on_change=handle_tax_input_change,
+                args=("tax_input",),
             )
-            
-            # If this is the last row and user started typing, add a new row
-            if index == len(st.session_state.entries) - 1 and current_value.strip():
-                st.session_state.entries.append({"cost": "", **{name: False for name in get_names()}})
-                form_changed = True
-                move_to_next_row(index)
-            
-            # Checkboxes for all names (base + temporary)
-            for i, name in enumerate(names):
-                cb_key = f"{name}_{index}"
-                if cb_key not in st.session_state:
-                    st.session_state[cb_key] = st.session_state.entries[index].get(name, False)
-                entry[name] = cols[i+1].checkbox(
-                    name, 
-                    key=cb_key,
-                    on_change=lambda i=index, n=name: handle_checkbox_change(i, n)
-                )
-            
-            # Delete button
-            delete_col_index = len(names) + 1
-            if cols[delete_col_index].button("🗑️", key=f"delete_{index}"):
-                entries_to_delete.append(index)
-
-        # Process deletions after the loop
-        if entries_to_delete:
-            for index in sorted(entries_to_delete, reverse=True):
-                st.session_state.entries.pop(index)
-            if not st.session_state.entries:
-                st.session_state.entries.append({"cost": "", **{name: False for name in get_names()}})
-            st.rerun()
+            show_amount_error(extra_cols[0], st.session_state.tax_amount)
+        if st.session_state.show_delivery:
+            extra_cols[1].text_input(
+                "Delivery Amount",
+                value=st.session_state.delivery_amount,
+                placeholder="Enter delivery amount",
+                key="delivery_input",
+                on_change=handle_delivery_input_change,
+                args=("delivery_input",),
+            )
+            show_amount_error(extra_cols[1], st.session_state.delivery_amount)
 
-        # Tax & Delivery toggle buttons
-        tax_col, delivery_col, _ = st.columns([1, 1, 2])
-        with tax_col:
-            if st.button("Remove Tax" if st.session_state.show_tax else "Add Tax", key="toggle_tax_main"):
-                st.session_state.show_tax = not st.session_state.show_tax
-                if not st.session_state.show_tax:
-                    st.session_state.tax_amount = ""
-                st.rerun()
-        with delivery_col:
-            if st.button("Remove Delivery" if st.session_state.show_delivery else "Add Delivery", key="toggle_delivery_main"):
-                st.session_state.show_delivery = not st.session_state.show_delivery
-                if not st.session_state.show_delivery:
-                    st.session_state.delivery_amount = ""
-                st.rerun()
+def render_undo_redo():
+    """Undo and redo buttons, labelled with the change they would revert or re-apply"""
+    history = st.session_state.history
+    undo_col, redo_col, _ = st.columns([1, 1, 4])
+    next_undo, next_redo = history.next_undo(), history.next_redo()
+    clicked = None
+    if undo_col.button("↩️ Undo", key="undo", disabled=next_undo is None,
+                       help=f"Undo: {next_undo.label}" if next_undo else None):
+        clicked = undo_redo(True)
+    if redo_col.button("↪️ Redo", key="redo", disabled=next_redo is None,
+                       help=f"Redo: {next_redo.label}" if next_redo else None):
+        clicked = undo_redo(False)
+    if clicked is None:
+        return
+    if clicked.kind.endswith("members"):
+        # The member bar is outside the workspace fragment
+        st.rerun()
+    rerun_workspace()
 
-        if st.session_state.show_tax or st.session_state.show_delivery:
-            extra_cols = st.columns(2)
-            if st.session_state.show_tax:
-                with extra_cols[0]:
-                    st.text_input(
-                        "Tax Amount",
-                        value=st.session_state.tax_amount,
-                        placeholder="Enter tax amount",
-                        key="tax_input_main",
-                        on_change=handle_tax_input_change,
-                        args=("tax_input_main",),
-                    )
-            if st.session_state.show_delivery:
-                with extra_cols[1]:
-                    st.text_input(
-                        "Delivery Amount",
-                        value=st.session_state.delivery_amount,
-                        placeholder="Enter delivery amount",
-                        key="delivery_input_main",
-                        on_change=handle_delivery_input_change,
-                        args=("delivery_input_main",),
-                    )
-
-    with right_col:
-        # Right card - Total Amount
-        breakdown_lines = ""
-        if tax_applied > 0 or delivery_applied > 0:
-            breakdown_lines += f"<div style='font-size: 0.85rem; color: #856404; margin-bottom: 0.3rem;'>Subtotal: ${subtotal_sum:.2f}</div>"
-            if tax_applied > 0:
-                breakdown_lines += f"<div style='font-size: 0.85rem; color: #856404; margin-bottom: 0.3rem;'>Tax: ${tax_applied:.2f}</div>"
-            if delivery_applied > 0:
-                breakdown_lines += f"<div style='font-size: 0.85rem; color: #856404; margin-bottom: 0.3rem;'>Delivery: ${delivery_applied:.2f}</div>"
-        st.markdown(f"""<div style='background-color: #fff3cd; padding: 1.5rem; border-radius: 0.5rem; border-left: 4px solid #ffc107; box-shadow: 0 2px 4px rgba(0,0,0,0.1); text-align: center; margin-bottom: 1rem;'>
-<h3 style='margin: 0 0 1rem 0; color: #856404; font-size: 1.1rem;'>💵 Total Amount</h3>
-{breakdown_lines}
-<div style='font-size: 1.8rem; font-weight: bold; color: #ff4b4b;'>${total_sum:.2f}</div>
-</div>""", unsafe_allow_html=True)
+def render_form(metrics: RerunMetrics):
+    """Main expense splitter form"""
+    st.markdown("### 🛍️ Add Items")
+    render_undo_redo()
+    with metrics.phase("grid"):
+        render_item_grid(metrics)
+    render_extras()
 
-# App Guide Section
-st.markdown("---")
+def layout_workspace(metrics: RerunMetrics):
+    # Calculate totals
+    with metrics.phase("calculate_totals"):
+        totals, subtotals, tax_applied, delivery_applied = calculate_totals()
+    with metrics.phase("cards"):
+        split_card, amount_card = render_cards(totals, subtotals, tax_applied, delivery_applied)
+
+    widths, slots = WORKSPACE_LAYOUTS["stacked" if st.session_state.temp_members else "centered"]
+    columns = st.columns(widths)
+    # In render order, which keeps the Total Split card above Total Amount when stacked
+    components = {
+        "form": lambda: render_form(metrics),
+        "split_card": lambda: st.markdown(split_card, unsafe_allow_html=True),
+        "amount_card": lambda: st.markdown(amount_card, unsafe_allow_html=True),
+    }
+    for name, render in components.items():
+        with columns[slots[name]]:
+            render()
+
+    return totals
+
+with run_metrics.phase("workspace"):
+    render_workspace()
 
-# About section
-st.subheader("📱 About This App")
-st.write("""
-While Splitwise is a popular expense-sharing app, it has limitations that can make it frustrating for quick, multiple-item splits:
+# In a shared room, rerun when another session has edited the receipt
+@st.fragment(run_every=ROOM_POLL_SECONDS)
+def watch_room():
+    changes = st.session_state.room.changes_since(st.session_state.room_version)
+    if changes and all(delta.origin == st.session_state.session_id for delta in changes):
+        st.session_state.room_version = changes[-1].version
+    elif changes != []:
+        st.rerun()
+
+if st.session_state.room_id:
+    watch_room()
+
+def export_splits(trip: Trip):
+    """The trip's receipts for export, each one locked while it is written"""
+    for receipt in trip.receipts:
+        with receipt.room.lock:
+            yield Split(receipt.name, receipt.room.entries, *receipt.extras(), receipt.room.ledger)
 
-- **Splitwise's Limitations:**
-    - Limited to 2 free entries before blocking functionality
-    - Requires multiple steps to split each item
-    - Time-consuming for bulk entries (imagine splitting 50 shopping items!)
-    - Needs login and setup
+def export_file(trip: Trip, write, fmt: str):
+    """A download's contents, built only when its button is clicked"""
+    def build() -> bytes:
+        out = io.BytesIO()
+        write(export_splits(trip), out, fmt)
+        return out.getvalue()
+    return build
 
-- **Our Solution:**
-    - ⚡ Instant item addition with no limits
-    - 🎯 Quick-entry with initials (e.g., "100mk" for instant split)
-    - 🧮 Automatic split calculations (no manual calculator needed)
-    - 🚀 No login, no setup - just start splitting!
+# Downloads of every receipt's item splits and per-person totals
+with st.expander("📤 Export"):
+    formats = available_formats()
+    export_format = st.radio("Format", formats, horizontal=True, key="export_format")
+    if formats != FORMATS:
+        st.caption("Parquet export needs pyarrow (pip install pyarrow)")
+    items_col, people_col, _ = st.columns([1, 1, 2])
+    items_col.download_button(
+        "Item splits", export_file(st.session_state.trip, write_items, export_format),
+        file_name=f"maksplit-items.{export_format}", mime=MIME_TYPES[export_format],
+        key="export_items", on_click="ignore",
+    )
+    people_col.download_button(
+        "Totals per person", export_file(st.session_state.trip, write_people, export_format),
+        file_name=f"maksplit-totals.{export_format}", mime=MIME_TYPES[export_format],
+        key="export_people", on_click="ignore",
+    )
 
-Perfect for shopping trips where you're buying multiple items and need to split them quickly without the hassle of going through multiple steps for each item.
-""")
+# App Guide Section
+st.markdown("---")
 
-# Quick Tips section
-st.write("### ✨ Quick Tips")
+# The guide is sent only while it is shown: open for a new receipt, behind
+# the toggle once there are items
 names = get_names()
 initials = ''.join(name[0].lower() for name in names)
-st.write(f"""
-- **Quick Entry:** Type amount followed by initials ({initials}) to auto-select people
-- **Examples:**
-    - "100m" → $100 for Mustafa only
-    - "50mr" → $50 split between Mustafa and Rohit
-    - "75mra" → $75 split equally among all three
-- **Navigation:** Use Tab or Enter to move between fields
-- **Delete:** Use the 🗑️ button to remove any entry
-""")
-
-# Use Cases section
-st.write("### 💡 Use Cases")
-st.write("""
-- **Shopping Trips:** Quick split for groceries or mall purchases
-- **Restaurant Bills:** Instantly divide shared and individual items
-- **Group Activities:** Split tickets, rentals, or any shared expenses
-""")
+if "show_guide" not in st.session_state:
+    st.session_state.show_guide = not st.session_state.entries.cents.any()
+if st.toggle("📖 Show the guide", key="show_guide"):
+
+    # About section
+    st.subheader("📱 About This App")
+    st.write("""
+    While Splitwise is a popular expense-sharing app, it has limitations that can make it frustrating for quick, multiple-item splits:
+
+    - **Splitwise's Limitations:**
+        - Limited to 2 free entries before blocking functionality
+        - Requires multiple steps to split each item
+        - Time-consuming for bulk entries (imagine splitting 50 shopping items!)
+        - Needs login and setup
+
+    - **Our Solution:**
+        - ⚡ Instant item addition with no limits
+        - 🎯 Quick-entry with initials (e.g., "100mk" for instant split)
+        - 🧮 Automatic split calculations (no manual calculator needed)
+        - 🚀 No login, no setup - just start splitting!
+
+    Perfect for shopping trips where you're buying multiple items and need to split them quickly without the hassle of going through multiple steps for each item.
+    """)
+
+    # Quick Tips section
+    st.write("### ✨ Quick Tips")
+    st.write(f"""
+    - **Quick Entry:** Type amount followed by initials ({initials}) to auto-select people
+    - **Examples:**
+        - "100m" → $100 for Mustafa only
+        - "50mr" → $50 split between Mustafa and Rohit
+        - "75mra" → $75 split equally among all three
+    - **Temporary members:** Type their name or a unique start of it (e.g. "12.50 ms+ram" with Ram added)
+    - **Navigation:** Use Tab or Enter to move between fields
+    - **Delete:** Use the 🗑️ button to remove any entry
+    """)
+
+    # Use Cases section
+    st.write("### 💡 Use Cases")
+    st.write("""
+    - **Shopping Trips:** Quick split for groceries or mall purchases
+    - **Restaurant Bills:** Instantly divide shared and individual items
+    - **Group Activities:** Split tickets, rentals, or any shared expenses
+    """)
 
 # Footer
 st.markdown("---")
@@ -634,3 +990,42 @@ st.markdown(f"""
     💡 Type amount followed by '{initials}' to auto-select people (e.g., "100mr" for Mustafa and Rohit)
     </div>
 """, unsafe_allow_html=True)
+
+def record_rerun() -> dict:
+    """Record this run's timings, logging them and refreshing the metrics file"""
+    registry = metrics_registry()
+    gauges = {
+        "session_state_keys": len(st.session_state),
+        **{f"card_cache_{name}": value for name, value in card_cache_stats().items()},
+    }
+    if st.session_state.debug:
+        # Walking every row is not free, so only measured while someone is looking
+        gauges["session_state_bytes"] = deep_size(st.session_state.to_dict())
+    record = registry.record(run_metrics, gauges)
+    if METRICS_PATH:
+        try:
+            registry.write_textfile(METRICS_PATH, every=METRICS_WRITE_SECONDS)
+        except OSError:
+            pass
+    return record
+
+def render_debug_panel(record: dict):
+    """Opt-in panel with this rerun's timings and the server-wide percentiles"""
+    registry = metrics_registry()
+    with st.expander("🩺 Rerun timings", expanded=True):
+        for last in (record, st.session_state.get("workspace_record")):
+            if last:
+                st.caption(f"Last {last['scope']} run (ms): " + ", ".join(f"{name} {ms:.1f}" for name, ms in last["ms"].items()))
+                st.caption(", ".join(f"{name}: {value}" for name, value in last.items() if name not in ("scope", "ms")))
+        order = ["total", "restore", "workspace", "calculate_totals", "cards", "grid", "split_editor", "settlement",
+                 "trip"]
+        for scope, title in (("app", "Full reruns"), ("workspace", "Workspace reruns")):
+            table = format_table(registry.percentiles(scope), order)
+            if table:
+                st.markdown(f"**{title}**")
+                st.table(table)
+        st.download_button("Metrics (Prometheus text)", registry.prometheus_text(), file_name="maksplit.prom")
+
+rerun_record = record_rerun()
+if st.session_state.debug:
+    render_debug_panel(rerun_record)